@@ -4,16 +4,21 @@ from file_classifier_tool import ADGMDocumentClassifierTool
 from adgm_rag_tool import ADGMRAGTool
 from file_read_tool import SimpleFileReaderTool
 from rewrite_tool import SimpleFileWriterTool
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
+from red_flag_scanner_tool import ADGMRedFlagScannerTool
+from regulation_digest_tool import RegulationDigestTool
 load_dotenv()
 import os
 
 openai_api_key = os.getenv("OPEN_AI_KEY")
 
+# Tools are cheap to construct, heavy resources (models, vector store, LLM clients) load on first use
 file_classifier_tool = ADGMDocumentClassifierTool()
 adgm_rag_tool = ADGMRAGTool()
 read_files_tool = SimpleFileReaderTool()
+# The analyzer only needs the relevant clauses, the rewriter keeps the full text to quote from
+packed_read_files_tool = SimpleFileReaderTool(token_budget=int(os.getenv("ADGM_CONTEXT_TOKEN_BUDGET", "6000")))
+red_flag_scanner_tool = ADGMRedFlagScannerTool()
+regulation_digest_tool = RegulationDigestTool()
 rewrite_tool = SimpleFileWriterTool()
 
 DocumentClassifier = Agent(
@@ -51,15 +56,24 @@ RedFlagAnalyzer = Agent(
         "You need to give an analysis or report all the available compulsorily"
 
         "ANALYSIS METHODOLOGY:\n"
-        "You work systematically through each document type using your RAG knowledge base to retrieve "
-        "specific ADGM regulations. For each document, you MUST follow this process:\n\n"
+        "0. ALWAYS call the ADGM Red Flag Scanner first. It deterministically finds the mechanical red flags "
+        "(UAE Federal Court references, non-ADGM registered office, missing signatures or dates, undisclosed 25%+ "
+        "beneficial ownership) with severity and location. Report its findings as they are; only findings marked "
+        "needs_review require you to inspect the document text. Use your reading and RAG queries for citations "
+        "and for the judgement-based checks the scanner cannot make.\n"
+        "You work systematically through each document type using the ADGM regulations. "
+        "For each document, you MUST follow this process:\n\n"
         
-        "1. INITIAL RAG QUERY: Always start with 'What are the complete ADGM compliance requirements for [document_type]?'\n"
-        "2. JURISDICTION CHECK: Query 'What court jurisdiction requirements apply to ADGM [document_type]?'\n"
-        "3. EXECUTION VALIDATION: Query 'What are the signature and execution requirements for ADGM [document_type]?'\n"
-        "4. CONTENT REQUIREMENTS: Query 'What mandatory clauses must be included in ADGM [document_type]?'\n\n"
+        "1. REQUIREMENTS: Call the ADGM Regulation Digest with the document_type. It returns the cited answers "
+        "to the standard questions below (complete requirements, court jurisdiction, signature and execution, "
+        "mandatory clauses and the document-specific queries), precomputed from the regulations. Check the "
+        "document against them and cite them.\n"
+        "2. RAG FALLBACK: Only if the digest is not_found or stale, or for an issue it does not cover, query the RAG "
+        "tool. Send all queries for a document type in ONE RAG tool call by passing them as the 'queries' list, "
+        "together with 'document_type' so only the regulations for that type are searched, starting with "
+        "'What are the complete ADGM compliance requirements for [document_type]?'\n\n"
         
-        "DOCUMENT-SPECIFIC ANALYSIS RULES:\n\n"
+        "DOCUMENT-SPECIFIC ANALYSIS RULES (the digest answers these queries):\n\n"
         
         "ARTICLES OF ASSOCIATION:\n"
         "- Query: 'What jurisdiction and governing law clauses are required in ADGM Articles?'\n"
@@ -89,7 +103,7 @@ RedFlagAnalyzer = Agent(
         
         "OUTPUT REQUIREMENTS:\n"
         "For every violation found, you MUST provide:\n"
-        "1. Specific ADGM regulation citation from RAG response\n"
+        "1. Specific ADGM regulation citation from the digest or RAG response\n"
         "2. Exact text that violates the requirement\n"
         "3. Suggested compliant clause wording\n"
         "4. Severity level with business impact explanation\n\n"
@@ -102,7 +116,7 @@ RedFlagAnalyzer = Agent(
     ),
     allow_delegation=False,
     verbose=True,
-    tools=[read_files_tool, adgm_rag_tool],  
+    tools=[red_flag_scanner_tool, regulation_digest_tool, packed_read_files_tool, adgm_rag_tool],  
     llm=LLM(
         api_key=openai_api_key,
         model="gpt-4o",
@@ -140,8 +154,10 @@ DocumentRewriterAgent = Agent(
         "2. From previous agent context, extract red flag violations for each file\n"
         "3. For EACH file with violations:\n"
         "   a. Get original content from read_files_tool result\n"
-        "   b. Create corrections list with old/new text pairs\n"
-        "   c. Use SimpleDocumentRewriterTool to rewrite the file\n"
+        "   b. Create corrections list with old/new text pairs, copying 'old' exactly as it appears in one paragraph\n"
+        "   c. Call the Simple File Writer Tool with filename=<original file name> and corrections=<list>;\n"
+        "      it edits the original DOCX in place (formatting kept, highlights and comments added).\n"
+        "      Never send the whole document text. Resend any 'not_found' items with the exact document wording\n"
         "   d. Store the result\n"
         "4. After processing ALL files, compile final JSON report\n\n"
         
@@ -1,9 +1,55 @@
 from crewai import Task
+from crewai.tasks.conditional_task import ConditionalTask
 from Agents import DocumentClassifier, RedFlagAnalyzer, DocumentRewriterAgent
-from crewai import Task
+from pydantic import BaseModel
+from typing import List, Optional
+import os
 
 
-from crewai import Task
+class ClassificationDecision(BaseModel):
+    """Structured output of document_classification, read by the stages that follow it"""
+    is_complete: bool = False
+    completeness_score: float = 0.0
+    present_documents: List[str] = []
+    missing_documents: List[str] = []
+    valid_documents: List[str] = []
+    decision: str = "CONTINUE"
+    reasoning: str = ""
+
+
+def classification_decision(output) -> Optional[ClassificationDecision]:
+    """The decision from a classification TaskOutput/CrewOutput, or None if it was not structured"""
+    if isinstance(getattr(output, "pydantic", None), ClassificationDecision):
+        return output.pydantic
+    try:
+        return ClassificationDecision.model_validate_json(output.raw)
+    except Exception:
+        return None
+
+
+def should_continue(output) -> bool:
+    """
+    Run the analysis unless the classifier says to stop: nothing valid was found, or the
+    package is incomplete and below ADGM_MIN_COMPLETENESS (default 0, any valid document).
+    An unstructured classification output never stops the workflow.
+    """
+    decision = classification_decision(output)
+    if decision is None:
+        return True
+    if decision.is_complete:
+        return True
+    minimum = float(os.getenv("ADGM_MIN_COMPLETENESS", "0"))
+    proceed = decision.completeness_score > 0 and decision.completeness_score >= minimum
+    if not proceed:
+        print(f"⛔ Stopping after classification (completeness {decision.completeness_score:.0%}): "
+              f"{decision.reasoning or 'insufficient documents'}")
+    return proceed
+
+
+def analysis_ran(output) -> bool:
+    """Rewriting needs a red flag analysis, a skipped one has no output"""
+    return bool(getattr(output, "raw", "") and output.raw.strip())
+
 
 document_classification = Task(
     description=(
@@ -18,16 +64,23 @@ document_classification = Task(
         "- List of valid documents for analysis\n"
         "- Missing documents identification\n"
         "- CONTINUE/STOP decision with reasoning\n"
-        "- Filtered document list ready for red-flag analysis"
+        "- Filtered document list ready for red-flag analysis\n"
+        "Return it as JSON with is_complete and completeness_score copied from the classifier tool, "
+        "present_documents, missing_documents, valid_documents (filenames), decision and reasoning"
     ),
     name="Document Classification and Flow Control",
-    agent=DocumentClassifier
+    agent=DocumentClassifier,
+    output_pydantic=ClassificationDecision
 )
 
-red_flag_analysis = Task(
+# Skipped when the classification decides to stop
+red_flag_analysis = ConditionalTask(
+    condition=should_continue,
     description=(
         "1. Continue to process the available valid documents; deprecate only if no valid documents are provided\n"
-        "2. Use RAG tool to retrieve compliance rules for each valid document type\n"
+        "   Start with the ADGM Red Flag Scanner and build on its candidate findings\n"
+        "2. Get the compliance rules for each valid document type from the ADGM Regulation Digest "
+        "(the RAG tool only when no current digest exists)\n"
         "3. Analyze each valid document for red flags and violations\n"
         "4. Do not skip analysis if documents are incomplete; list any missing or incomplete documents\n"
         "5. Generate compliance report for available valid documents only, with per-document sections"
@@ -89,19 +142,20 @@ red_flag_analysis = Task(
  
 )
 
-document_rewriting = Task(
+document_rewriting = ConditionalTask(
+    condition=analysis_ran,
     description=(
         "1. Read all original documents using read_files_tool\n"
         "2. Extract violations from previous red flag analysis\n"
         "3. For each document with violations:\n"
-        "   - Create corrected version of ENTIRE document\n"
-        "   - Highlight all corrections with severity colors\n"
-        "   - Add detailed compliance comments\n"
-        "4. Use DocumentRewriterTool to generate:\n"
+        "   - Build the list of {old, new, reason, severity} corrections\n"
+        "   - Send it to the Simple File Writer Tool with the original filename; the tool applies\n"
+        "     the corrections to the original DOCX with severity highlights and compliance comments\n"
+        "4. The tool generates:\n"
         "   - Corrected DOCX files in /corrected_documents/\n"
         "   - Individual JSON reports for each file\n"
-        "   - Master compliance_corrections_report.json\n"
-        "5. Ensure ALL documents are completely rewritten, not just edited"
+        "   Then write the master compliance_corrections_report.json with the tool's content mode\n"
+        "5. Ensure ALL documents with violations are corrected; never resend whole documents"
     ),
     expected_output=(
         "Document Rewriting Results:\n\n"
@@ -119,7 +173,7 @@ document_rewriting = Task(
         "OUTPUT LOCATIONS:\n"
         "- Corrected documents: /corrected_documents/\n"
         "- JSON reports: /corrected_documents/\n"
-        "- All files saved successfully with full content rewrite"
+        "- All files saved successfully with every correction applied"
     ),
     name="Complete Document Rewriting with JSON Reports",
     agent=DocumentRewriterAgent,
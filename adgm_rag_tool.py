@@ -1,165 +1,625 @@
 from crewai.tools import BaseTool
-from langchain.document_loaders import TextLoader, PyPDFLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains import create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+import asyncio
 import os
-from typing import Dict, Any
+import hashlib
+import json
+import threading
+from typing import ClassVar, Dict, Any, List, Optional
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from embedding_backends import backend_fingerprint, create_embeddings
+from hashing import file_sha256
+from rag_config import load_rag_config
+from regulation_splitter import splitter_fingerprint
+from tracing import current_span, span, traced_tool, token_usage_callback
+
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+MANIFEST_FILENAME = 'ingest_manifest.json'
+ANSWER_CACHE_FILENAME = 'answer_cache.sqlite'
+VECTOR_INDEX_DIRNAME = 'vector_index'
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt')
+
+# Process-wide embedding models, keyed by embedding_key()
+_embedding_models: Dict[str, Any] = {}
+_embedding_lock = threading.Lock()
+_pipeline_lock = threading.Lock()
+
+
+def embedding_key(model_name: str, settings: Dict[str, Any]) -> str:
+    return f"{model_name}|{json.dumps(settings, sort_keys=True)}"
+
+
+def get_embeddings(model_name: Optional[str] = None, settings: Optional[Dict[str, Any]] = None):
+    """Return the shared embedding model for the configured backend, loading it on first use"""
+    if model_name is None or settings is None:
+        config = load_rag_config()
+        model_name = model_name or config['embedding_model']
+        settings = settings or config['embedding']
+    key = embedding_key(model_name, settings)
+    with _embedding_lock:
+        model = _embedding_models.get(key)
+        if model is None:
+            model = create_embeddings(model_name, settings)
+            _embedding_models[key] = model
+        return model
+
+
+def _ingest_settings(config: Dict[str, Any]) -> str:
+    """The settings that shape the stored chunks, a change means every file is re-ingested"""
+    return (
+        f"{config['embedding_model']}|{splitter_fingerprint(config['splitter'])}"
+        f"{backend_fingerprint(config.get('embedding'))}"
+    )
+
+
+def _corpus_version(files: Dict[str, Any], ingest_settings: str) -> str:
+    """Hash of the indexed file contents plus the settings used to split and embed them"""
+    digest = hashlib.sha256(ingest_settings.encode('utf-8'))
+    for filename in sorted(files):
+        digest.update(f"|{filename}:{files[filename]['sha256']}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+# The answering LLM and its prompt, part of the answer cache version together with the retriever settings
+LLM_SETTINGS = {'model': 'gpt-4o-mini', 'temperature': 0.3, 'max_tokens': 512}
+ANSWER_PROMPT = """
+You are an ADGM compliance expert. Answer the question based only on the following ADGM regulation context.
+If you cannot find the answer in the context, say "I don't have enough information about this in the ADGM regulations provided."
+
+Context: {context}
+Question: {input}
+
+Answer:
+"""
+
+
+def _answer_settings(config: Dict[str, Any]) -> str:
+    """Fingerprint of everything besides the corpus that shapes an answer, a change means a cache miss"""
+    settings = json.dumps([LLM_SETTINGS, ANSWER_PROMPT, config['retriever']], sort_keys=True)
+    return hashlib.sha256(settings.encode('utf-8')).hexdigest()[:12]
+
+
+def answer_cache_path(config: Dict[str, Any]) -> str:
+    return config['answer_cache']['path'] or os.path.join(config['db_path'], ANSWER_CACHE_FILENAME)
+
+
+def _vector_index_path(config: Dict[str, Any]) -> str:
+    return os.path.join(config['db_path'], VECTOR_INDEX_DIRNAME)
+
+
+def _manifest_path(config: Dict[str, Any]) -> str:
+    """
+    Ingest manifest of the configured vector store. Each backend keeps its own, the
+    NumPy index next to its matrix, so switching backends never trusts a manifest
+    that describes the other store's chunks.
+    """
+    if config['vector_store']['backend'] == 'numpy':
+        return os.path.join(_vector_index_path(config), MANIFEST_FILENAME)
+    return os.path.join(config['db_path'], MANIFEST_FILENAME)
+
+
+def _load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """Read the ingest manifest, or an empty one if missing or unreadable"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get("files"), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": 1, "files": {}}
+
+
+def _save_manifest(manifest_path: str, manifest: Dict[str, Any]):
+    """Write the manifest atomically so a crash never leaves it half written"""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def current_corpus_version(config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Corpus version of rag_docs without loading any model: the synced manifest's
+    version when the files still match it, otherwise a fingerprint of the files
+    on disk that no synced version can equal.
+    """
+    config = config or load_rag_config()
+    manifest = _load_manifest(_manifest_path(config))
+    documents_path = config['documents_path']
+    filenames = sorted(
+        f for f in os.listdir(documents_path) if f.endswith(SUPPORTED_EXTENSIONS)
+    ) if os.path.exists(documents_path) else []
+
+    stats = {f: os.stat(os.path.join(documents_path, f)) for f in filenames}
+    in_sync = (
+        manifest.get("corpus_version")
+        and manifest.get("ingest_settings") == _ingest_settings(config)
+        and filenames == sorted(manifest["files"])
+        and all(
+            manifest["files"][f]["size"] == stats[f].st_size and manifest["files"][f]["mtime"] == stats[f].st_mtime
+            for f in filenames
+        )
+    )
+    if in_sync:
+        return manifest["corpus_version"]
+
+    digest = hashlib.sha256(_ingest_settings(config).encode('utf-8'))
+    for filename in filenames:
+        digest.update(f"|{filename}:{stats[filename].st_size}:{stats[filename].st_mtime}".encode('utf-8'))
+    return "unsynced-" + digest.hexdigest()[:16]
+
 
 class ADGMRAGTool(BaseTool):
     name: str = "ADGM Regulations RAG Tool"
-    description: str = "Retrieves ADGM compliance rules and citations from knowledge base"
+    description: str = (
+        "Retrieves ADGM compliance rules and citations from knowledge base. "
+        "Pass document_type (e.g. 'Articles of Association') to search only the regulations for that type."
+    )
     
-    # Class-level variables to ensure single initialization
-    _vectorstore = None
-    _rag_chain = None
-    _initialized = False
+    # Shared by every instance so the pipeline is built once per process. ClassVar keeps
+    # pydantic (BaseTool is a model) from turning them into per-instance private attributes.
+    _vectorstore: ClassVar[Any] = None
+    _document_chain: ClassVar[Any] = None
+    _initialized: ClassVar[bool] = False
+    _config: ClassVar[Optional[Dict[str, Any]]] = None
+    _corpus_version: ClassVar[Optional[str]] = None
+    _answer_cache: ClassVar[Any] = None
+    _bm25_index: ClassVar[Any] = None
+    _indexed_files: ClassVar[List[str]] = []
     
-    def __init__(self):
-        super().__init__()
-        if not self._initialized:
-            self._setup_rag_pipeline()
-            ADGMRAGTool._initialized = True
+    def _ensure_pipeline(self):
+        """Build the RAG pipeline on first use rather than at construction"""
+        with _pipeline_lock:
+            if not ADGMRAGTool._initialized:
+                with span("rag.setup"):
+                    self._setup_rag_pipeline()
+                ADGMRAGTool._initialized = True
     
     def _setup_rag_pipeline(self):
         """Setup RAG pipeline only once"""
+        from langchain.chains.combine_documents import create_stuff_documents_chain
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_openai import ChatOpenAI
+        
+        config = load_rag_config()
+        self._open_vector_store(config)
+        
+        llm = ChatOpenAI(openai_api_key=os.environ['OPEN_AI_KEY'], **LLM_SETTINGS)
+        prompt = ChatPromptTemplate.from_template(ANSWER_PROMPT)
+        
+        # Retrieval is done separately (see _mmr_search) so queries can be embedded and searched in batches
+        ADGMRAGTool._document_chain = create_stuff_documents_chain(llm, prompt)
+        
+        cache_config = config['answer_cache']
+        if cache_config['enabled']:
+            from answer_cache import AnswerCache
+            ADGMRAGTool._answer_cache = AnswerCache(
+                answer_cache_path(config),
+                ttl_seconds=cache_config['ttl_seconds'],
+                max_entries=cache_config['max_entries'],
+                similarity_threshold=cache_config['similarity_threshold'],
+            )
+        
+        print("🎯 RAG pipeline initialized successfully")
+    
+    def _open_vector_store(self, config: Dict[str, Any], build: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Open the configured vector store and, when building (index.auto_build unless given),
+        bring it in line with the documents folder. Returns the ingest statistics.
+        """
+        ADGMRAGTool._config = config
+        db_path = config['db_path']
+        documents_path = config['documents_path']
+        
+        embeddings = get_embeddings(config['embedding_model'], config['embedding'])
         
-        db_path = 'db'
-        documents_path = './rag_docs'
+        ADGMRAGTool._vectorstore = self._create_vector_store(config, embeddings)
         
-        embeddings = HuggingFaceEmbeddings(
-            model_name='sentence-transformers/all-MiniLM-L6-v2',
+        if build is None:
+            build = config['index']['auto_build']
+        
+        manifest_exists = os.path.exists(_manifest_path(config))
+        if build and not manifest_exists and self._vector_store_has_data():
+            # Stores built before the manifest existed cannot be diffed, rebuild them once
+            print("♻️ Existing vector store has no ingest manifest, rebuilding...")
+            ADGMRAGTool._vectorstore.delete_collection()
+            ADGMRAGTool._vectorstore = self._create_vector_store(config, embeddings)
+        
+        if build:
+            stats = self._sync_vector_store(db_path, documents_path)
+        else:
+            stats = self._use_built_index(db_path)
+        
+        if config['retriever']['mode'] == 'hybrid':
+            with span("rag.bm25_build") as s:
+                ADGMRAGTool._bm25_index = BM25Index.from_collection(ADGMRAGTool._vectorstore._collection)
+                s.set(chunks=len(ADGMRAGTool._bm25_index.ids))
+        return stats
+    
+    def _create_vector_store(self, config: Dict[str, Any], embeddings):
+        """Chroma, or the memory-mapped NumPy index (vector_index.py) for vector_store.backend numpy"""
+        settings = config['vector_store']
+        if settings['backend'] == 'numpy':
+            from vector_index import NumpyVectorStore
+            return NumpyVectorStore(_vector_index_path(config), settings['dtype'])
+        if settings['backend'] != 'chroma':
+            raise ValueError(f"Unknown vector_store backend {settings['backend']!r}, expected 'chroma' or 'numpy'")
+        
+        from langchain.vectorstores import Chroma
+        return Chroma(
+            collection_name='policy',
+            embedding_function=embeddings,
+            persist_directory=config['db_path']
         )
+    
+    def _use_built_index(self, db_path: str) -> Dict[str, Any]:
+        """Use the index as build_index.py left it, without touching rag_docs"""
+        manifest = _load_manifest(_manifest_path(ADGMRAGTool._config))
+        if not manifest["files"] or not self._vector_store_has_data():
+            raise ValueError(f"No regulation index in {db_path}, run `python build_index.py` first")
+        
+        if current_corpus_version(ADGMRAGTool._config) != manifest.get("corpus_version"):
+            print("⚠️ rag_docs or the index settings changed since the last build, run `python build_index.py`")
+        
+        ADGMRAGTool._indexed_files = sorted(manifest["files"])
+        ADGMRAGTool._corpus_version = manifest["corpus_version"]
+        return {"pages": 0, "chunks": 0, "seconds": 0.0, "errors": {}}
+    
+    def _vector_store_has_data(self) -> bool:
+        """Check if the opened vector store has data, without running the embedding model"""
+        try:
+            return ADGMRAGTool._vectorstore._collection.count() > 0
+        except Exception:
+            return False
+    
+    def _sync_vector_store(self, db_path: str, documents_path: str) -> Dict[str, Any]:
+        """Embed only new or changed files and drop chunks of deleted files"""
+        
+        manifest_path = _manifest_path(ADGMRAGTool._config)
+        manifest = _load_manifest(manifest_path)
+        # An empty store next to its manifest (e.g. after deleting the store files) is filled from scratch
+        previous = manifest["files"] if self._vector_store_has_data() else {}
+        current = {}
         
-        # Check if vector store already exists and has data
-        if os.path.exists(db_path) and self._vector_store_has_data(db_path):
-            print("📂 Loading existing vector store...")
-            ADGMRAGTool._vectorstore = Chroma(
-                collection_name='policy',
-                embedding_function=embeddings,
-                persist_directory=db_path
+        settings = _ingest_settings(ADGMRAGTool._config)
+        # Without recorded settings the store predates configurable splitting
+        settings_changed = bool(previous) and manifest.get("ingest_settings") != settings
+        if settings_changed:
+            print("♻️ Splitter or embedding settings changed, re-ingesting all documents...")
+        
+        if os.path.exists(documents_path):
+            filenames = sorted(
+                f for f in os.listdir(documents_path)
+                if f.endswith(SUPPORTED_EXTENSIONS)
             )
         else:
-            print("🔨 Creating new vector store...")
-            adgm_docs = self._load_documents(documents_path)
+            print(f"Directory {documents_path} does not exist")
+            filenames = []
+        
+        added = updated = unchanged = 0
+        to_ingest = []
+        
+        for filename in filenames:
+            file_path = os.path.join(documents_path, filename)
+            stat = os.stat(file_path)
+            entry = previous.get(filename)
             
-            if not adgm_docs:
-                raise ValueError("No ADGM documents found to create vector store")
+            # Cheap stat check first, only hash files whose size or mtime moved
+            reusable = entry is not None and not settings_changed
+            if reusable and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                current[filename] = entry
+                unchanged += 1
+                continue
             
-            text_splitter = CharacterTextSplitter(
-                chunk_size=400,
-                chunk_overlap=20,
-                separator="\n"
-            )
-            texts = text_splitter.split_documents(adgm_docs)
-            print(f"📄 Created {len(texts)} text chunks")
+            sha256 = file_sha256(file_path)
+            if reusable and entry["sha256"] == sha256:
+                current[filename] = dict(entry, size=stat.st_size, mtime=stat.st_mtime)
+                unchanged += 1
+                continue
             
-            ADGMRAGTool._vectorstore = Chroma(
-                collection_name='policy',
-                embedding_function=embeddings,
-                persist_directory=db_path
-            )
-            ADGMRAGTool._vectorstore.add_documents(texts)
-            print("✅ Vector store created and persisted")
+            if entry and entry["chunk_ids"]:
+                ADGMRAGTool._vectorstore.delete(ids=entry["chunk_ids"])
+            
+            to_ingest.append((filename, file_path, sha256))
+            current[filename] = {
+                "sha256": sha256,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "chunk_ids": [],
+            }
+            if entry:
+                updated += 1
+            else:
+                added += 1
         
-        retriever = ADGMRAGTool._vectorstore.as_retriever(
-            search_type='mmr',
-            search_kwargs={'k': 5, 'fetch_k': 10}
-        )
+        # Changed files are extracted in parallel and embedded and written in batches (build_index.py)
+        stats = {"chunk_ids": {}, "pages": 0, "chunks": 0, "seconds": 0.0, "errors": {}}
+        if to_ingest:
+            from build_index import ingest_files
+            with span("rag.ingest", files=len(to_ingest)) as s:
+                stats = ingest_files(
+                    ADGMRAGTool._vectorstore._collection,
+                    get_embeddings(ADGMRAGTool._config['embedding_model'], ADGMRAGTool._config['embedding']),
+                    to_ingest,
+                    ADGMRAGTool._config['splitter'],
+                    ADGMRAGTool._config['index'],
+                )
+                s.set(pages=stats["pages"], chunks=stats["chunks"])
+            for filename, chunk_ids in stats["chunk_ids"].items():
+                current[filename]["chunk_ids"] = chunk_ids
         
-        llm = ChatOpenAI(
-            model='gpt-4o-mini', 
-            openai_api_key=os.environ['OPEN_AI_KEY'],
-            temperature=0.3,  
-            max_tokens=512,
-        )
+        removed = 0
+        for filename, entry in previous.items():
+            if filename not in current:
+                if entry["chunk_ids"]:
+                    ADGMRAGTool._vectorstore.delete(ids=entry["chunk_ids"])
+                print(f"🗑️ Removed: {filename} ({len(entry['chunk_ids'])} chunks)")
+                removed += 1
         
-        prompt = ChatPromptTemplate.from_template("""
-You are an ADGM compliance expert. Answer the question based only on the following ADGM regulation context.
-If you cannot find the answer in the context, say "I don't have enough information about this in the ADGM regulations provided."
-
-Context: {context}
-Question: {input}
-
-Answer:
-""")
+        # Files that failed to load stay out of the manifest so the next sync retries them
+        for filename in stats["errors"]:
+            current.pop(filename, None)
         
-        document_chain = create_stuff_documents_chain(llm, prompt)
-        ADGMRAGTool._rag_chain = create_retrieval_chain(retriever, document_chain)
+        if not current:
+            raise ValueError("No ADGM documents found to create vector store")
         
-        print("🎯 RAG pipeline initialized successfully")
+        # Chroma writes through, the NumPy index publishes its writes here
+        flush = getattr(ADGMRAGTool._vectorstore, 'flush', None)
+        if flush is not None:
+            flush()
+        
+        manifest["files"] = current
+        ADGMRAGTool._indexed_files = sorted(current)
+        manifest["ingest_settings"] = settings
+        manifest["corpus_version"] = _corpus_version(current, settings)
+        ADGMRAGTool._corpus_version = manifest["corpus_version"]
+        _save_manifest(manifest_path, manifest)
+        
+        print(f"📂 Vector store synced: {added} added, {updated} updated, "
+              f"{removed} removed, {unchanged} unchanged")
+        return stats
     
-    def _vector_store_has_data(self, db_path: str) -> bool:
-        """Check if vector store exists and has data"""
-        try:
-            embeddings = HuggingFaceEmbeddings(
-                model_name='sentence-transformers/all-MiniLM-L6-v2',
-            )
-            temp_store = Chroma(
-                collection_name='policy',
-                embedding_function=embeddings,
-                persist_directory=db_path
-            )
-            # Try a simple query to check if data exists
-            results = temp_store.similarity_search("test", k=1)
-            return len(results) > 0
-        except Exception:
-            return False
+    def resolve_sources(self, source: str = None, document_type: str = None) -> Optional[List[str]]:
+        """
+        Indexed regulation files matching a source filename fragment and/or a document type.
+        None (search everything) when no filter is given or nothing matches.
+        """
+        if not source and not document_type:
+            return None
+        
+        candidates = ADGMRAGTool._indexed_files
+        if source:
+            candidates = [f for f in candidates if source.lower() in f.lower()]
+        if document_type:
+            patterns = ADGMRAGTool._config['source_document_types'].get(document_type, [])
+            candidates = [f for f in candidates if any(p.lower() in f.lower() for p in patterns)]
+        
+        return candidates or None
+    
+    def _search(self, queries: List[str], vectors: List[List[float]],
+                sources: Optional[List[str]] = None) -> List[List[Any]]:
+        """Retrieve context documents for each query with the configured retriever"""
+        if ADGMRAGTool._config['retriever']['mode'] == 'hybrid':
+            return self._hybrid_search(queries, vectors, sources)
+        return self._mmr_search(vectors, sources)
+    
+    def _hybrid_search(self, queries: List[str], vectors: List[List[float]],
+                       sources: Optional[List[str]] = None) -> List[List[Any]]:
+        """Fuse BM25 and vector rankings with reciprocal rank fusion, one vector store query for all"""
+        from langchain_core.documents import Document
+        
+        settings = ADGMRAGTool._config['retriever']
+        index = ADGMRAGTool._bm25_index
+        results = ADGMRAGTool._vectorstore._collection.query(
+            query_embeddings=vectors,
+            n_results=settings['fetch_k'],
+            where={"document": {"$in": sources}} if sources else None,
+            include=['distances'],
+        )
+        allowed = index.allowed(sources)
+        
+        contexts = []
+        for i, query in enumerate(queries):
+            keyword_ids = [index.ids[j] for j, _ in index.search(query, settings['fetch_k'], allowed)]
+            fused = reciprocal_rank_fusion([results['ids'][i], keyword_ids], settings['rrf_k'])
+            contexts.append([
+                Document(page_content=index.texts[index.positions[chunk_id]],
+                         metadata=index.metadatas[index.positions[chunk_id]])
+                for chunk_id in fused[:settings['k']]
+                if chunk_id in index.positions
+            ])
+        return contexts
     
-    def _load_documents(self, directory: str):
-        """Load documents from directory"""
-        documents = []
+    def _mmr_search(self, vectors: List[List[float]], sources: Optional[List[str]] = None) -> List[List[Any]]:
+        """MMR retrieval for several query vectors with a single vector store query"""
+        from langchain_core.documents import Document
+        from vector_index import maximal_marginal_relevance
         
-        if not os.path.exists(directory):
-            print(f"Directory {directory} does not exist")
-            return documents
+        settings = ADGMRAGTool._config['retriever']
+        results = ADGMRAGTool._vectorstore._collection.query(
+            query_embeddings=vectors,
+            n_results=settings['fetch_k'],
+            where={"document": {"$in": sources}} if sources else None,
+            include=['documents', 'metadatas', 'embeddings'],
+        )
         
-        for filename in os.listdir(directory):
-            file_path = os.path.join(directory, filename)
+        contexts = []
+        for i, vector in enumerate(vectors):
+            candidates = results['embeddings'][i]
+            if len(candidates) == 0:
+                contexts.append([])
+                continue
             
-            try:
-                if filename.endswith('.pdf'):
-                    loader = PyPDFLoader(file_path)
-                    docs = loader.load()
-                    documents.extend(docs)
-                    
-                elif filename.endswith('.txt'):
-                    loader = TextLoader(file_path, encoding='utf8')
-                    docs = loader.load()
-                    documents.extend(docs)
-                    
-                print(f"Loaded: {filename} ({len(docs)} pages/chunks)")
-                
-            except Exception as e:
-                print(f"Error loading {filename}: {str(e)}")
-        
-        print(f"total documents loaded: {len(documents)}")
-        return documents
-    
-    def _run(self, query: str) -> Dict[str, Any]:
-        """Query the RAG system"""
+            selected = maximal_marginal_relevance(
+                vector,
+                candidates,
+                k=settings['k'],
+                lambda_mult=settings['lambda_mult'],
+            )
+            contexts.append([
+                Document(
+                    page_content=results['documents'][i][j],
+                    metadata=results['metadatas'][i][j] or {},
+                )
+                for j in selected
+            ])
+        return contexts
+    
+    def _prepare_batch(self, queries: List[str], source: str = None, document_type: str = None) -> Dict[str, Any]:
+        """
+        Everything before the LLM calls: cache lookups, one embedding pass for the
+        misses and one retrieval for all of them. Returns the batch state, with
+        "pending" listing the query positions that still need an answer.
+        """
+        results: List[Dict[str, Any]] = [None] * len(queries)
+        batch = {"results": results, "pending": [], "contexts": []}
         try:
-            if not ADGMRAGTool._rag_chain:
+            self._ensure_pipeline()
+            if not ADGMRAGTool._document_chain:
                 raise ValueError("RAG chain not initialized")
+        except Exception as e:
+            batch["results"] = [{"query": q, "error": str(e), "status": "error"} for q in queries]
+            return batch
+        
+        config = ADGMRAGTool._config
+        embeddings = get_embeddings(config['embedding_model'], config['embedding'])
+        cache = ADGMRAGTool._answer_cache
+        sources = self.resolve_sources(source, document_type)
+        # Answers depend on what was searched and how they were written, so the retriever
+        # settings, the filter, the LLM and its prompt are part of the cache key
+        version = f"{ADGMRAGTool._corpus_version}:{_answer_settings(config)}"
+        if sources:
+            version += ":" + hashlib.sha256("|".join(sources).encode('utf-8')).hexdigest()[:12]
+        vectors: List[Any] = [None] * len(queries)
+        semantic_cache = cache is not None and cache.similarity_threshold is not None
+        batch.update(version=version, vectors=vectors, semantic_cache=semantic_cache)
+        
+        try:
+            if semantic_cache:
+                with span("rag.embed", queries=len(queries)):
+                    vectors[:] = embeddings.embed_documents(list(queries))
             
-            response = ADGMRAGTool._rag_chain.invoke({"input": query})
+            pending = []
+            for i, query in enumerate(queries):
+                hit = cache.get(query, version, vectors[i]) if cache is not None else None
+                if hit is not None:
+                    results[i] = {"query": query, "answer": hit["answer"], "context": hit["context"],
+                                  "cached": True, "status": "success"}
+                else:
+                    pending.append(i)
             
-            return {
-                "query": query,
-                "answer": response["answer"],
-                "status": "success"
-            }
+            if pending and not semantic_cache:
+                with span("rag.embed", queries=len(pending)):
+                    for i, vector in zip(pending, embeddings.embed_documents([queries[i] for i in pending])):
+                        vectors[i] = vector
             
+            with span("rag.search", queries=len(pending), filtered=bool(sources)):
+                contexts = self._search(
+                    [queries[i] for i in pending], [vectors[i] for i in pending], sources
+                ) if pending else []
         except Exception as e:
+            batch["results"] = [
+                result or {"query": query, "error": str(e), "status": "error"}
+                for query, result in zip(queries, results)
+            ]
+            return batch
+        
+        current_span().add("cache_hits", len(queries) - len(pending))
+        current_span().add("cache_misses", len(pending))
+        batch.update(pending=pending, contexts=contexts)
+        return batch
+    
+    def _llm_batch_args(self, queries: List[str], batch: Dict[str, Any], max_concurrency: int = None):
+        usage_callback = token_usage_callback()
+        inputs = [{"input": queries[i], "context": context} for i, context in zip(batch["pending"], batch["contexts"])]
+        config = {
+            "max_concurrency": max_concurrency or ADGMRAGTool._config['llm_max_concurrency'],
+            "callbacks": [usage_callback] if usage_callback else [],
+        }
+        return inputs, config
+    
+    def _finish_batch(self, queries: List[str], batch: Dict[str, Any], answers: List[Any]) -> List[Dict[str, Any]]:
+        """Fill in and cache the LLM answers for the pending queries"""
+        results = batch["results"]
+        cache = ADGMRAGTool._answer_cache
+        for i, docs, answer in zip(batch["pending"], batch["contexts"], answers):
+            query = queries[i]
+            if isinstance(answer, Exception):
+                results[i] = {"query": query, "error": str(answer), "status": "error"}
+                continue
+            
+            # Metadata of the chunks the answer was generated from, cached with it for citations
+            context = [dict(doc.metadata) for doc in docs]
+            if cache is not None:
+                cache.put(query, batch["version"], answer,
+                          batch["vectors"][i] if batch["semantic_cache"] else None, context)
+            results[i] = {"query": query, "answer": answer, "context": context, "cached": False, "status": "success"}
+        
+        return results
+    
+    def run_batch(self, queries: List[str], max_concurrency: int = None,
+                  source: str = None, document_type: str = None) -> List[Dict[str, Any]]:
+        """
+        Answer several queries at once.
+        
+        Cache misses are embedded in one forward pass and searched with one vector
+        store query, then the LLM calls run concurrently (bounded by max_concurrency).
+        source and document_type restrict retrieval to matching regulation files.
+        Returns one result dict per query, in order, shaped like _run's output;
+        "context" holds the metadata of the chunks each answer was generated from.
+        """
+        batch = self._prepare_batch(queries, source, document_type)
+        if not batch["pending"]:
+            return batch["results"]
+        
+        with span("rag.llm", calls=len(batch["pending"])):
+            inputs, config = self._llm_batch_args(queries, batch, max_concurrency)
+            answers = ADGMRAGTool._document_chain.batch(inputs, config=config, return_exceptions=True)
+        
+        return self._finish_batch(queries, batch, answers)
+    
+    async def arun_batch(self, queries: List[str], max_concurrency: int = None,
+                         source: str = None, document_type: str = None) -> List[Dict[str, Any]]:
+        """
+        Async variant of run_batch. Embedding, retrieval and cache I/O run in a
+        worker thread, the LLM calls are awaited so other coroutines keep running.
+        """
+        batch = await asyncio.to_thread(self._prepare_batch, queries, source, document_type)
+        if not batch["pending"]:
+            return batch["results"]
+        
+        with span("rag.llm", calls=len(batch["pending"])):
+            inputs, config = self._llm_batch_args(queries, batch, max_concurrency)
+            answers = await ADGMRAGTool._document_chain.abatch(inputs, config=config, return_exceptions=True)
+        
+        return await asyncio.to_thread(self._finish_batch, queries, batch, answers)
+    
+    @traced_tool
+    def _run(self, query: str = "", queries: List[str] = None,
+             source: str = None, document_type: str = None) -> Dict[str, Any]:
+        """
+        Query the RAG system with one query, or several at once via queries.
+        Optionally restrict the search to one regulation file (source) or a document type.
+        """
+        if queries:
+            results = self.run_batch(queries, source=source, document_type=document_type)
             return {
-                "query": query,
-                "error": str(e),
-                "status": "error"
+                "results": results,
+                "status": "success" if all(r["status"] == "success" for r in results) else "partial"
             }
-
-
+        
+        return self.run_batch([query], source=source, document_type=document_type)[0]
+    
+    @traced_tool
+    async def _arun(self, query: str = "", queries: List[str] = None,
+                    source: str = None, document_type: str = None) -> Dict[str, Any]:
+        """Async variant of _run"""
+        if queries:
+            results = await self.arun_batch(queries, source=source, document_type=document_type)
+            return {
+                "results": results,
+                "status": "success" if all(r["status"] == "success" for r in results) else "partial"
+            }
+        
+        return (await self.arun_batch([query], source=source, document_type=document_type))[0]
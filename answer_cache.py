@@ -0,0 +1,181 @@
+"""
+Disk-backed cache of RAG answers.
+
+Entries are keyed on the normalized query text plus the corpus version, so a
+change to the regulation corpus naturally invalidates every cached answer.
+Each answer is stored with the metadata of the chunks it was generated from,
+so a cached answer still cites its own sources.
+Optionally a query embedding is stored with each answer (L2-normalized float32
+bytes) and a new query whose cosine similarity to a cached one exceeds a
+threshold reuses that answer; the similarities come from one NumPy product.
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache grows past max_entries.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    corpus_version TEXT NOT NULL,
+    query TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    context TEXT,
+    embedding BLOB,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_corpus ON answers (corpus_version);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip(" ?.!")
+
+
+def _unit_vector(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """SQLite-backed answer cache with TTL and LRU eviction"""
+    
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 2000, similarity_threshold: Optional[float] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Caches created before the context was stored
+            if "context" not in {row[1] for row in conn.execute("PRAGMA table_info(answers)")}:
+                conn.execute("ALTER TABLE answers ADD COLUMN context TEXT")
+    
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection so several processes can share the cache file"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _key(query: str, corpus_version: str) -> str:
+        return hashlib.sha256(f"{corpus_version}\n{normalize_query(query)}".encode("utf-8")).hexdigest()
+    
+    def get(self, query: str, corpus_version: str,
+            embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """Return a cached {"answer", "context"}, or None on a miss"""
+        now = time.time()
+        oldest_valid = now - self.ttl_seconds
+        
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT key, answer, context FROM answers WHERE key = ? AND created_at >= ?",
+                (self._key(query, corpus_version), oldest_valid),
+            ).fetchone()
+            
+            semantic = False
+            if row is None and embedding is not None and self.similarity_threshold is not None:
+                row = self._nearest(conn, corpus_version, embedding, oldest_valid)
+                semantic = row is not None
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            conn.execute(
+                "UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (now, row[0]),
+            )
+            self.hits += 1
+            if semantic:
+                self.semantic_hits += 1
+            return {"answer": row[1], "context": json.loads(row[2]) if row[2] else []}
+    
+    def _nearest(self, conn: sqlite3.Connection, corpus_version: str,
+                 embedding: List[float], oldest_valid: float):
+        """Most similar cached query above the threshold, as (key, answer, context)"""
+        query = _unit_vector(embedding)
+        # Entries written as JSON text by earlier versions are skipped, they age out with the TTL
+        rows = conn.execute(
+            "SELECT key, embedding FROM answers WHERE corpus_version = ? AND typeof(embedding) = 'blob' "
+            "AND length(embedding) = ? AND created_at >= ?",
+            (corpus_version, query.nbytes, oldest_valid),
+        ).fetchall()
+        if not rows:
+            return None
+        
+        stored = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+        scores = stored @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        key = rows[best][0]
+        return conn.execute("SELECT key, answer, context FROM answers WHERE key = ?", (key,)).fetchone()
+    
+    def put(self, query: str, corpus_version: str, answer: str,
+            embedding: Optional[List[float]] = None, context: Optional[List[Dict[str, Any]]] = None):
+        """Store an answer with its context metadata and evict expired or least recently used entries"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(key, corpus_version, query, answer, context, embedding, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    self._key(query, corpus_version),
+                    corpus_version,
+                    normalize_query(query),
+                    answer,
+                    json.dumps(context or []),
+                    _unit_vector(embedding).tobytes() if embedding is not None else None,
+                    now,
+                    now,
+                ),
+            )
+            conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+    
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM answers")
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
@@ -0,0 +1,346 @@
+"""
+Batch processing of many client submissions through a persistent job queue.
+
+Each submission directory (a folder of DOCX files) becomes a job in a SQLite
+queue. Long-lived worker processes claim jobs one at a time and run the crew
+(crew.run_async(), or crew.main() with --sequential) with the job's own
+documents and output directories (see workspace.py), so jobs get the run
+ledger reuse of a command-line run. The embedding model, vector store and LLM
+clients are loaded once per worker and reused for every package it processes;
+per-document jobs all run on the worker's one event loop, since the async
+clients stay bound to the loop they first ran on. The first worker syncs the vector
+store before the others start, so they only ever open it.
+
+Failed jobs are retried with exponential backoff up to max_attempts, after
+which they are marked failed and can be requeued with the retry command.
+
+Usage:
+    python batch_runner.py submit submissions/client_a submissions/client_b [--output-root batch_output]
+    python batch_runner.py run [--workers 2] [--sequential] [--keep-running]
+    python batch_runner.py status [--job 3]
+    python batch_runner.py retry 3
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+QUEUE_PATH = os.path.join(".cache", "batch_jobs.sqlite")
+OUTPUT_ROOT = "batch_output"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    documents_dir TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, next_attempt_at);
+"""
+
+# queued -> running -> done, or back to queued for a retry, or failed once attempts run out
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+    """SQLite-backed job queue shared by the runner and its worker processes"""
+
+    def __init__(self, path: str = QUEUE_PATH, retry_backoff: float = 30.0):
+        self.path = path
+        self.retry_backoff = retry_backoff
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection so several processes can share the queue file"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, documents_dir: str, output_root: str = OUTPUT_ROOT, max_attempts: int = 3) -> int:
+        """Queue one submission directory, its results go to output_root/<id>-<name>"""
+        documents_dir = os.path.abspath(documents_dir)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (documents_dir, output_dir, status, max_attempts, created_at) "
+                "VALUES (?, '', 'queued', ?, ?)",
+                (documents_dir, max_attempts, time.time()),
+            )
+            job_id = cursor.lastrowid
+            output_dir = os.path.abspath(os.path.join(output_root, f"{job_id}-{os.path.basename(documents_dir.rstrip(os.sep))}"))
+            conn.execute("UPDATE jobs SET output_dir = ? WHERE id = ?", (output_dir, job_id))
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest job that is due, or None"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND next_attempt_at <= ? ORDER BY id LIMIT 1",
+                (time.time(),),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, started_at = ?, "
+                "finished_at = NULL WHERE id = ?",
+                (worker, time.time(), row["id"]),
+            )
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: int, result: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', error = NULL, result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str):
+        """Requeue with exponential backoff, or mark failed once max_attempts is reached"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row["attempts"] < row["max_attempts"]:
+                delay = self.retry_backoff * 2 ** (row["attempts"] - 1)
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, next_attempt_at = ?, finished_at = ? WHERE id = ?",
+                    (error, time.time() + delay, time.time(), job_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    (error, time.time(), job_id),
+                )
+
+    def retry(self, job_id: int) -> bool:
+        """Put a failed job back in the queue with a fresh set of attempts"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, next_attempt_at = 0 "
+                "WHERE id = ? AND status = 'failed'",
+                (job_id,),
+            )
+        return cursor.rowcount > 0
+
+    def recover(self) -> int:
+        """Requeue jobs left running by a runner that died; call before starting workers"""
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE jobs SET status = 'queued', next_attempt_at = 0 WHERE status = 'running'")
+        return cursor.rowcount
+
+    def has_unfinished(self) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()
+        return row[0] > 0
+
+    def jobs(self, job_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            if job_id is None:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+def _warm_up():
+    """Load the crew, embedding model, vector store and LLM clients once for this worker"""
+    import crew
+    from adgm_rag_tool import ADGMRAGTool
+
+    ADGMRAGTool()._ensure_pipeline()
+    return crew
+
+
+def _run_job(crew_module, job: Dict[str, Any], loop: Optional[asyncio.AbstractEventLoop],
+             max_concurrency: int) -> Dict[str, Any]:
+    """Run one job through crew.run_async() on the worker's loop, or through crew.main() without a loop"""
+    import tracing
+    from workspace import use_workspace
+
+    os.makedirs(job["output_dir"], exist_ok=True)
+    log_path = os.path.join(job["output_dir"], "run.log")
+
+    start = time.perf_counter()
+    with open(log_path, "a", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log), \
+            use_workspace(job["documents_dir"], job["output_dir"]), \
+            tracing.span("batch.job", job_id=job["id"], attempt=job["attempts"]):
+        if loop is not None:
+            output = loop.run_until_complete(crew_module.run_async(max_concurrency))
+        else:
+            output = crew_module.main()
+
+    with open(os.path.join(job["output_dir"], "crew_output.md"), "w", encoding="utf-8") as f:
+        f.write(output)
+
+    return {
+        "seconds": round(time.perf_counter() - start, 2),
+        "output_files": sorted(os.listdir(job["output_dir"])),
+        "log": log_path,
+    }
+
+
+def worker_main(queue_path: str, worker: str, run_async: bool, max_concurrency: int,
+                keep_running: bool, poll_interval: float, ready=None):
+    """Worker process loop: warm up once, then claim and run jobs until the queue is drained"""
+    queue = JobQueue(queue_path)
+    try:
+        crew_module = _warm_up()
+        print(f"🟢 {worker} ready")
+    except Exception as e:
+        print(f"❌ {worker} failed to start: {e}")
+        return
+    finally:
+        if ready is not None:
+            ready.set()
+
+    # One loop for the worker's lifetime, the cached async clients are bound to it
+    loop = asyncio.new_event_loop() if run_async else None
+    if loop is not None:
+        asyncio.set_event_loop(loop)
+    try:
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                if not keep_running and not queue.has_unfinished():
+                    print(f"⏹️ {worker} finished, queue is empty")
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            print(f"▶️ {worker}: job {job['id']} (attempt {job['attempts']}/{job['max_attempts']}) {job['documents_dir']}")
+            try:
+                result = _run_job(crew_module, job, loop, max_concurrency)
+            except Exception as e:
+                queue.fail(job["id"], f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+                print(f"❌ {worker}: job {job['id']} failed: {e}")
+                continue
+
+            queue.complete(job["id"], result)
+            print(f"✅ {worker}: job {job['id']} done in {result['seconds']}s → {job['output_dir']}")
+    finally:
+        if loop is not None:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+
+def run_workers(queue_path: str, workers: int, run_async: bool = True, max_concurrency: int = 4,
+                keep_running: bool = False, poll_interval: float = 2.0):
+    """Start the worker pool; the first worker warms up alone so only it ever writes the vector store"""
+    queue = JobQueue(queue_path)
+    recovered = queue.recover()
+    if recovered:
+        print(f"♻️ Requeued {recovered} job(s) left running by a previous runner")
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    host = socket.gethostname()
+    processes = []
+    for i in range(workers):
+        process = context.Process(
+            target=worker_main,
+            args=(queue_path, f"{host}:worker-{i}", run_async, max_concurrency, keep_running, poll_interval),
+            kwargs={"ready": ready if i == 0 else None},
+        )
+        process.start()
+        processes.append(process)
+        if i == 0:
+            while not ready.wait(1.0) and process.is_alive():
+                pass
+
+    for process in processes:
+        process.join()
+
+    print(f"📊 Jobs: {queue.counts()}")
+
+
+def _print_jobs(jobs: List[Dict[str, Any]]):
+    print(f"{'id':>4}  {'status':<8}{'tries':>6}  {'seconds':>8}  documents → output")
+    for job in jobs:
+        seconds = ""
+        if job["started_at"] and job["finished_at"]:
+            seconds = f"{job['finished_at'] - job['started_at']:.1f}"
+        print(f"{job['id']:>4}  {job['status']:<8}{job['attempts']:>3}/{job['max_attempts']:<2}  {seconds:>8}  "
+              f"{job['documents_dir']} → {job['output_dir']}")
+        if job["error"] and job["status"] != "done":
+            print(f"      last error: {job['error'].splitlines()[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", default=QUEUE_PATH, help=f"queue database (default {QUEUE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="queue submission directories")
+    submit.add_argument("directories", nargs="+")
+    submit.add_argument("--output-root", default=OUTPUT_ROOT)
+    submit.add_argument("--max-attempts", type=int, default=3)
+
+    run = commands.add_parser("run", help="process queued jobs with a worker pool")
+    run.add_argument("--workers", type=int, default=2)
+    run.add_argument("--sequential", action="store_true",
+                     help="use the single sequential crew instead of the per-document one")
+    run.add_argument("--async", dest="run_async", action="store_true", help=argparse.SUPPRESS)
+    run.add_argument("--max-concurrency", type=int, default=4, help="per-document analyses per job")
+    run.add_argument("--keep-running", action="store_true", help="wait for new jobs instead of exiting when drained")
+    run.add_argument("--poll-interval", type=float, default=2.0)
+
+    status = commands.add_parser("status", help="show job status")
+    status.add_argument("--job", type=int)
+
+    retry = commands.add_parser("retry", help="requeue a failed job")
+    retry.add_argument("job", type=int)
+
+    args = parser.parse_args()
+    queue = JobQueue(args.queue)
+
+    if args.command == "submit":
+        for directory in args.directories:
+            if not os.path.isdir(directory):
+                print(f"❌ Not a directory: {directory}")
+                continue
+            job_id = queue.submit(directory, args.output_root, args.max_attempts)
+            print(f"📥 Queued job {job_id}: {directory}")
+    elif args.command == "run":
+        run_workers(args.queue, args.workers, not args.sequential, args.max_concurrency,
+                    args.keep_running, args.poll_interval)
+    elif args.command == "status":
+        _print_jobs(queue.jobs(args.job))
+        print(f"📊 {queue.counts()}")
+    elif args.command == "retry":
+        print("🔁 Requeued" if queue.retry(args.job) else f"❌ Job {args.job} is not failed")
+
+
+if __name__ == "__main__":
+    main()
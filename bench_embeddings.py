@@ -0,0 +1,145 @@
+"""
+Micro-benchmark of the embedding backends on the rag_docs corpus.
+
+The regulation PDFs are split exactly as for the index and every chunk is
+embedded with each backend (see embedding_backends.py). Reported per backend:
+model load time, document throughput (chunks/s), mean query latency, whether
+torch got imported, and against the "huggingface" baseline: mean cosine
+similarity of the chunk vectors, top-1 agreement and overlap@k of the
+retrieved chunks for the eval_retrieval.py questions, plus recall@k on them.
+
+ONNX backends run first so the torch check is not polluted by the baseline.
+
+Usage:
+    python bench_embeddings.py [--backend onnx-int8 ...] [--batch-size 64] [--threads 4] [--limit 500] [--json bench_embeddings.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, Any, List
+
+from embedding_backends import BACKENDS, create_embeddings
+from eval_retrieval import QUESTIONS, _is_hit
+from rag_config import load_rag_config
+
+
+def _corpus_chunks(config: Dict[str, Any], limit: int = 0) -> List[Any]:
+    """rag_docs split with the configured splitter, as Documents"""
+    from langchain_core.documents import Document
+    from adgm_rag_tool import SUPPORTED_EXTENSIONS
+    from build_index import _load_and_split
+
+    documents_path = config["documents_path"]
+    chunks = []
+    for filename in sorted(os.listdir(documents_path)):
+        if not filename.endswith(SUPPORTED_EXTENSIONS):
+            continue
+        _, _, file_chunks, error = _load_and_split(filename, os.path.join(documents_path, filename), config["splitter"])
+        if error:
+            print(f"Error loading {filename}: {error}")
+        chunks.extend(Document(page_content=text, metadata=metadata) for text, metadata in file_chunks)
+    return chunks[:limit] if limit else chunks
+
+
+def bench_backend(backend: str, config: Dict[str, Any], texts: List[str], questions: List[str]) -> Dict[str, Any]:
+    """Embed the corpus and the questions with one backend, timing each step"""
+    import numpy as np
+
+    settings = dict(config["embedding"], backend=backend)
+
+    start = time.perf_counter()
+    model = create_embeddings(config["embedding_model"], settings)
+    model.embed_query("warm up")
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    doc_vectors = np.array(model.embed_documents(texts), dtype=np.float32)
+    embed_seconds = time.perf_counter() - start
+
+    latencies, query_vectors = [], []
+    for question in questions:
+        start = time.perf_counter()
+        query_vectors.append(model.embed_query(question))
+        latencies.append(time.perf_counter() - start)
+
+    def normalized(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "embed_seconds": embed_seconds,
+        "chunks_per_second": len(texts) / max(embed_seconds, 1e-9),
+        "query_latency_ms": statistics.mean(latencies) * 1000,
+        "torch_imported": "torch" in sys.modules,
+        "_docs": normalized(doc_vectors),
+        "_queries": normalized(query_vectors),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], chunks: List[Any], k: int):
+    """Fidelity and retrieval agreement of one backend against the baseline, plus recall@k"""
+    import numpy as np
+
+    def top_k(queries, docs):
+        return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+    ranked, baseline_ranked = top_k(result["_queries"], result["_docs"]), top_k(baseline["_queries"], baseline["_docs"])
+    result["cosine_to_baseline"] = float(np.mean(np.sum(result["_docs"] * baseline["_docs"], axis=1)))
+    result["top1_agreement"] = float(np.mean(ranked[:, 0] == baseline_ranked[:, 0]))
+    result["overlap_at_k"] = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ranked, baseline_ranked)]))
+    result["recall_at_k"] = float(np.mean([
+        any(_is_hit(chunks[i], question) for i in row) for row, question in zip(ranked, QUESTIONS)
+    ]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", choices=[b for b in BACKENDS if b != "huggingface"],
+                        help="backend to compare against huggingface, may be repeated (default: all)")
+    parser.add_argument("--batch-size", type=int, help="texts per forward pass")
+    parser.add_argument("--threads", type=int, help="CPU threads per backend, 0 = runtime default")
+    parser.add_argument("--limit", type=int, default=0, help="embed only the first N chunks")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    config = load_rag_config()
+    for key in ("batch_size", "threads"):
+        if getattr(args, key) is not None:
+            config["embedding"][key] = getattr(args, key)
+    k = config["retriever"]["k"]
+
+    chunks = _corpus_chunks(config, args.limit)
+    texts = [chunk.page_content for chunk in chunks]
+    questions = [q["question"] for q in QUESTIONS]
+    print(f"🔎 {len(texts)} chunks, {len(questions)} questions, batch size {config['embedding']['batch_size']}, "
+          f"threads {config['embedding']['threads'] or 'default'}")
+
+    results = []
+    for backend in (args.backend or [b for b in BACKENDS if b != "huggingface"]) + ["huggingface"]:
+        print(f"⏱️ {backend}...")
+        results.append(bench_backend(backend, config, texts, questions))
+
+    baseline = results[-1]
+    for result in results:
+        compare(result, baseline, chunks, k)
+
+    print(f"\n{'backend':<14}{'load s':>8}{'chunks/s':>10}{'query ms':>10}{'cosine':>8}{'top1':>6}"
+          f"{'overlap@k':>11}{'recall@k':>10}{'torch':>7}")
+    for r in results:
+        print(f"{r['backend']:<14}{r['load_seconds']:>8.1f}{r['chunks_per_second']:>10.1f}{r['query_latency_ms']:>10.1f}"
+              f"{r['cosine_to_baseline']:>8.3f}{r['top1_agreement']:>6.2f}{r['overlap_at_k']:>11.2f}"
+              f"{r['recall_at_k']:>10.2f}{'yes' if r['torch_imported'] else 'no':>7}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump([{key: v for key, v in r.items() if not key.startswith("_")} for r in results], f, indent=2)
+        print(f"\n📝 Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
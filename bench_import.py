@@ -0,0 +1,100 @@
+"""
+Import-time benchmark for the crew entry point.
+
+Runs `python -X importtime -c "import crew"` in fresh interpreters and reports
+the total wall time plus the modules with the largest cumulative import cost.
+
+Usage:
+    python bench_import.py [--module crew] [--runs 5] [--top 20] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Parse -X importtime lines into (module, depth, self_us, cumulative_us)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split("|", 2)
+            self_us = int(self_us.split(":")[-1].strip())
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), depth, self_us, int(cumulative_us.strip())))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Import a module once in a fresh interpreter and collect timings"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_s = time.perf_counter() - start
+    
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    
+    rows = _parse_importtime(proc.stderr)
+    return {
+        "wall_s": wall_s,
+        "modules": rows,
+        "total_import_us": sum(row[2] for row in rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="crew", help="module to import (default: crew)")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=20, help="number of slowest modules to list")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results to this file")
+    args = parser.parse_args()
+    
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    walls = [run["wall_s"] for run in runs]
+    
+    # Imports made directly by the target module and its first-level dependencies,
+    # ranked by cumulative time in the last run (warm disk cache)
+    shallow = [row for row in runs[-1]["modules"] if row[1] <= 1]
+    slowest = sorted(shallow, key=lambda row: row[3], reverse=True)[:args.top]
+    
+    print(f"⏱️ import {args.module}: median {statistics.median(walls):.3f}s, "
+          f"min {min(walls):.3f}s, max {max(walls):.3f}s over {args.runs} runs")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, _, self_us, cumulative_us in slowest:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    
+    if args.json_path:
+        results = {
+            "module": args.module,
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "wall_s": walls,
+            "median_wall_s": statistics.median(walls),
+            "slowest_modules": [
+                {"module": name, "self_us": self_us, "cumulative_us": cumulative_us}
+                for name, _, self_us, cumulative_us in slowest
+            ],
+        }
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+End-to-end benchmark for the classification → red-flag → rewrite pipeline.
+
+Synthetic DOCX corpora are generated from the templates in documents/ and the
+pipeline is run with deterministic local stand-ins for every LLM
+(ChatOpenAI, ChatGroq and the crewai LLM), so only our own code, the embedding
+model and Chroma are measured. Each corpus size runs in a fresh interpreter.
+
+Two modes:
+  stages  drive each agent's tools directly, in the order the agents use them (default)
+  crew    run the real Crew with a scripted crewai LLM that calls each agent's first tool once
+
+Reported per size: per-stage wall time, per-tool call counts, embedding time,
+Chroma query latency and peak RSS. Results are written as JSON so runs can be
+compared with --compare.
+
+Usage:
+    python bench_pipeline.py [--sizes 10,100,1000] [--mode stages] [--json bench_results.json]
+    python bench_pipeline.py --compare old.json new.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, Any, List
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(REPO_DIR, "documents")
+
+# The analyzer's templated RAG queries, as listed in the RedFlagAnalyzer backstory
+QUERY_TEMPLATES = [
+    "What are the complete ADGM compliance requirements for {doc_type}?",
+    "What court jurisdiction requirements apply to ADGM {doc_type}?",
+    "What are the signature and execution requirements for ADGM {doc_type}?",
+    "What mandatory clauses must be included in ADGM {doc_type}?",
+]
+
+STUB_RAG_ANSWER = "ADGM Companies Regulations 2020 require ADGM Courts jurisdiction and an ADGM registered office."
+STUB_CLASSIFICATION = "Board Resolution"
+
+
+class Metrics:
+    """Counters and timers collected while the pipeline runs"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.tool_calls: Dict[str, int] = defaultdict(int)
+        self.timers: Dict[str, List[float]] = defaultdict(list)
+
+    def time_stage(self, name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.stages[name] = time.perf_counter() - start
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        timers = {}
+        for name, samples in self.timers.items():
+            ordered = sorted(samples)
+            timers[name] = {
+                "calls": len(samples),
+                "total_s": sum(samples),
+                "mean_ms": statistics.mean(samples) * 1000,
+                "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+            }
+        return {
+            "stages_s": self.stages,
+            "tool_calls": dict(self.tool_calls),
+            "timers": timers,
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def generate_corpus(size: int, out_dir: str):
+    """Write `size` DOCX files cycled from the templates, each with a unique marker paragraph"""
+    from docx import Document
+
+    templates = sorted(f for f in os.listdir(TEMPLATES_DIR) if f.endswith(".docx"))
+    os.makedirs(out_dir, exist_ok=True)
+
+    for i in range(size):
+        template = templates[i % len(templates)]
+        stem = os.path.splitext(template)[0]
+        doc = Document(os.path.join(TEMPLATES_DIR, template))
+        doc.add_paragraph(f"Synthetic benchmark copy {i:05d}")
+        doc.save(os.path.join(out_dir, f"{stem}_{i:05d}.docx"))
+
+
+def install_llm_stubs():
+    """Replace the LLM clients with deterministic local chat models"""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    import langchain_groq
+    import langchain_openai
+
+    langchain_openai.ChatOpenAI = lambda **kwargs: FakeListChatModel(responses=[STUB_RAG_ANSWER])
+    langchain_groq.ChatGroq = lambda **kwargs: FakeListChatModel(responses=[STUB_CLASSIFICATION])
+    os.environ.setdefault("OPEN_AI_KEY", "benchmark")
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+
+def install_probes(metrics: Metrics):
+    """Count tool calls and time embedding, vector store query and retrieval calls"""
+    import adgm_rag_tool
+    from adgm_rag_tool import ADGMRAGTool
+    from file_classifier_tool import ADGMDocumentClassifierTool
+    from file_read_tool import SimpleFileReaderTool
+    from rewrite_tool import SimpleFileWriterTool
+
+    def counted(cls):
+        original = cls._run
+
+        def _run(self, *args, **kwargs):
+            metrics.tool_calls[cls.__name__] += 1
+            return original(self, *args, **kwargs)
+        cls._run = _run
+
+    for cls in (ADGMRAGTool, ADGMDocumentClassifierTool, SimpleFileReaderTool, SimpleFileWriterTool):
+        counted(cls)
+
+    class TimedEmbeddings:
+        """Proxy around the shared embedding model that records call durations"""
+
+        def __init__(self, inner):
+            self.inner = inner
+
+        def _timed(self, fn, arg):
+            start = time.perf_counter()
+            try:
+                return fn(arg)
+            finally:
+                metrics.timers["embedding"].append(time.perf_counter() - start)
+
+        def embed_documents(self, texts):
+            return self._timed(self.inner.embed_documents, texts)
+
+        def embed_query(self, text):
+            return self._timed(self.inner.embed_query, text)
+
+    # Swap the registry entry for the proxy, Chroma and run_batch then embed through it
+    config = adgm_rag_tool.load_rag_config()
+    embeddings = adgm_rag_tool.get_embeddings(config["embedding_model"], config["embedding"])
+    key = adgm_rag_tool.embedding_key(config["embedding_model"], config["embedding"])
+    adgm_rag_tool._embedding_models[key] = TimedEmbeddings(embeddings)
+
+    class TimedCollection:
+        """Proxy around the store's collection that records query durations"""
+
+        def __init__(self, inner):
+            self.inner = inner
+
+        def query(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return self.inner.query(*args, **kwargs)
+            finally:
+                metrics.timers["vector_query"].append(time.perf_counter() - start)
+
+        def __getattr__(self, name):
+            return getattr(self.inner, name)
+
+    # vector_query is the store lookup alone, retrieval adds BM25, fusion and MMR on top
+    original_create = ADGMRAGTool._create_vector_store
+
+    def _create_vector_store(self, config, embeddings):
+        store = original_create(self, config, embeddings)
+        store._collection = TimedCollection(store._collection)
+        return store
+    ADGMRAGTool._create_vector_store = _create_vector_store
+
+    original_search = ADGMRAGTool._search
+
+    def _search(self, queries, vectors, sources=None):
+        start = time.perf_counter()
+        try:
+            return original_search(self, queries, vectors, sources)
+        finally:
+            metrics.timers["retrieval"].append(time.perf_counter() - start)
+    ADGMRAGTool._search = _search
+
+
+def run_stages(metrics: Metrics) -> Dict[str, Any]:
+    """Drive the tools in the order the three agents use them"""
+    from adgm_rag_tool import ADGMRAGTool
+    from file_classifier_tool import ADGMDocumentClassifierTool
+    from file_read_tool import SimpleFileReaderTool
+    from rewrite_tool import SimpleFileWriterTool
+
+    rag_tool = ADGMRAGTool()
+    reader = SimpleFileReaderTool()
+    writer = SimpleFileWriterTool()
+
+    classification = metrics.time_stage("classification", ADGMDocumentClassifierTool()._run)
+    if classification["status"] != "success":
+        raise RuntimeError(f"Classification failed: {classification.get('error')}")
+
+    # A stage that silently did nothing would still report a time, so check each one worked
+    metrics.time_stage("rag_setup", rag_tool._ensure_pipeline)
+    if not ADGMRAGTool._initialized or ADGMRAGTool._document_chain is None:
+        raise RuntimeError("The RAG pipeline did not initialize, rag_setup measured nothing")
+
+    def red_flag_analysis():
+        contents = reader._run()
+        for doc_type in classification["present_documents"]:
+            result = rag_tool._run(queries=[q.format(doc_type=doc_type) for q in QUERY_TEMPLATES])
+            if result["status"] != "success":
+                error = next(r.get("error") for r in result["results"] if r["status"] != "success")
+                raise RuntimeError(f"RAG queries for {doc_type} failed: {error}")
+        return contents
+
+    contents = metrics.time_stage("red_flag_analysis", red_flag_analysis)
+
+    def rewriting():
+        # The rewriter sends correction lists, the writer edits the original DOCX
+        corrections = [{"old": "UAE Federal Courts", "new": "ADGM Courts",
+                        "reason": "ADGM Courts jurisdiction", "severity": "CRITICAL"}]
+        for filename, result in reader._run()["file_contents"].items():
+            if result["status"] == "success":
+                writer._run(filename=filename, corrections=corrections)
+
+    metrics.time_stage("document_rewriting", rewriting)
+    return {"files_read": contents.get("files_read", 0), "present_documents": classification["present_documents"]}
+
+
+def run_crew(metrics: Metrics) -> Dict[str, Any]:
+    """Run the real crew with a scripted, deterministic crewai LLM"""
+    from crewai import LLM
+
+    class ScriptedCrewLLM(LLM):
+        """Calls the agent's first tool once, then returns a fixed final answer"""
+
+        def call(self, messages, *args, **kwargs):
+            transcript = messages if isinstance(messages, str) else "\n".join(
+                str(m.get("content", "")) for m in messages
+            )
+            if "Observation:" not in transcript and "Tool Name:" in transcript:
+                tool_name = transcript.split("Tool Name:", 1)[1].splitlines()[0].strip()
+                tool_input = {"query": QUERY_TEMPLATES[0].format(doc_type="Board Resolution")} \
+                    if "RAG" in tool_name else {}
+                return f"Thought: I should use a tool\nAction: {tool_name}\nAction Input: {json.dumps(tool_input)}"
+            return "Thought: I now know the final answer\nFinal Answer: benchmark run complete"
+
+    import Agents
+    stub_llm = ScriptedCrewLLM(model="gpt-4o", api_key="benchmark")
+    for agent in (Agents.DocumentClassifier, Agents.RedFlagAnalyzer, Agents.DocumentRewriterAgent):
+        agent.llm = stub_llm
+
+    import crew
+    metrics.time_stage("crew_kickoff", crew.main)
+    return {}
+
+
+def run_single(size: int, mode: str, keep: bool) -> Dict[str, Any]:
+    """Benchmark one corpus size inside this process"""
+    workspace = tempfile.mkdtemp(prefix=f"adgm_bench_{size}_")
+    try:
+        generate_corpus(size, os.path.join(workspace, "documents"))
+
+        config_path = os.path.join(workspace, "rag_config.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "db_path": os.path.join(workspace, "db"),
+                "documents_path": os.path.join(REPO_DIR, "rag_docs"),
+                # rag_setup measures a cold start, index build included
+                "index": {"auto_build": True},
+            }, f)
+        os.environ["ADGM_RAG_CONFIG"] = config_path
+
+        sys.path.insert(0, REPO_DIR)
+        os.chdir(workspace)
+
+        metrics = Metrics()
+        install_llm_stubs()
+        install_probes(metrics)
+
+        start = time.perf_counter()
+        details = run_crew(metrics) if mode == "crew" else run_stages(metrics)
+        total = time.perf_counter() - start
+
+        return dict(size=size, mode=mode, total_s=total, details=details, **metrics.summary())
+    finally:
+        os.chdir(REPO_DIR)
+        if not keep:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+def compare(old_path: str, new_path: str):
+    """Print per-stage and peak RSS deltas between two result files"""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {run["size"]: run for run in json.load(f)["runs"]}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = {run["size"]: run for run in json.load(f)["runs"]}
+
+    for size in sorted(set(old) & set(new)):
+        print(f"📊 {size} files")
+        for stage, new_s in new[size]["stages_s"].items():
+            old_s = old[size]["stages_s"].get(stage)
+            if old_s:
+                print(f"   {stage:<22} {old_s:>8.3f}s → {new_s:>8.3f}s ({(new_s - old_s) / old_s:+.1%})")
+        print(f"   {'peak_rss_mb':<22} {old[size]['peak_rss_mb']:>8.1f}  → {new[size]['peak_rss_mb']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000", help="comma separated corpus sizes")
+    parser.add_argument("--mode", choices=("stages", "crew"), default="stages")
+    parser.add_argument("--json", dest="json_path", default="bench_results.json", help="results file")
+    parser.add_argument("--keep", action="store_true", help="keep the generated workspaces")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.single is not None:
+        # Child process: run one size and print its results as JSON on the last line
+        print(json.dumps(run_single(args.single, args.mode, args.keep)))
+        return
+
+    runs = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"⏱️ Benchmarking {size} files ({args.mode})...")
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", str(size), "--mode", args.mode]
+            + (["--keep"] if args.keep else []),
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(proc.stdout[-2000:], proc.stderr[-4000:])
+            raise SystemExit(f"Benchmark for {size} files failed")
+
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in run["stages_s"].items())
+        print(f"   total {run['total_s']:.2f}s | {stages} | peak RSS {run['peak_rss_mb'] or 0:.0f} MB")
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "mode": args.mode,
+        "runs": runs,
+    }
+    with open(args.json_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark of the vector store backends: Chroma against the memory-mapped NumPy
+index (vector_index.py) in float16 and float32.
+
+The same vectors go into every store: those of the regulation index in db/
+(build it first with `python build_index.py`), or --synthetic N random
+384-dim vectors. Each backend then runs in a fresh interpreter, as a worker
+would, and reports:
+  open_ms          import of the store library plus opening the persisted index
+  query_mean_ms    per-query latency at fetch_k results, and its p95
+  rss_mb           resident memory after opening and querying, and the peak
+  overlap_at_k     agreement of the top-k ids with exact float32 search
+
+Usage:
+    python bench_vector_index.py [--synthetic 5000] [--queries 200] [--json bench_vector_index.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from bench_pipeline import _peak_rss_mb
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKENDS = ("chroma", "numpy-float16", "numpy-float32")
+CHROMA_BATCH_SIZE = 1000
+
+
+def _rss_mb():
+    """Current resident memory, falling back to the peak where /proc is missing"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_mb()
+
+
+def _source_vectors(config: Dict[str, Any], synthetic: int):
+    """(ids, vectors, documents, metadatas) from the regulation index, or random ones"""
+    import numpy as np
+
+    if synthetic:
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(synthetic, 384)).astype(np.float32)
+        # Unit length like MiniLM's output, so Chroma's L2 ranking equals the cosine ranking
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ids = [f"synthetic:{i}" for i in range(synthetic)]
+        return ids, vectors, [f"chunk {i}" for i in range(synthetic)], [{"document": f"doc{i % 10}.pdf"} for i in range(synthetic)]
+
+    from adgm_rag_tool import ADGMRAGTool
+    ADGMRAGTool()._open_vector_store(config, build=False)
+    data = ADGMRAGTool._vectorstore._collection.get(include=["embeddings", "documents", "metadatas"])
+    if not len(data["ids"]):
+        raise SystemExit("The regulation index is empty, run `python build_index.py` or pass --synthetic")
+    return data["ids"], np.asarray(data["embeddings"], dtype=np.float32), data["documents"], data["metadatas"]
+
+
+def build_stores(workdir: str, ids: List[str], vectors, documents: List[str], metadatas: List[Dict[str, Any]]):
+    """Persist the vectors once per backend under workdir/<backend>"""
+    import chromadb
+    from vector_index import NumpyCollection
+
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    collection = client.get_or_create_collection("policy")
+    for start in range(0, len(ids), CHROMA_BATCH_SIZE):
+        end = start + CHROMA_BATCH_SIZE
+        collection.add(ids=ids[start:end], embeddings=vectors[start:end].tolist(),
+                       documents=documents[start:end], metadatas=metadatas[start:end])
+
+    for backend in BACKENDS[1:]:
+        index = NumpyCollection(os.path.join(workdir, backend), backend.split("-")[1])
+        index.upsert(ids, vectors, documents, metadatas)
+        index.flush()
+
+
+def run_single(backend: str, workdir: str, n_results: int, k: int) -> Dict[str, Any]:
+    """Child process: open one store, run the saved queries and measure"""
+    import numpy as np
+
+    queries = np.load(os.path.join(workdir, "queries.npy"))
+    baseline_rss = _rss_mb()
+
+    start = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=os.path.join(workdir, "chroma")).get_collection("policy")
+    else:
+        from vector_index import NumpyCollection
+        collection = NumpyCollection(os.path.join(workdir, backend), backend.split("-")[1])
+    count = collection.count()
+    open_ms = (time.perf_counter() - start) * 1000
+
+    # The first query pays for lazy index loading, count it separately
+    start = time.perf_counter()
+    collection.query(query_embeddings=queries[:1].tolist(), n_results=n_results, include=["distances"])
+    first_query_ms = (time.perf_counter() - start) * 1000
+
+    latencies, top_ids = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=n_results, include=["distances"])
+        latencies.append(time.perf_counter() - start)
+        top_ids.append(result["ids"][0][:k])
+
+    ordered = sorted(latencies)
+    return {
+        "backend": backend,
+        "vectors": count,
+        "open_ms": open_ms,
+        "first_query_ms": first_query_ms,
+        "query_mean_ms": statistics.mean(latencies) * 1000,
+        "query_p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+        "rss_mb": _rss_mb(),
+        "rss_delta_mb": _rss_mb() - baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "_top_ids": top_ids,
+    }
+
+
+def main():
+    import numpy as np
+    from rag_config import load_rag_config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark N random vectors instead of the regulation index")
+    parser.add_argument("--queries", type=int, default=200, help="queries per backend")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the built stores")
+    parser.add_argument("--single", nargs=2, metavar=("BACKEND", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    config = load_rag_config()
+    n_results, k = config["retriever"]["fetch_k"], config["retriever"]["k"]
+
+    if args.single:
+        # Child process: results as JSON on the last line
+        print(json.dumps(run_single(args.single[0], args.single[1], n_results, k)))
+        return
+
+    ids, vectors, documents, metadatas = _source_vectors(config, args.synthetic)
+    # Queries are stored vectors with noise, so every query has close neighbours like a real question
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(ids), args.queries)]
+    queries = (queries + rng.normal(scale=float(np.std(vectors)), size=queries.shape)).astype(np.float32)
+
+    normalized = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    exact = np.argsort(-(queries @ normalized.T), axis=1)[:, :k]
+    exact_ids = [{ids[i] for i in row} for row in exact]
+
+    workdir = tempfile.mkdtemp(prefix="adgm_bench_vectors_")
+    try:
+        print(f"🔎 {len(ids)} vectors of {vectors.shape[1]} dims, {args.queries} queries at fetch_k {n_results}")
+        np.save(os.path.join(workdir, "queries.npy"), queries)
+        build_stores(workdir, ids, vectors, documents, metadatas)
+
+        results = []
+        for backend in BACKENDS:
+            print(f"⏱️ {backend}...")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--single", backend, workdir],
+                cwd=REPO_DIR,
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stdout[-2000:], proc.stderr[-4000:])
+                raise SystemExit(f"Benchmark of {backend} failed")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result["overlap_at_k"] = statistics.mean(
+                len(set(top) & expected) / k for top, expected in zip(result.pop("_top_ids"), exact_ids)
+            )
+            results.append(result)
+    finally:
+        if args.keep:
+            print(f"📁 Stores kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'backend':<15}{'open ms':>9}{'1st q ms':>10}{'q mean ms':>11}{'q p95 ms':>10}"
+          f"{'RSS MB':>8}{'Δ RSS MB':>10}{'overlap@k':>11}")
+    for r in results:
+        print(f"{r['backend']:<15}{r['open_ms']:>9.1f}{r['first_query_ms']:>10.1f}{r['query_mean_ms']:>11.2f}"
+              f"{r['query_p95_ms']:>10.2f}{r['rss_mb']:>8.0f}{r['rss_delta_mb']:>10.1f}{r['overlap_at_k']:>11.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📝 Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+In-memory BM25 index over the chunks stored in the vector store.
+
+Complements MiniLM similarity for exact terms such as "Companies Regulations
+2020", "beneficial ownership" or section numbers. The index is rebuilt from
+the Chroma collection whenever the corpus version changes, which is cheap for
+a corpus of a few thousand chunks.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what which who "
+    "will with must shall should any all may can how does do".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word and number tokens, keeping dotted section numbers like 12.3 whole"""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks"""
+
+    def __init__(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]],
+                 k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = [m or {} for m in metadatas]
+        self.positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        self.k1 = k1
+        self.b = b
+
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            self.lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                self.postings[term].append((i, count))
+
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        total = len(texts)
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_collection(cls, collection) -> "BM25Index":
+        """Build from a Chroma collection's stored documents"""
+        data = collection.get(include=["documents", "metadatas"])
+        return cls(data["ids"], data["documents"], data["metadatas"])
+
+    def allowed(self, sources: Optional[List[str]]) -> Optional[Set[int]]:
+        """Positions of chunks from the given source documents, None means all"""
+        if sources is None:
+            return None
+        wanted = set(sources)
+        return {i for i, m in enumerate(self.metadatas) if m.get("document") in wanted}
+
+    def search(self, query: str, limit: int, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """(position, score) of the best matching chunks, best first"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, count in self.postings[term]:
+                if allowed is not None and i not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average_length)
+                scores[i] += idf * count * (self.k1 + 1) / (count + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = 60) -> List[str]:
+    """Merge several best-first id lists, scoring each id by the sum of 1 / (rrf_k + rank)"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (rrf_k + rank)
+    return sorted(scores, key=lambda item: scores[item], reverse=True)
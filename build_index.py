@@ -0,0 +1,209 @@
+"""
+Build or update the regulation index offline.
+
+Files in rag_docs/ that are new or changed since the last build (see the
+vector store's ingest manifest in db/) are extracted and split in a pool of worker
+processes. Their chunks are streamed to the embedding model in batches of
+embed_batch_size and written to the vector store in batches of write_batch_size, so
+memory stays flat however large the corpus is. Progress is printed per file
+with throughput in pages/s and chunks/s.
+
+ADGMRAGTool only opens the index built here, unless index.auto_build is set
+in rag_config.json, in which case it runs the same pipeline on first use.
+
+Usage:
+    python build_index.py [--workers 8] [--embed-batch-size 64] [--write-batch-size 256] [--rebuild] [--digests] [--json stats.json]
+
+--digests also refreshes the per-document-type requirement digests (regulation_digest.py)
+whose corpus version changed, which needs the LLM credentials.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Any, List, Tuple
+
+
+def _load_and_split(filename: str, file_path: str, splitter_settings: Dict[str, Any]):
+    """Worker: extract and split one file, returning (filename, pages, [(text, metadata)], error)"""
+    from langchain.document_loaders import TextLoader, PyPDFLoader
+    from regulation_splitter import split_documents
+
+    try:
+        if filename.endswith('.pdf'):
+            docs = PyPDFLoader(file_path).load()
+        else:
+            docs = TextLoader(file_path, encoding='utf8').load()
+        chunks = split_documents(docs, filename, splitter_settings)
+    except Exception as e:
+        return filename, 0, [], str(e)
+    return filename, len(docs), [(c.page_content, c.metadata) for c in chunks], None
+
+
+def _extracted(files: List[Tuple[str, str, str]], splitter_settings: Dict[str, Any], workers: int):
+    """Yield _load_and_split results as files finish, with at most 2 * workers files in flight"""
+    if workers <= 1 or len(files) <= 1:
+        for filename, file_path, _ in files:
+            yield _load_and_split(filename, file_path, splitter_settings)
+        return
+
+    # Spawned workers, forking a process that holds the embedding model is not safe
+    context = multiprocessing.get_context("spawn")
+    pending_files = iter(files)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        in_flight = set()
+        while True:
+            while len(in_flight) < workers * 2:
+                item = next(pending_files, None)
+                if item is None:
+                    break
+                in_flight.add(pool.submit(_load_and_split, item[0], item[1], splitter_settings))
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class _ChunkWriter:
+    """Buffers chunks across files, embeds them in batches and writes bounded batches to the vector store"""
+
+    def __init__(self, collection, embeddings, embed_batch_size: int, write_batch_size: int):
+        self.collection = collection
+        self.embeddings = embeddings
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self._ids, self._texts, self._metadatas = [], [], []
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        self._ids.extend(ids)
+        self._texts.extend(texts)
+        self._metadatas.extend(metadatas)
+        while len(self._ids) >= self.write_batch_size:
+            self._write(self.write_batch_size)
+
+    def flush(self):
+        while self._ids:
+            self._write(self.write_batch_size)
+
+    def _write(self, size: int):
+        ids, texts, metadatas = self._ids[:size], self._texts[:size], self._metadatas[:size]
+        del self._ids[:size], self._texts[:size], self._metadatas[:size]
+        vectors = []
+        for start in range(0, len(texts), self.embed_batch_size):
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + self.embed_batch_size]))
+        self.collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+
+
+def ingest_files(collection, embeddings, files: List[Tuple[str, str, str]],
+                 splitter_settings: Dict[str, Any], index_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract, split, embed and store (filename, file_path, sha256) files.
+    Returns {"chunk_ids": {filename: [ids]}, "pages", "chunks", "seconds", "errors"}.
+    """
+    workers = index_settings["workers"] or os.cpu_count() or 1
+    writer = _ChunkWriter(collection, embeddings, index_settings["embed_batch_size"], index_settings["write_batch_size"])
+    hashes = {filename: sha256 for filename, _, sha256 in files}
+
+    chunk_ids: Dict[str, List[str]] = {}
+    errors: Dict[str, str] = {}
+    pages = chunks = 0
+    start = time.perf_counter()
+
+    for done, (filename, page_count, file_chunks, error) in enumerate(
+            _extracted(files, splitter_settings, min(workers, len(files))), 1):
+        if error:
+            print(f"Error loading {filename}: {error}")
+            errors[filename] = error
+            chunk_ids[filename] = []
+            continue
+
+        ids = [f"{filename}:{hashes[filename][:12]}:{i}" for i in range(len(file_chunks))]
+        writer.add(ids, [text for text, _ in file_chunks], [metadata for _, metadata in file_chunks])
+        chunk_ids[filename] = ids
+        pages += page_count
+        chunks += len(ids)
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"Loaded: {filename} ({page_count} pages, {len(ids)} chunks) [{done}/{len(files)}] "
+              f"{pages / elapsed:.1f} pages/s, {chunks / elapsed:.1f} chunks/s")
+
+    writer.flush()
+    return {
+        "chunk_ids": chunk_ids,
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": time.perf_counter() - start,
+        "errors": errors,
+    }
+
+
+def remove_index(config: Dict[str, Any]):
+    """Delete the configured vector store and its ingest manifest, the answer cache and digests in db_path stay"""
+    import adgm_rag_tool
+
+    if config["vector_store"]["backend"] == "numpy":
+        # The NumPy index directory holds its manifest too
+        path = adgm_rag_tool._vector_index_path(config)
+        if os.path.exists(path):
+            print(f"🗑️ Removing {path}")
+            shutil.rmtree(path)
+        return
+
+    if os.path.exists(config["db_path"]):
+        print(f"🗑️ Removing the Chroma collection in {config['db_path']}")
+        embeddings = adgm_rag_tool.get_embeddings(config["embedding_model"], config["embedding"])
+        adgm_rag_tool.ADGMRAGTool()._create_vector_store(config, embeddings).delete_collection()
+    manifest_path = adgm_rag_tool._manifest_path(config)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def main():
+    from adgm_rag_tool import ADGMRAGTool
+    from rag_config import load_rag_config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, help="PDF extraction processes (default: index.workers, 0 = CPUs)")
+    parser.add_argument("--embed-batch-size", type=int, help="chunks per embedding call")
+    parser.add_argument("--write-batch-size", type=int, help="chunks per vector store write")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="delete the vector store and its manifest and build from scratch")
+    parser.add_argument("--digests", action="store_true", help="also rebuild outdated regulation digests")
+    parser.add_argument("--json", dest="json_path", help="write build statistics to this file")
+    args = parser.parse_args()
+
+    config = load_rag_config()
+    for key in ("workers", "embed_batch_size", "write_batch_size"):
+        if getattr(args, key) is not None:
+            config["index"][key] = getattr(args, key)
+
+    if args.rebuild:
+        remove_index(config)
+
+    start = time.perf_counter()
+    stats = ADGMRAGTool()._open_vector_store(config, build=True)
+    stats["total_seconds"] = time.perf_counter() - start
+    stats.pop("chunk_ids", None)
+
+    print(f"✅ Index built in {stats['total_seconds']:.1f}s: {stats['pages']} pages, {stats['chunks']} chunks "
+          f"({stats['pages'] / max(stats['seconds'], 1e-9):.1f} pages/s, "
+          f"{stats['chunks'] / max(stats['seconds'], 1e-9):.1f} chunks/s while ingesting)")
+    if args.digests:
+        from regulation_digest import build_digests
+        stats["digests"] = build_digests()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+
+    failed = [t for t, status in stats.get("digests", {}).items() if status == "failed"]
+    if failed:
+        raise SystemExit(f"Digests failed to build: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
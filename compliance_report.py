@@ -0,0 +1,69 @@
+"""
+Master compliance_corrections_report.json, merged from the per-document reports.
+
+Each document's rewrite writes <name>_corrections.json (see rewrite_tool.py).
+Once every per-document subtask has finished, merge_reports() folds those files
+into the master report in the shape the single rewriting task used to produce
+(totals plus correction_details per document), with the status of every
+document of the package added.
+"""
+import json
+import os
+from typing import Dict, Any, List
+
+MASTER_REPORT = "compliance_corrections_report.json"
+
+
+def corrections_report_path(output_dir: str, filename: str) -> str:
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(filename))[0]}_corrections.json")
+
+
+def _load_corrections(path: str) -> List[Dict[str, Any]]:
+    """Per-correction results of one document, [] when it has no report"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return []
+    # Reports written before corrections were applied to the DOCX are plain correction lists
+    return report if isinstance(report, list) else report.get("corrections", [])
+
+
+def merge_reports(output_dir: str, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the per-document reports of documents ({filename, document_type, status[, error]})
+    into output_dir/compliance_corrections_report.json, returning the report.
+    """
+    details = []
+    for document in documents:
+        corrections = _load_corrections(corrections_report_path(output_dir, document["filename"]))
+        applied = [c for c in corrections if c.get("status", "applied") == "applied"]
+        not_found = [c["old"] for c in corrections if c.get("status") == "not_found"]
+        if applied or not_found:
+            details.append({
+                "document": document["filename"],
+                "document_type": document.get("document_type", "Unknown"),
+                "corrections": [
+                    {key: c.get(key, "") for key in ("old", "new", "reason", "severity")} for c in applied
+                ],
+                "not_found": not_found,
+            })
+
+    applied = [c for d in details for c in d["corrections"]]
+    report = {
+        "total_documents_rewritten": sum(1 for d in details if d["corrections"]),
+        "total_corrections_applied": len(applied),
+        "critical_fixes": sum(1 for c in applied if str(c["severity"]).upper() == "CRITICAL"),
+        "high_priority_fixes": sum(1 for c in applied if str(c["severity"]).upper() == "HIGH"),
+        "correction_details": details,
+        "documents": documents,
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, MASTER_REPORT)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + ".tmp", path)
+    print(f"📝 Master report: {path} ({report['total_corrections_applied']} corrections "
+          f"in {report['total_documents_rewritten']} documents)")
+    return report
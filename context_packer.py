@@ -0,0 +1,222 @@
+"""
+Token-budgeted packing of document text for agent prompts.
+
+Each document is split into clause/heading chunks, boilerplate repeated across
+files (short chunks and bare headings, never a document's opening chunk or a
+chunk with a scanner finding) is kept only once, and chunks are ranked by relevance to the checks for
+the document's type (MiniLM similarity to the analyzer's check queries, with
+chunks holding scanner findings always first). The highest ranked chunks are
+kept until the token budget is spent and emitted in their original order.
+"""
+import hashlib
+import math
+import re
+from typing import Dict, Any, List, Optional
+
+from file_classifier_tool import score_document, best_document_type
+
+# What the analyzer checks for each document type, mirrors the RedFlagAnalyzer backstory
+CHECK_QUERIES = {
+    "Articles of Association": [
+        "jurisdiction and governing law clauses",
+        "director powers and shareholder rights",
+        "registered office address",
+        "signature and execution of the articles",
+    ],
+    "Memorandum of Association": [
+        "objects and powers of the company",
+        "share capital and subscribers",
+        "liability of members",
+        "registered office address",
+    ],
+    "Board Resolution": [
+        "appointment of directors",
+        "authorization and banking signatories",
+        "governing law and court jurisdiction",
+        "registered office address",
+        "signatures and dates of directors",
+    ],
+    "Register of Members": [
+        "beneficial ownership disclosure above 25 percent",
+        "member shareholding and share numbers",
+        "date of entry and register maintenance",
+    ],
+    "Register of Directors": [
+        "beneficial ownership disclosure above 25 percent",
+        "director details, addresses and appointment dates",
+        "register maintenance and updating",
+    ],
+    "Incorporation Application": [
+        "mandatory declarations",
+        "registered office and lease agreement",
+        "authorized signatory and signatures",
+        "share capital and shareholders",
+    ],
+}
+GENERIC_QUERIES = ["governing law and court jurisdiction", "registered office", "signatures and dates"]
+
+# Numbered clauses ("3.", "4.1") and SECTION/ARTICLE/PART headings, or short all-caps lines
+_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s+\S|(?:section|article|part|schedule)\s+[\dA-Z]+\b)", re.IGNORECASE)
+_CAPS_HEADING = re.compile(r"^[A-Z][A-Z0-9 ,&'()/-]{3,80}:?$")
+
+# Repeated chunks up to this size (signature blocks, standard notices) count as boilerplate,
+# longer repeats are real content, e.g. a register filed under two names
+BOILERPLATE_MAX_TOKENS = 60
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when it is installed, otherwise ~4 characters per token"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _is_heading(line: str) -> bool:
+    if _CAPS_HEADING.match(line):
+        return True
+    return bool(_HEADING.match(line)) and len(line) <= 120 and not line.endswith(".")
+
+
+def chunk_document(content: str) -> List[str]:
+    """Split text into chunks that each start at a clause number or heading"""
+    chunks, current = [], []
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and _is_heading(line) and not _is_heading(current[-1]):
+            chunks.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _lexical_score(chunk: str, queries: List[str]) -> float:
+    """Fallback relevance when no embedding model is available: query word overlap"""
+    words = set(_normalize(chunk).split())
+    best = 0.0
+    for query in queries:
+        query_words = set(_normalize(query).split())
+        if query_words:
+            best = max(best, len(words & query_words) / len(query_words))
+    return best
+
+
+def _relevance_scores(chunks: List[Dict[str, Any]], embeddings=None) -> List[float]:
+    """Max similarity of each chunk to its document type's check queries"""
+    if not chunks:
+        return []
+
+    queries_by_type = {c["document_type"]: CHECK_QUERIES.get(c["document_type"], GENERIC_QUERIES) for c in chunks}
+
+    if embeddings is not None:
+        try:
+            all_queries = sorted({q for queries in queries_by_type.values() for q in queries})
+            vectors = embeddings.embed_documents(all_queries + [c["text"] for c in chunks])
+            query_vectors = dict(zip(all_queries, vectors[:len(all_queries)]))
+            return [
+                max(_cosine(vector, query_vectors[q]) for q in queries_by_type[c["document_type"]])
+                for c, vector in zip(chunks, vectors[len(all_queries):])
+            ]
+        except Exception as e:
+            print(f"⚠️ Embedding ranking failed, using keyword overlap: {e}")
+
+    return [_lexical_score(c["text"], queries_by_type[c["document_type"]]) for c in chunks]
+
+
+def pack_documents(documents: Dict[str, str], token_budget: int,
+                   findings_by_file: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                   embeddings=None) -> Dict[str, Any]:
+    """
+    Pack {filename: content} into a payload of at most token_budget tokens.
+
+    findings_by_file maps filenames to red-flag findings; chunks containing a
+    finding's excerpt are kept before any other chunk. embeddings is a langchain
+    embeddings object used for ranking (keyword overlap is used without one).
+    """
+    findings_by_file = findings_by_file or {}
+    chunks: List[Dict[str, Any]] = []
+    seen_boilerplate: Dict[str, str] = {}
+    duplicates_removed = 0
+    document_types = {}
+
+    for filename, content in documents.items():
+        document_type = best_document_type(score_document(filename, content[:2000]))
+        document_types[filename] = document_type
+        excerpts = [_normalize(f.get("excerpt", "")) for f in findings_by_file.get(filename, []) if f.get("excerpt")]
+
+        for position, text in enumerate(chunk_document(content)):
+            normalized = _normalize(text)
+            tokens = count_tokens(text)
+            has_finding = any(e and e in normalized for e in excerpts)
+
+            boilerplate = position > 0 and not has_finding and (
+                tokens <= BOILERPLATE_MAX_TOKENS or all(_is_heading(line) for line in text.splitlines())
+            )
+            if boilerplate:
+                key = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+                if seen_boilerplate.setdefault(key, filename) != filename:
+                    duplicates_removed += 1
+                    continue
+
+            chunks.append({
+                "filename": filename,
+                "document_type": document_type,
+                "position": position,
+                "text": text,
+                "tokens": tokens,
+                "has_finding": has_finding,
+            })
+
+    for chunk, score in zip(chunks, _relevance_scores(chunks, embeddings)):
+        # Findings first, then each document's opening chunk (title, parties), then relevance
+        chunk["score"] = score + (2.0 if chunk["has_finding"] else 0.0) + (1.0 if chunk["position"] == 0 else 0.0)
+
+    selected = []
+    tokens_used = 0
+    for chunk in sorted(chunks, key=lambda c: c["score"], reverse=True):
+        if tokens_used + chunk["tokens"] <= token_budget:
+            selected.append(chunk)
+            tokens_used += chunk["tokens"]
+
+    file_contents = {}
+    for filename in documents:
+        kept = sorted((c for c in selected if c["filename"] == filename), key=lambda c: c["position"])
+        total = sum(1 for c in chunks if c["filename"] == filename)
+        file_contents[filename] = {
+            "document_type": document_types[filename],
+            "content": "\n\n".join(c["text"] for c in kept),
+            "chunks_included": len(kept),
+            "chunks_total": total,
+            "tokens": sum(c["tokens"] for c in kept),
+            "status": "success",
+        }
+
+    return {
+        "file_contents": file_contents,
+        "token_budget": token_budget,
+        "tokens_used": tokens_used,
+        "duplicates_removed": duplicates_removed,
+        "chunks_omitted": len(chunks) - len(selected),
+    }
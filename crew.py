@@ -1,8 +1,20 @@
-from crewai import Crew
-from Agents import DocumentClassifier, RedFlagAnalyzer, DocumentRewriterAgent
-from Tasks import document_classification, red_flag_analysis, document_rewriting
+from crewai import Crew, Task
+from Agents import DocumentClassifier, RedFlagAnalyzer, DocumentRewriterAgent, file_classifier_tool, rewrite_tool
+from Tasks import document_classification, red_flag_analysis, document_rewriting, should_continue
+from compliance_report import merge_reports
+from contextlib import nullcontext
 from dotenv import load_dotenv
+from hashing import file_sha256
+from rewrite_tool import reset_document_outputs
+import argparse
+import asyncio
+import json
 import os
+import run_ledger
+import streaming
+import sys
+import tracing
+import workspace
 
 load_dotenv()
 
@@ -12,4 +24,210 @@ crew = Crew(
     verbose = True
 )
 
-crew.kickoff()
\ No newline at end of file
+# Ledger results are only reused while the prompts and models that produced them are unchanged
+run_ledger.set_prompt_version(run_ledger.prompt_fingerprint(
+    *[text for agent in crew.agents
+      for text in (agent.role, agent.goal, agent.backstory, getattr(agent.llm, "model", ""))],
+    *[text for task in crew.tasks for text in (task.description, task.expected_output)]
+))
+
+
+def _document_hashes(filenames):
+    documents_dir = workspace.documents_dir()
+    return {f: file_sha256(os.path.join(documents_dir, f)) for f in filenames}
+
+
+def _replay_corrections(filenames, versions):
+    """Rewrite unchanged documents from their recorded corrections, without the rewriter agent"""
+    replayed = []
+    for filename in filenames:
+        result = rewrite_tool.replay_corrections(filename, *versions)
+        if result and result["status"] == "success":
+            replayed.append(result)
+    return replayed
+
+
+def _streaming(on_token):
+    """Stream agent tokens to on_token(agent_role, text) when a callback is given"""
+    if on_token is None:
+        return nullcontext()
+    return streaming.stream_tokens(on_token, [DocumentClassifier, RedFlagAnalyzer, DocumentRewriterAgent])
+
+
+def main(on_token=None):
+    """
+    Sequential crew. Analysis and rewriting are skipped when the classification says to
+    stop (see should_continue in Tasks.py); on_token(agent_role, text) receives streamed tokens.
+    Returns the crew's final output as text, whether it ran or was reused from the run ledger.
+    
+    The crew reports on the package as a whole, so a run is reused only when no file
+    changed. run_async(), the default entry point, reuses results per document.
+    """
+    filenames = sorted(f for f in os.listdir(workspace.documents_dir()) if f.endswith('.docx'))
+    file_hashes = _document_hashes(filenames)
+    versions = (run_ledger.corpus_version(), run_ledger.prompt_version())
+    package = run_ledger.package_fingerprint(file_hashes)
+    ledger = run_ledger.get_run_ledger()
+    
+    # The sequential crew reports on the package as a whole, so it is reused only when no file changed
+    previous = ledger.get("package", "package", package, *versions) if ledger and filenames else None
+    if previous is not None:
+        print("♻️ Package unchanged since its last run, reusing the recorded results")
+        _replay_corrections(filenames, versions)
+        return previous["raw"]
+    
+    # ADGM_TRACE_FILE records tool and task spans, ADGM_PROFILE profiles the whole run
+    with tracing.profiled(), tracing.span("crew.kickoff") as run_span, _streaming(on_token):
+        crew.task_callback = tracing.task_recorder(run_span if tracing.enabled() else None)
+        output = crew.kickoff()
+    
+    if ledger is not None and filenames:
+        ledger.put("package", "package", package, {"raw": output.raw}, *versions)
+    return output.raw
+
+
+async def run_async(max_concurrency: int = 4, on_token=None):
+    """
+    Async pipeline with per-document fan-out. After classification, every classified
+    document gets its own red-flag analysis subtask followed by its own rewrite subtask,
+    with at most max_concurrency documents in flight; each call sees one document, so
+    contexts stay small and a package takes about as long as its slowest document.
+    The per-document correction reports are then merged into
+    compliance_corrections_report.json (see compliance_report.py).
+    
+    Documents whose content, the regulation corpus and the prompts are unchanged since
+    an earlier run reuse that run's analysis and corrections (see run_ledger.py), only
+    changed documents are analyzed and rewritten. As in main(), an incomplete package the
+    classification says to stop on skips the analysis and rewriting, and the result is text.
+    """
+    filenames = sorted(f for f in os.listdir(workspace.documents_dir()) if f.endswith('.docx'))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    ledger = run_ledger.get_run_ledger()
+    versions = (run_ledger.corpus_version(), run_ledger.prompt_version())
+    file_hashes = await asyncio.to_thread(_document_hashes, filenames)
+    reused = run_ledger.unchanged_files(ledger, "analysis", file_hashes, *versions)
+    changed = [f for f in filenames if f not in reused]
+    if reused:
+        print(f"♻️ {len(reused)} unchanged document(s) reuse their recorded results, {len(changed)} to analyze")
+    
+    with tracing.profiled(), _streaming(on_token), \
+            tracing.span("crew.kickoff_async", documents=len(filenames), reused=len(reused)) as run_span:
+        recorder = tracing.task_recorder(run_span if tracing.enabled() else None)
+        
+        await asyncio.to_thread(_replay_corrections, sorted(reused), versions)
+        
+        if changed:
+            classification = await Crew(
+                agents=[DocumentClassifier],
+                tasks=[document_classification],
+                task_callback=recorder,
+                verbose=True
+            ).kickoff_async()
+            if not should_continue(classification):
+                run_span.set(stopped=True)
+                return classification.raw
+        
+        # The classifier's own entries drive the fan-out (recorded in the run ledger, so this is cheap)
+        classified = await file_classifier_tool._arun()
+        entries = {e["filename"]: e for e in classified.get("classified_documents", [])}
+        
+        async def process(filename: str) -> str:
+            """Analysis subtask then rewrite subtask for one document, returning its analysis"""
+            entry = entries[filename]
+            document_type = entry["document_type"]
+            async with semaphore:
+                await asyncio.to_thread(reset_document_outputs, filename)
+                
+                # Each subtask gets its own agent copy, agents keep per-run executor state
+                analyzer = RedFlagAnalyzer.copy()
+                analysis_task = Task(
+                    description=(
+                        f"{red_flag_analysis.description}\n\n"
+                        f"Analyze ONLY the document '{filename}', classified as {document_type}: pass "
+                        f"filename='{filename}' to the file reader and the red flag scanner, and "
+                        f"document_type='{document_type}' to the ADGM Regulation Digest.\n\n"
+                        f"Classification:\n{json.dumps(entry)}"
+                    ),
+                    expected_output=red_flag_analysis.expected_output,
+                    name=f"{red_flag_analysis.name}: {filename}",
+                    agent=analyzer
+                )
+                with tracing.span("crew.analysis", file=filename):
+                    analysis = (await Crew(
+                        agents=[analyzer],
+                        tasks=[analysis_task],
+                        task_callback=recorder,
+                        verbose=True
+                    ).kickoff_async()).raw
+                
+                rewriter = DocumentRewriterAgent.copy()
+                rewrite_task = Task(
+                    description=(
+                        f"{document_rewriting.description}\n\n"
+                        f"Rewrite ONLY the document '{filename}' ({document_type}) from its red flag analysis "
+                        f"below: call the Simple File Writer Tool with filename='{filename}' and the corrections. "
+                        f"Do not write compliance_corrections_report.json, the per-document reports are merged "
+                        f"into it afterwards.\n\nRed flag analysis:\n{analysis}"
+                    ),
+                    expected_output=document_rewriting.expected_output,
+                    name=f"{document_rewriting.name}: {filename}",
+                    agent=rewriter
+                )
+                with tracing.span("crew.rewrite", file=filename):
+                    await Crew(
+                        agents=[rewriter],
+                        tasks=[rewrite_task],
+                        task_callback=recorder,
+                        verbose=True
+                    ).kickoff_async()
+            
+            # Recorded only once the document is rewritten, so a failure never leaves it looking done
+            if ledger is not None:
+                await asyncio.to_thread(ledger.put, "analysis", filename, file_hashes[filename], analysis, *versions)
+            return analysis
+        
+        to_process = [f for f in changed if entries.get(f, {}).get("document_type") not in (None, "Unknown", "Error")]
+        outcomes = await asyncio.gather(*(process(f) for f in to_process), return_exceptions=True)
+        analyses = dict(reused)
+        documents = []
+        for filename in filenames:
+            document = {
+                "filename": filename,
+                "document_type": entries.get(filename, {}).get("document_type", "Unknown"),
+                "status": "reused" if filename in reused else "unclassified",
+            }
+            if filename in to_process:
+                outcome = outcomes[to_process.index(filename)]
+                if isinstance(outcome, Exception):
+                    print(f"⚠️ {filename} failed: {outcome}")
+                    document.update(status="failed", error=str(outcome))
+                else:
+                    document["status"] = "processed"
+                    analyses[filename] = outcome
+            documents.append(document)
+        
+        report = await asyncio.to_thread(merge_reports, workspace.output_dir(), documents)
+        run_span.set(processed=len(to_process), corrections=report["total_corrections_applied"])
+    
+    sections = [f"### {d['filename']} ({d['document_type']}, {d['status']})\n{analyses.get(d['filename'], d.get('error', ''))}"
+                for d in documents]
+    return "\n\n".join(sections) + "\n\n### Master report\n" + json.dumps(report, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ADGM compliance crew")
+    parser.add_argument("--sequential", action="store_true",
+                        help="run the single sequential crew over the whole package instead of per-document "
+                             "subtasks; unchanged files are then only reused when the whole package is unchanged")
+    # The per-document pipeline used to be opt-in, the flag is kept for existing scripts
+    parser.add_argument("--async", dest="run_async", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("ADGM_MAX_CONCURRENCY", "4")),
+                        help="documents processed at once (default 4)")
+    parser.add_argument("--stream", action="store_true", help="print the agents' tokens as they are generated")
+    args = parser.parse_args()
+    
+    on_token = (lambda role, text: (sys.stdout.write(text), sys.stdout.flush())) if args.stream else None
+    if args.sequential:
+        main(on_token)
+    else:
+        asyncio.run(run_async(args.max_concurrency, on_token))
@@ -0,0 +1,178 @@
+"""
+Shared store of parsed DOCX documents.
+
+Each file is parsed once per run and served to every tool (classifier snippet,
+reader full text, word counts). Entries are keyed by absolute path, size and
+mtime, so an edited file is re-parsed automatically. Setting ADGM_DOC_CACHE_DIR
+(or passing cache_dir) also keeps the extracted text on disk as JSON so later
+runs can skip XML parsing entirely.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional
+from tracing import span
+
+
+def _table_rows(table) -> List[List[str]]:
+    """Cell texts per row, with horizontally merged cells only once"""
+    rows = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            text = " ".join(p.text.strip() for p in cell.paragraphs if p.text.strip())
+            if not cells or cells[-1] != text:
+                cells.append(text)
+        if any(cells):
+            rows.append(cells)
+    return rows
+
+
+def _row_line(cells: List[str]) -> str:
+    return " | ".join(cell for cell in cells if cell)
+
+
+def parse_docx(file_path: str) -> Dict[str, Any]:
+    """
+    Parse a DOCX file into a store entry.
+    Body paragraphs and tables come in document order, followed by
+    header and footer text (each distinct header/footer only once).
+    """
+    from docx import Document
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    
+    stat = os.stat(file_path)
+    doc = Document(file_path)
+    paragraphs = []
+    tables = []
+    lines = []
+    
+    for child in doc.element.body.iterchildren():
+        tag = child.tag.rsplit('}', 1)[-1]
+        if tag == 'p':
+            text = Paragraph(child, doc).text.strip()
+            paragraphs.append(text)
+            if text:
+                lines.append(text)
+        elif tag == 'tbl':
+            rows = _table_rows(Table(child, doc))
+            tables.append(rows)
+            lines.extend(_row_line(cells) for cells in rows)
+    
+    seen = set()
+    for section in doc.sections:
+        for part in (section.header, section.footer):
+            part_lines = [p.text.strip() for p in part.paragraphs if p.text.strip()]
+            for table in part.tables:
+                part_lines.extend(_row_line(cells) for cells in _table_rows(table))
+            key = "\n".join(part_lines)
+            if key and key not in seen:
+                seen.add(key)
+                lines.extend(part_lines)
+    
+    content = "\n".join(lines) + "\n" if lines else ""
+    return {
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "paragraphs": paragraphs,
+        "tables": tables,
+        "content": content,
+        "word_count": len(content.split()),
+    }
+
+
+class DocumentStore:
+    """In-memory (and optionally on-disk) cache of parsed documents"""
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def _is_fresh(entry: Optional[Dict[str, Any]], stat: os.stat_result) -> bool:
+        return (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        )
+    
+    def _disk_path(self, path: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + ".json")
+    
+    def lookup(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached entry without parsing, or None"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        
+        with self._lock:
+            entry = self._entries.get(path)
+        if self._is_fresh(entry, stat):
+            return entry
+        
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(path), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if self._is_fresh(entry, stat):
+                with self._lock:
+                    self._entries[path] = entry
+                return entry
+        
+        return None
+    
+    def put(self, entry: Dict[str, Any]):
+        """Add an entry parsed elsewhere (e.g. in a worker process)"""
+        with self._lock:
+            self._entries[entry["path"]] = entry
+        
+        if self.cache_dir:
+            disk_path = self._disk_path(entry["path"])
+            tmp_path = disk_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, disk_path)
+    
+    def get(self, file_path: str) -> Dict[str, Any]:
+        """Return the parsed entry for a file, parsing it only if needed"""
+        entry = self.lookup(file_path)
+        if entry is None:
+            with span("docx.parse", file=os.path.basename(file_path)):
+                entry = parse_docx(file_path)
+            self.put(entry)
+        return entry
+    
+    def content(self, file_path: str) -> str:
+        return self.get(file_path)["content"]
+    
+    def snippet(self, file_path: str, max_paragraphs: int = 10) -> str:
+        """Non-empty text of the first max_paragraphs body paragraphs"""
+        paragraphs = self.get(file_path)["paragraphs"][:max_paragraphs]
+        return "".join(text + " " for text in paragraphs if text)
+    
+    def word_count(self, file_path: str) -> int:
+        return self.get(file_path)["word_count"]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_default_store: Optional[DocumentStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Process-wide document store shared by all tools"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DocumentStore(os.getenv("ADGM_DOC_CACHE_DIR"))
+        return _default_store
@@ -0,0 +1,190 @@
+"""
+Apply {old, new, reason, severity} corrections to an original DOCX in place.
+
+Instead of regenerating the whole document, each correction's old text is
+located inside a paragraph of the original text (body, tables, headers and footers), the runs
+covering it are split at the match boundaries and replaced by a single run
+that keeps the formatting of the first matched run. The new text is
+highlighted by severity and annotated with a Word comment holding the reason
+(python-docx 1.2+; older versions get an inline italic note instead). All
+corrections are applied in one pass and the result is written atomically.
+"""
+import copy
+import os
+import re
+from typing import Dict, Any, Iterator, List
+
+SEVERITY_HIGHLIGHTS = {
+    "CRITICAL": "RED",
+    "HIGH": "PINK",
+    "MEDIUM": "YELLOW",
+    "LOW": "TURQUOISE",
+}
+COMMENT_AUTHOR = "ADGM Corporate Agent"
+
+
+def _iter_paragraphs(document) -> Iterator[Any]:
+    """Every paragraph in the body, in tables (nested too), headers and footers"""
+    def from_container(container):
+        for paragraph in container.paragraphs:
+            yield paragraph
+        for table in container.tables:
+            for row in table.rows:
+                seen = set()
+                for cell in row.cells:
+                    # Merged cells are returned once per grid column
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    yield from from_container(cell)
+
+    yield from from_container(document)
+    seen_parts = set()
+    for section in document.sections:
+        for part in (section.header, section.footer):
+            if part.is_linked_to_previous or id(part.part) in seen_parts:
+                continue
+            seen_parts.add(id(part.part))
+            yield from from_container(part)
+
+
+def _pattern(old: str) -> "re.Pattern":
+    """
+    Match old text case-insensitively, across any run of whitespace and only as whole
+    words, so "Act" never rewrites the inside of "Contract"
+    """
+    body = r"\s+".join(re.escape(word) for word in old.split())
+    start = r"\b" if re.match(r"\w", old[0]) else ""
+    end = r"\b" if re.match(r"\w", old[-1]) else ""
+    return re.compile(start + body + end, re.IGNORECASE)
+
+
+def _split_at(paragraph, offset: int):
+    """Split the run containing offset so a run boundary falls exactly there"""
+    from docx.text.run import Run
+
+    position = 0
+    for run in paragraph.runs:
+        length = len(run.text)
+        if position < offset < position + length:
+            text = run.text
+            tail = copy.deepcopy(run._r)
+            run._r.addnext(tail)
+            run.text = text[:offset - position]
+            Run(tail, run._parent).text = text[offset - position:]
+            return
+        position += length
+
+
+def _touches(paragraph, start: int, end: int, protected: set) -> bool:
+    """Whether [start, end) overlaps a run that holds an earlier replacement"""
+    position = 0
+    for run in paragraph.runs:
+        length = len(run.text)
+        if run._r in protected and position < end and start < position + length:
+            return True
+        position += length
+    return False
+
+
+def _isolate(paragraph, start: int, end: int) -> List[Any]:
+    """The runs exactly covering paragraph text [start, end)"""
+    _split_at(paragraph, start)
+    _split_at(paragraph, end)
+    covered, position = [], 0
+    for run in paragraph.runs:
+        length = len(run.text)
+        if length and position >= start and position + length <= end:
+            covered.append(run)
+        position += length
+    return covered
+
+
+def _annotate(document, run, correction: Dict[str, Any], severity: str) -> int:
+    """Highlight the replacement and attach the reason, returning the characters added to the paragraph"""
+    from docx.enum.text import WD_COLOR_INDEX
+
+    run.font.highlight_color = getattr(WD_COLOR_INDEX, SEVERITY_HIGHLIGHTS.get(severity, "YELLOW"))
+    note = f"[{severity}] {correction.get('reason', '')}".strip()
+    # Word comments can only be anchored in the body, headers and footers get the inline note
+    if hasattr(document, "add_comment") and run.part is document.part:
+        try:
+            document.add_comment(run, text=note, author=COMMENT_AUTHOR, initials="ADGM")
+            return 0
+        except Exception:
+            pass
+    from docx.text.run import Run
+    marker = copy.deepcopy(run._r)
+    run._r.addnext(marker)
+    marker_run = Run(marker, run._parent)
+    marker_run.text = f" [{note}]"
+    marker_run.font.italic = True
+    marker_run.font.highlight_color = None
+    return len(marker_run.text)
+
+
+def apply_corrections(source_path: str, corrections: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+    """
+    Apply corrections to source_path and write the result to output_path.
+    Returns per-correction results (occurrences replaced, or not_found).
+    """
+    from docx import Document
+
+    document = Document(source_path)
+    paragraphs = list(_iter_paragraphs(document))
+    results = []
+    # Replacement and note runs, later corrections never rewrite them
+    protected = set()
+
+    for correction in corrections:
+        old = str(correction.get("old", "")).strip()
+        new = str(correction.get("new", ""))
+        severity = str(correction.get("severity", "MEDIUM")).upper()
+        result = {"old": old, "new": new, "severity": severity, "reason": correction.get("reason", "")}
+        if not old:
+            results.append(dict(result, status="skipped", occurrences=0))
+            continue
+
+        pattern = _pattern(old)
+        occurrences = 0
+        for paragraph in paragraphs:
+            search_from = 0
+            while True:
+                text = "".join(run.text for run in paragraph.runs)
+                match = pattern.search(text, search_from)
+                if not match:
+                    break
+                if _touches(paragraph, match.start(), match.end(), protected):
+                    search_from = match.end()
+                    continue
+                runs = _isolate(paragraph, match.start(), match.end())
+                if not runs:
+                    break
+                runs[0].text = new
+                for run in runs[1:]:
+                    run._r.getparent().remove(run._r)
+                added = _annotate(document, runs[0], correction, severity)
+                protected.add(runs[0]._r)
+                if added:
+                    protected.add(runs[0]._r.getnext())
+                occurrences += 1
+                search_from = match.start() + len(new) + added
+
+        results.append(dict(result, status="applied" if occurrences else "not_found", occurrences=occurrences))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    try:
+        document.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "source": os.path.basename(source_path),
+        "output": output_path,
+        "corrections": results,
+        "applied": sum(1 for r in results if r["status"] == "applied"),
+        "not_found": sum(1 for r in results if r["status"] == "not_found"),
+    }
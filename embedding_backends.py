@@ -0,0 +1,122 @@
+"""
+Embedding backends for the RAG tool.
+
+"huggingface" (default) is the sentence-transformers model on PyTorch, as before.
+"onnx" runs the ONNX export of the same model with ONNX Runtime and
+"onnx-int8" its int8-quantized export, both published in the model's
+repository under onnx/. The ONNX backends need only onnxruntime and tokenizers
+(already installed with chromadb), so torch is never imported, and they
+reproduce the sentence-transformers pipeline: mean pooling over the attention
+mask followed by L2 normalization.
+
+Settings (the "embedding" section of rag_config):
+    backend     "huggingface", "onnx" or "onnx-int8"
+    batch_size  texts per forward pass
+    threads     intra-op CPU threads, 0 leaves the runtime default
+    onnx_file   ONNX file inside the model repository (or local model directory),
+                None picks onnx/model.onnx or the quantized file for this CPU
+    max_length  tokens per text, longer texts are truncated
+"""
+import os
+import platform
+from typing import Dict, Any, List, Optional
+
+BACKENDS = ("huggingface", "onnx", "onnx-int8")
+
+
+def default_onnx_file(backend: str) -> str:
+    if backend == "onnx":
+        return "onnx/model.onnx"
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    # AVX2 kernels run on any x86-64 server CPU of the last decade
+    return "onnx/model_quint8_avx2.onnx"
+
+
+def _model_file(model_name: str, filename: str) -> str:
+    """Path of a file from a local model directory or the Hugging Face cache (downloaded once)"""
+    if os.path.isdir(model_name):
+        return os.path.join(model_name, filename)
+    from huggingface_hub import hf_hub_download
+    return hf_hub_download(model_name, filename)
+
+
+class OnnxEmbeddings:
+    """Sentence embeddings from an ONNX export of a sentence-transformers model"""
+
+    def __init__(self, model_name: str, onnx_file: str, batch_size: int = 32,
+                 threads: int = 0, max_length: int = 256):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.onnx_file = onnx_file
+        self.batch_size = batch_size
+
+        self._tokenizer = Tokenizer.from_file(_model_file(model_name, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self._session = onnxruntime.InferenceSession(
+            _model_file(model_name, onnx_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start:start + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0]
+
+
+def create_embeddings(model_name: str, settings: Dict[str, Any]):
+    """Build the embedding model for the configured backend"""
+    backend = settings["backend"]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    if backend == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        if settings["threads"]:
+            import torch
+            torch.set_num_threads(settings["threads"])
+        return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": settings["batch_size"]})
+
+    return OnnxEmbeddings(
+        model_name,
+        settings["onnx_file"] or default_onnx_file(backend),
+        batch_size=settings["batch_size"],
+        threads=settings["threads"],
+        max_length=settings["max_length"],
+    )
+
+
+def backend_fingerprint(settings: Optional[Dict[str, Any]]) -> str:
+    """Part of the ingest settings: vectors from different backends must not be mixed in one index"""
+    if not settings or settings["backend"] == "huggingface":
+        # Empty for the original backend, so existing indexes are not re-embedded
+        return ""
+    return f"{settings['backend']}:{settings['onnx_file'] or default_onnx_file(settings['backend'])}"
@@ -0,0 +1,206 @@
+"""
+Offline retrieval evaluation for the ADGM regulation corpus.
+
+Each configuration variant builds its own index of rag_docs/ in a temporary
+directory (no LLM calls, no API keys) and answers a fixed question set with
+the same embedding and search path ADGMRAGTool uses. A question counts as a hit
+when one of the top k chunks comes from the expected PDF and contains one of
+its expected keywords.
+
+Reported per variant: recall@k, MRR, mean/p95 retrieval latency, index build
+time, chunk count and mean chunk size.
+
+Built-in variants: "baseline" (the old 400 character splitter with MMR),
+"section-mmr" (section splitter, vector-only MMR), "hybrid" (current
+defaults, BM25 + vector with reciprocal rank fusion) and "hybrid-filtered"
+(hybrid restricted to the regulations for each question's document type).
+Any JSON override files given with --variant, shaped like rag_config.json,
+are added to these.
+
+Usage:
+    python eval_retrieval.py [--variant tuned.json ...] [--questions questions.json] [--json eval_results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from rag_config import DEFAULT_RAG_CONFIG, _merge
+
+BUILTIN_VARIANTS = {
+    "baseline": {
+        "splitter": {"strategy": "character", "max_chars": 400, "overlap": 20},
+        "retriever": {"mode": "mmr", "k": 5, "fetch_k": 10, "lambda_mult": 0.5},
+    },
+    "section-mmr": {"retriever": {"mode": "mmr"}},
+    "hybrid": {},
+    # "filter_by_document_type" is read by this script only: search with each question's document_type
+    "hybrid-filtered": {"filter_by_document_type": True},
+}
+
+DPR = "ADGM DPR 2021 Appropriate Policy Document.pdf"
+EMPLOYMENT = "ADGM Standard Employment Contract Template - ER 2024 (Feb 2025) (2).pdf"
+AMEND_ARTICLES = "Templates_SHReso_AmendmentArticles-v1-20220107.pdf"
+MODEL_ARTICLES = "adgm-ra-model-articles-private-company-limited-by-shares.pdf"
+INCORPORATION = "adgm-ra-resolution-multiple-incorporate-shareholders-LTD-incorporation-v2 (1).pdf"
+
+# Document type used for filtered variants when a question does not name one
+SOURCE_DOCUMENT_TYPES = {
+    DPR: "Data Protection Policy",
+    EMPLOYMENT: "Employment Contract",
+    AMEND_ARTICLES: "Shareholder Resolution",
+    MODEL_ARTICLES: "Articles of Association",
+    INCORPORATION: "Incorporation Application",
+}
+
+QUESTIONS = [
+    {"question": "What must an appropriate policy document cover when processing special categories of personal data?",
+     "source": DPR, "keywords": ["special categor", "appropriate policy"]},
+    {"question": "How long must the appropriate policy document be retained?",
+     "source": DPR, "keywords": ["retain", "retention"]},
+    {"question": "What are the data protection principles the controller must comply with?",
+     "source": DPR, "keywords": ["principle"]},
+    {"question": "What is the probation period in the standard employment contract?",
+     "source": EMPLOYMENT, "keywords": ["probation"]},
+    {"question": "What notice period applies to termination of employment?",
+     "source": EMPLOYMENT, "keywords": ["notice"]},
+    {"question": "How much annual leave is the employee entitled to?",
+     "source": EMPLOYMENT, "keywords": ["annual leave", "holiday", "vacation"]},
+    {"question": "What are the employee's working hours?",
+     "source": EMPLOYMENT, "keywords": ["hours"]},
+    {"question": "What resolution do shareholders pass to amend the articles of association?",
+     "source": AMEND_ARTICLES, "keywords": ["special resolution", "amend"]},
+    {"question": "What is the liability of members of a private company limited by shares?",
+     "source": MODEL_ARTICLES, "keywords": ["liability of the members", "limited"]},
+    {"question": "What is the quorum for directors' meetings?",
+     "source": MODEL_ARTICLES, "keywords": ["quorum"]},
+    {"question": "How do directors take decisions collectively?",
+     "source": MODEL_ARTICLES, "keywords": ["unanimous", "majority decision", "decision"]},
+    {"question": "What powers do directors have to allot shares and pay dividends?",
+     "source": MODEL_ARTICLES, "keywords": ["allot", "dividend"]},
+    {"question": "How can a director be appointed or removed?",
+     "source": MODEL_ARTICLES, "keywords": ["appoint", "terminat"]},
+    {"question": "Who are appointed as the first directors on incorporation by the shareholders?",
+     "source": INCORPORATION, "keywords": ["director", "appoint"]},
+    {"question": "Who is authorised to sign the incorporation application on behalf of the shareholders?",
+     "source": INCORPORATION, "keywords": ["authoris", "authoriz", "sign"]},
+    {"question": "Where will the registered office of the new company be located?",
+     "source": INCORPORATION, "keywords": ["registered office", "address"]},
+]
+
+
+def _is_hit(doc, question: Dict[str, Any]) -> bool:
+    source = doc.metadata.get("document") or os.path.basename(doc.metadata.get("source", ""))
+    text = doc.page_content.lower()
+    return source == question["source"] and any(k in text for k in question["keywords"])
+
+
+def evaluate_variant(name: str, overrides: Dict[str, Any], questions: List[Dict[str, Any]], workdir: str) -> Dict[str, Any]:
+    """Build an index for one configuration and score the question set against it"""
+    from adgm_rag_tool import ADGMRAGTool, get_embeddings
+
+    overrides = dict(overrides)
+    use_filters = overrides.pop("filter_by_document_type", False)
+    config = _merge(DEFAULT_RAG_CONFIG, overrides)
+    config["db_path"] = os.path.join(workdir, name)
+    config["answer_cache"]["enabled"] = False
+
+    tool = ADGMRAGTool()
+    start = time.perf_counter()
+    tool._open_vector_store(config, build=True)
+    build_seconds = time.perf_counter() - start
+
+    collection = ADGMRAGTool._vectorstore._collection
+    stored = collection.get(include=["documents"])["documents"]
+    embeddings = get_embeddings(config["embedding_model"], config["embedding"])
+    k = config["retriever"]["k"]
+
+    # Warm up the model so the first question does not pay for lazy initialisation
+    embeddings.embed_query(questions[0]["question"])
+
+    hits, reciprocal_ranks, latencies, misses = 0, [], [], []
+    for question in questions:
+        start = time.perf_counter()
+        vector = embeddings.embed_query(question["question"])
+        document_type = question.get("document_type") or SOURCE_DOCUMENT_TYPES.get(question["source"])
+        sources = tool.resolve_sources(document_type=document_type) if use_filters else None
+        docs = tool._search([question["question"]], [vector], sources)[0]
+        latencies.append(time.perf_counter() - start)
+
+        rank = next((i + 1 for i, doc in enumerate(docs[:k]) if _is_hit(doc, question)), None)
+        if rank:
+            hits += 1
+            reciprocal_ranks.append(1 / rank)
+        else:
+            reciprocal_ranks.append(0.0)
+            misses.append(question["question"])
+
+    latencies.sort()
+    return {
+        "variant": name,
+        "splitter": config["splitter"],
+        "retriever": config["retriever"],
+        "filtered": use_filters,
+        "recall_at_k": hits / len(questions),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "latency_mean_ms": statistics.mean(latencies) * 1000,
+        "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "build_seconds": build_seconds,
+        "chunks": len(stored),
+        "mean_chunk_chars": statistics.mean(len(d) for d in stored) if stored else 0,
+        "misses": misses,
+    }
+
+
+def _print_table(results: List[Dict[str, Any]]):
+    print(f"\n{'variant':<20}{'k':>4}{'recall@k':>10}{'MRR':>7}{'mean ms':>10}{'p95 ms':>9}"
+          f"{'chunks':>8}{'chars':>8}{'build s':>9}")
+    for r in results:
+        print(f"{r['variant']:<20}{r['retriever']['k']:>4}{r['recall_at_k']:>10.2f}{r['mrr']:>7.2f}"
+              f"{r['latency_mean_ms']:>10.1f}{r['latency_p95_ms']:>9.1f}{r['chunks']:>8}"
+              f"{r['mean_chunk_chars']:>8.0f}{r['build_seconds']:>9.1f}")
+    for r in results:
+        for question in r["misses"]:
+            print(f"  ✗ {r['variant']}: {question}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variant", action="append", default=[], help="JSON override file, may be repeated")
+    parser.add_argument("--no-builtin", action="store_true", help="skip the built-in variants")
+    parser.add_argument("--questions", help="JSON list of {question, source, keywords[, document_type]} to use instead")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    questions = QUESTIONS
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = json.load(f)
+
+    variants = {} if args.no_builtin else dict(BUILTIN_VARIANTS)
+    for path in args.variant:
+        with open(path, "r", encoding="utf-8") as f:
+            variants[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="adgm_eval_")
+    try:
+        results = []
+        for name, overrides in variants.items():
+            print(f"🔎 Evaluating {name}...")
+            results.append(evaluate_variant(name, overrides, questions, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📝 Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
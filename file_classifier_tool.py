@@ -1,50 +1,136 @@
 from crewai.tools import BaseTool
-from typing import List, Dict, Any
-from docx import Document
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
+from typing import ClassVar, List, Dict, Any, Optional, Tuple
+from document_store import get_document_store
+from hashing import file_sha256
+from tracing import current_span, span, traced_tool, token_usage_callback
+from collections import deque
+import asyncio
+import hashlib
+import json
 import os
 import re
+import run_ledger
+import workspace
 
+# Tie-break priority, the order the original if-chain checked types in
+DOCUMENT_TYPES = (
+    "Articles of Association",
+    "Memorandum of Association",
+    "Board Resolution",
+    "Register of Directors",
+    "Register of Members",
+    "Incorporation Application",
+)
 
-class ADGMDocumentClassifierTool(BaseTool):
-    name: str = "ADGM Document Classifier"
-    description: str = "Classifies ADGM corporate documents and checks for completeness"
+# A filename rule fires when all of its keywords occur in the filename, the first one that fires decides
+FILENAME_RULES = [
+    ("Articles of Association", ("aoa",)),
+    ("Articles of Association", ("articles",)),
+    ("Memorandum of Association", ("moa",)),
+    ("Memorandum of Association", ("memorandum",)),
+    ("Board Resolution", ("resolution",)),
+    ("Register of Directors", ("register", "director")),
+    ("Register of Members", ("register", "member")),
+    ("Incorporation Application", ("incorporation",)),
+    ("Incorporation Application", ("application",)),
+]
+
+CONTENT_PATTERNS = {
+    "Articles of Association": ["articles of association", "company governance", "director powers", "articles", "aoa"],
+    "Memorandum of Association": ["memorandum of association", "company objects", "share capital", "memorandum", "moa"],
+    "Board Resolution": ["resolution", "resolved", "board of directors", "board resolution"],
+    "Register of Directors": ["register of directors", "director details", "director information"],
+    "Register of Members": ["register of members", "shareholder", "member information"],
+    "Incorporation Application": ["incorporation application", "application for", "registration authority"]
+}
+
+# Filename evidence outweighs any amount of content evidence (more than every pattern
+# of one type), as it did in the if-chain
+FILENAME_WEIGHT = 10.0
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over the keywords: one pass over a text finds every keyword
+    in it, nested ones included ("articles" inside "articles of association").
+    """
     
-    def _run(self) -> Dict[str, Any]:
-        # Required documents for incorporation
-        REQUIRED_DOCUMENTS = [
-            "Articles of Association",
-            "Memorandum of Association", 
-            "Board Resolution",
-            "Register of Members",
-            "Register of Directors",
-            "Incorporation Application"
-        ]
+    def __init__(self, keywords):
+        # Trie of the keywords, state 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[frozenset] = [frozenset()]
+        for keyword in sorted(set(keywords)):
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._output.append(frozenset())
+                state = self._goto[state][char]
+            self._output[state] = frozenset([keyword])
         
-        # Always scan the /documents directory for uploaded files
-        documents_dir = os.path.join(os.getcwd(), 'documents')
-        if not os.path.exists(documents_dir):
-            return {
-                "error": f"Directory '{documents_dir}' does not exist.",
-                "status": "error"
-            }
+        # Failure links breadth-first: the longest proper suffix that is also a trie path
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] |= self._output[self._fail[child]]
+    
+    def hits(self, text: str) -> set:
+        """The keywords occurring in text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
 
-        file_paths = [os.path.join(documents_dir, f) for f in os.listdir(documents_dir) if f.endswith('.docx')]
-        
-        if not file_paths:
-            return {
-                "error": "No DOCX files found in documents directory.",
-                "status": "error"
-            }
 
-        llm = ChatGroq(
-            groq_api_key=os.environ['GROQ_API_KEY'],
-            model='llama-3.1-8b-instant'
-        )
-        
-        # Improved prompt template
-        prompt_template = """
+_filename_matcher = KeywordMatcher(k for _, keywords in FILENAME_RULES for k in keywords)
+_content_matcher = KeywordMatcher(p for patterns in CONTENT_PATTERNS.values() for p in patterns)
+
+
+def score_document(filename: str, content: str) -> Dict[str, float]:
+    """
+    Confidence per document type from the filename and content keywords.
+    Scores sum to 1.0, or are all 0.0 when no keyword matched.
+    """
+    scores = dict.fromkeys(DOCUMENT_TYPES, 0.0)
+    
+    filename_hits = _filename_matcher.hits(filename)
+    for doc_type, keywords in FILENAME_RULES:
+        if all(k in filename_hits for k in keywords):
+            scores[doc_type] += FILENAME_WEIGHT
+            break
+    
+    content_hits = _content_matcher.hits(content)
+    for doc_type, patterns in CONTENT_PATTERNS.items():
+        scores[doc_type] += sum(1 for p in patterns if p in content_hits)
+    
+    total = sum(scores.values())
+    if total:
+        scores = {doc_type: score / total for doc_type, score in scores.items()}
+    return scores
+
+
+def best_document_type(scores: Dict[str, float]) -> str:
+    """Highest scoring type (ties go to DOCUMENT_TYPES order), or Unknown"""
+    best = max(DOCUMENT_TYPES, key=lambda doc_type: (scores[doc_type], -DOCUMENT_TYPES.index(doc_type)))
+    return best if scores[best] > 0 else "Unknown"
+
+
+CLASSIFICATION_PROMPT = """
 You are an ADGM corporate document classifier. Analyze the filename and content to classify the document.
 
 Filename: {filename}
@@ -68,41 +154,142 @@ Classification Rules:
 
 Respond with ONLY the document type name from the list above, or "Unknown" if it doesn't match any category.
 """
+
+# Ways the LLM phrases its answer, most specific first
+_LLM_ANSWER_PATTERNS = [
+    r'Final Classification:\s*(.+?)(?:\n|$)',
+    r'Classification:\s*(.+?)(?:\n|$)', 
+    r'^(.+?)(?:\n|$)',  # First line
+    r'(Articles of Association|Memorandum of Association|Board Resolution|Register of Members|Register of Directors|Incorporation Application)',
+]
+
+
+def _parse_llm_classification(llm_response: str) -> str:
+    """Map a free-text LLM answer onto a known document type, or Unknown"""
+    llm_response = llm_response.strip()
+    for pattern in _LLM_ANSWER_PATTERNS:
+        match = re.search(pattern, llm_response, re.IGNORECASE)
+        if match:
+            classification = match.group(1).strip().lower()
+            for valid_type in DOCUMENT_TYPES:
+                if valid_type.lower() in classification:
+                    return valid_type
+    return "Unknown"
+
+
+# Bump when score_document changes, so recorded classifications are redone
+SCORING_VERSION = "2"
+
+# Groq model of the fallback, and how much of a document it is shown
+LLM_MODEL = 'llama-3.1-8b-instant'
+LLM_SNIPPET_CHARS = 500
+
+# Version of the LLM fallback, memoized answers are only reused under the same prompt and model
+LLM_CLASSIFIER_VERSION = run_ledger.prompt_fingerprint(CLASSIFICATION_PROMPT, LLM_MODEL, LLM_SNIPPET_CHARS)
+
+# Run ledger version of the classifier, any change to its rules or prompt reclassifies every file
+CLASSIFIER_VERSION = run_ledger.prompt_fingerprint(
+    CLASSIFICATION_PROMPT, json.dumps(FILENAME_RULES), json.dumps(CONTENT_PATTERNS, sort_keys=True),
+    SCORING_VERSION, LLM_CLASSIFIER_VERSION
+)
+
+
+class ADGMDocumentClassifierTool(BaseTool):
+    name: str = "ADGM Document Classifier"
+    description: str = "Classifies ADGM corporate documents and checks for completeness"
+    
+    # LLM answers memoized by filename, content hash and LLM_CLASSIFIER_VERSION, so re-uploads
+    # never reach the LLM. A SQLite run ledger file, so concurrent batch workers can share it.
+    llm_cache_path: str = os.path.join('.cache', 'classification_cache.sqlite')
+    llm_max_concurrency: int = 4
+    
+    # Class-level so the Groq client and prompt are built once per process. ClassVar keeps
+    # pydantic from turning it into a per-instance private attribute.
+    _analysis_chain: ClassVar[Any] = None
+    
+    @traced_tool
+    def _run(self) -> Dict[str, Any]:
+        classified_documents, unresolved, error = self._classify_with_rules()
+        if error:
+            return error
+        
+        # LLM classification as last resort, all unresolved files in one batch
+        if unresolved:
+            self._classify_with_llm(unresolved)
+        
+        self._record_classifications(classified_documents)
+        return self._completeness_report(classified_documents)
+    
+    @traced_tool
+    async def _arun(self) -> Dict[str, Any]:
+        """Async variant: file parsing runs in a worker thread, the Groq calls are awaited"""
+        classified_documents, unresolved, error = await asyncio.to_thread(self._classify_with_rules)
+        if error:
+            return error
         
-        prompt = PromptTemplate(
-            input_variables=["filename", "content"],
-            template=prompt_template
-        )
+        if unresolved:
+            await self._aclassify_with_llm(unresolved)
         
-        analysis_chain = prompt | llm
+        await asyncio.to_thread(self._record_classifications, classified_documents)
+        return self._completeness_report(classified_documents)
+    
+    def _classify_with_rules(self) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str, str]], Optional[Dict[str, Any]]]:
+        """Rule-based pass over /documents: (classified entries, unresolved items for the LLM, error result)"""
+        # Always scan the documents directory for uploaded files
+        documents_dir = workspace.documents_dir()
+        if not os.path.exists(documents_dir):
+            return [], [], {
+                "error": f"Directory '{documents_dir}' does not exist.",
+                "status": "error"
+            }
+
+        file_paths = [os.path.join(documents_dir, f) for f in os.listdir(documents_dir) if f.endswith('.docx')]
+        
+        if not file_paths:
+            return [], [], {
+                "error": "No DOCX files found in documents directory.",
+                "status": "error"
+            }
         
         # Process all documents
         classified_documents = []
-        detected_types = []
+        unresolved = []
+        store = get_document_store()
+        ledger = run_ledger.get_run_ledger()
         
         for file_path in file_paths:
             try:
-                doc = Document(file_path)
                 filename = os.path.basename(file_path)
                 
-                content = ""
-                for para in doc.paragraphs[:10]: 
-                    if para.text.strip():
-                        content += para.text.strip() + " "
+                # Unchanged files reuse the entry an earlier run settled, without parsing
+                sha256 = file_sha256(file_path)
+                previous = ledger.get("classification", filename, sha256, prompt_version=CLASSIFIER_VERSION) if ledger else None
+                if previous:
+                    classified_documents.append(dict(previous, filename=filename, classification_source="ledger"))
+                    continue
                 
-                # Get classification with fallback logic
-                document_type = self._classify_document(filename, content, analysis_chain)
+                # Parsed once per run and shared with the reader tools
+                content = store.snippet(file_path)
                 
-                print(f"🔍 Classifying {filename} → {document_type}")  # Debug output
+                # Rule-based classification first (more reliable)
+                scores = score_document(filename, content)
+                document_type = best_document_type(scores)
                 
-                classified_documents.append({
+                entry = {
                     "filename": filename,
                     "document_type": document_type,
+                    "confidence": round(scores[document_type], 3) if document_type != "Unknown" else 0.0,
+                    "type_scores": {t: round(v, 3) for t, v in scores.items() if v > 0},
+                    "sha256": sha256,
                     "status": "success"
-                })
+                }
+                classified_documents.append(entry)
                 
                 if document_type != "Unknown":
-                    detected_types.append(document_type)
+                    entry["classification_source"] = "rules"
+                else:
+                    content_hash = hashlib.sha256(store.content(file_path).encode('utf-8')).hexdigest()
+                    unresolved.append((entry, content, content_hash))
                 
             except Exception as e:
                 classified_documents.append({
@@ -112,95 +299,152 @@ Respond with ONLY the document type name from the list above, or "Unknown" if it
                     "status": "error"
                 })
         
+        return classified_documents, unresolved, None
+    
+    def _record_classifications(self, classified_documents: List[Dict[str, Any]]):
+        """Store settled classifications in the run ledger, keyed by filename and file content"""
+        ledger = run_ledger.get_run_ledger()
+        if ledger is None:
+            return
+        for entry in classified_documents:
+            # Unknown after a failed LLM call is not settled, the next run retries it
+            if entry["status"] == "success" and entry.get("classification_source") in ("rules", "llm", "llm_cache"):
+                ledger.put("classification", entry["filename"], entry["sha256"], entry, prompt_version=CLASSIFIER_VERSION)
+    
+    def _completeness_report(self, classified_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Required documents for incorporation
+        REQUIRED_DOCUMENTS = [
+            "Articles of Association",
+            "Memorandum of Association", 
+            "Board Resolution",
+            "Register of Members",
+            "Register of Directors",
+            "Incorporation Application"
+        ]
+        
+        detected_types = []
+        for entry in classified_documents:
+            if entry["status"] == "success":
+                print(f"🔍 Classifying {entry['filename']} → {entry['document_type']}")  # Debug output
+                if entry["document_type"] != "Unknown":
+                    detected_types.append(entry["document_type"])
+        
         # Check completeness
         missing_documents = [doc for doc in REQUIRED_DOCUMENTS if doc not in detected_types]
         present_documents = [doc for doc in REQUIRED_DOCUMENTS if doc in detected_types]
         
         return {
             "classified_documents": classified_documents,
+            # Documents the LLM fallback could not classify, with the reason
+            "classification_errors": [
+                {"filename": entry["filename"], "error": entry["llm_error"]}
+                for entry in classified_documents if entry.get("llm_error")
+            ],
             "present_documents": present_documents,
             "missing_documents": missing_documents,
             "completeness_score": len(present_documents) / len(REQUIRED_DOCUMENTS),
             "is_complete": len(missing_documents) == 0,
-            "total_files_processed": len(file_paths),
+            "total_files_processed": len(classified_documents),
             "status": "success"
         }
     
-    def _classify_document(self, filename: str, content: str, analysis_chain) -> str:
-        """Enhanced classification with fallback logic"""
-        
-        filename_lower = filename.lower()
-        content_lower = content.lower()
-        
-        # Rule-based classification first (more reliable)
-        if "aoa" in filename_lower or "articles" in filename_lower:
-            return "Articles of Association"
-        
-        if "moa" in filename_lower or "memorandum" in filename_lower:
-            return "Memorandum of Association"
-        
-        if "resolution" in filename_lower:
-            return "Board Resolution"
-        
-        if "register" in filename_lower:
-            if "director" in filename_lower:
-                return "Register of Directors"
-            elif "member" in filename_lower:
-                return "Register of Members"
+    def _get_analysis_chain(self):
+        """Build the Groq classification chain once and reuse it"""
+        if ADGMDocumentClassifierTool._analysis_chain is None:
+            from langchain_groq import ChatGroq
+            from langchain.prompts import PromptTemplate
+            
+            llm = ChatGroq(
+                groq_api_key=os.environ['GROQ_API_KEY'],
+                model=LLM_MODEL
+            )
+            
+            prompt = PromptTemplate(
+                input_variables=["filename", "content"],
+                template=CLASSIFICATION_PROMPT
+            )
+            
+            ADGMDocumentClassifierTool._analysis_chain = prompt | llm
+        return ADGMDocumentClassifierTool._analysis_chain
+    
+    def _llm_pending(self, unresolved: List[Tuple[Dict[str, Any], str, str]]):
+        """Answer what the memo can, returning (memo, items still needing the LLM)"""
+        memo = run_ledger.RunLedger(self.llm_cache_path)
         
-        if "incorporation" in filename_lower or "application" in filename_lower:
-            return "Incorporation Application"
+        to_query = []
+        for entry, content, content_hash in unresolved:
+            document_type = memo.get("llm_classification", entry["filename"], content_hash,
+                                     prompt_version=LLM_CLASSIFIER_VERSION)
+            if document_type is not None:
+                entry["document_type"] = document_type
+                entry["classification_source"] = "llm_cache"
+            else:
+                to_query.append((entry, content, content_hash))
         
-        # Content-based classification (fallback)
-        content_patterns = {
-            "Articles of Association": ["articles of association", "company governance", "director powers", "articles", "aoa"],
-            "Memorandum of Association": ["memorandum of association", "company objects", "share capital", "memorandum", "moa"],
-            "Board Resolution": ["resolution", "resolved", "board of directors", "board resolution"],
-            "Register of Directors": ["register of directors", "director details", "director information"],
-            "Register of Members": ["register of members", "shareholder", "member information"],
-            "Incorporation Application": ["incorporation application", "application for", "registration authority"]
+        current_span().set(llm_cache_hits=len(unresolved) - len(to_query))
+        return memo, to_query
+    
+    def _llm_batch_args(self, to_query: List[Tuple[Dict[str, Any], str, str]]):
+        usage_callback = token_usage_callback()
+        inputs = [{'filename': entry["filename"], 'content': content[:LLM_SNIPPET_CHARS]} for entry, content, _ in to_query]
+        config = {
+            "max_concurrency": self.llm_max_concurrency,
+            "callbacks": [usage_callback] if usage_callback else [],
         }
+        return inputs, config
+    
+    def _apply_llm_results(self, memo: run_ledger.RunLedger, to_query: List[Tuple[Dict[str, Any], str, str]],
+                           llm_results: List[Any]):
+        for (entry, _, content_hash), llm_result in zip(to_query, llm_results):
+            if isinstance(llm_result, Exception):
+                print(f"⚠️ LLM classification failed for {entry['filename']}: {llm_result}")
+                entry["llm_error"] = str(llm_result)
+                continue
+            
+            document_type = _parse_llm_classification(llm_result.content)
+            entry["document_type"] = document_type
+            entry["classification_source"] = "llm"
+            memo.put("llm_classification", entry["filename"], content_hash, document_type,
+                     prompt_version=LLM_CLASSIFIER_VERSION)
+    
+    def _llm_failed(self, to_query: List[Tuple[Dict[str, Any], str, str]], error: Exception):
+        """Record a failed LLM fallback on the entries it left Unknown, so the report shows why"""
+        message = f"{type(error).__name__}: {error}"
+        print(f"⚠️ LLM classification failed for {len(to_query)} document(s): {message}")
+        current_span().set(llm_error=message)
+        for entry, _, _ in to_query:
+            entry["llm_error"] = message
+    
+    def _classify_with_llm(self, unresolved: List[Tuple[Dict[str, Any], str, str]]):
+        """Classify (entry, snippet, content_hash) items with cached or batched LLM answers, updating entries in place"""
+        memo, to_query = self._llm_pending(unresolved)
+        if not to_query:
+            return
         
-        for doc_type, patterns in content_patterns.items():
-            if any(pattern in content_lower for pattern in patterns):
-                return doc_type
+        try:
+            analysis_chain = self._get_analysis_chain()
+            with span("classifier.llm", calls=len(to_query)):
+                inputs, config = self._llm_batch_args(to_query)
+                llm_results = analysis_chain.batch(inputs, config=config, return_exceptions=True)
+        except Exception as e:
+            self._llm_failed(to_query, e)
+            return
+        
+        self._apply_llm_results(memo, to_query, llm_results)
+    
+    async def _aclassify_with_llm(self, unresolved: List[Tuple[Dict[str, Any], str, str]]):
+        """Async variant of _classify_with_llm"""
+        memo, to_query = await asyncio.to_thread(self._llm_pending, unresolved)
+        if not to_query:
+            return
         
-        # LLM classification as last resort
         try:
-            llm_result = analysis_chain.invoke({
-                'filename': filename, 
-                'content': content[:500]
-            })
-            
-            # Multiple regex patterns to catch LLM response
-            llm_response = llm_result.content.strip()
-            
-            # Try different extraction patterns
-            patterns = [
-                r'Final Classification:\s*(.+?)(?:\n|$)',
-                r'Classification:\s*(.+?)(?:\n|$)', 
-                r'^(.+?)(?:\n|$)',  # First line
-                r'(Articles of Association|Memorandum of Association|Board Resolution|Register of Members|Register of Directors|Incorporation Application)',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, llm_response, re.IGNORECASE)
-                if match:
-                    classification = match.group(1).strip()
-                    # Validate against known document types
-                    valid_types = ["Articles of Association", "Memorandum of Association", 
-                                 "Board Resolution", "Register of Members", 
-                                 "Register of Directors", "Incorporation Application"]
-                    
-                    for valid_type in valid_types:
-                        if valid_type.lower() in classification.lower():
-                            return valid_type
-            
-            return "Unknown"
-            
+            analysis_chain = self._get_analysis_chain()
+            with span("classifier.llm", calls=len(to_query)):
+                inputs, config = self._llm_batch_args(to_query)
+                llm_results = await analysis_chain.abatch(inputs, config=config, return_exceptions=True)
         except Exception as e:
-            print(f"⚠️ LLM classification failed for {filename}: {e}")
-            return "Unknown"
-
-
-
+            self._llm_failed(to_query, e)
+            return
+        
+        await asyncio.to_thread(self._apply_llm_results, memo, to_query, llm_results)
@@ -1,20 +1,121 @@
 from crewai.tools import BaseTool
-from typing import Dict, Any
-from docx import Document
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterator, Optional, Tuple
+from document_store import get_document_store, parse_docx
+from tracing import current_span, span, traced_tool
+import asyncio
+import multiprocessing
 import os
+import workspace
+
+
+def parse_docx_file(file_path: str) -> Dict[str, Any]:
+    """Parse one DOCX file, returning a store entry or an error dict"""
+    try:
+        with span("docx.parse", file=os.path.basename(file_path)):
+            return parse_docx(file_path)
+    except Exception as e:
+        return {
+            "error": f"Error reading {os.path.basename(file_path)}: {str(e)}",
+            "status": "error"
+        }
+
+
+def _reader_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    if "error" in entry:
+        return entry
+    return {
+        "content": entry["content"],
+        "word_count": entry["word_count"],
+        "status": "success"
+    }
 
 
 class SimpleFileReaderTool(BaseTool):
     name: str = "Simple File Reader Tool"
-    description: str = "Reads all DOCX files from documents directory"
+    description: str = "Reads all DOCX files from documents directory, or only the one named by filename"
+    
+    # Worker processes for extraction, None means one per CPU
+    max_workers: Optional[int] = None
+    # Below this many files the pool start-up costs more than it saves
+    parallel_threshold: int = 8
+    # When set, contents are packed into this many tokens (see context_packer)
+    token_budget: Optional[int] = None
     
-    def _run(self) -> Dict[str, Any]:
+    def iter_file_contents(self, documents_dir: str, docx_files: list) -> Iterator[Tuple[str, Dict[str, Any]]]:
         """
-        Simple file reader - always reads from documents directory, no parameters needed
+        Yield (filename, result) as soon as each file is parsed.
+        Files already in the shared document store are served without parsing.
+        At most two files per worker are in flight, which bounds peak memory.
         """
+        store = get_document_store()
+        to_parse = []
+        read_span = current_span()
+        for filename in docx_files:
+            file_path = os.path.join(documents_dir, filename)
+            try:
+                entry = store.lookup(file_path)
+            except OSError as e:
+                entry = {"error": f"Error reading {filename}: {str(e)}", "status": "error"}
+            if entry is None:
+                to_parse.append(filename)
+            else:
+                yield filename, _reader_result(entry)
+        
+        read_span.set(store_hits=len(docx_files) - len(to_parse), parsed=len(to_parse))
+        
+        workers = self.max_workers or os.cpu_count() or 1
+        
+        if workers <= 1 or len(to_parse) < self.parallel_threshold:
+            for filename in to_parse:
+                entry = parse_docx_file(os.path.join(documents_dir, filename))
+                if "error" not in entry:
+                    store.put(entry)
+                yield filename, _reader_result(entry)
+            return
+        
+        pending_files = iter(to_parse)
+        window = workers * 2
+        
+        # Spawned workers, the tool runs in crew threads and forking a threaded process is not safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            in_flight = {}
+            for filename in pending_files:
+                in_flight[pool.submit(parse_docx_file, os.path.join(documents_dir, filename))] = filename
+                if len(in_flight) >= window:
+                    break
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = future.result()
+                    if "error" not in entry:
+                        store.put(entry)
+                    yield in_flight.pop(future), _reader_result(entry)
+                    
+                    next_file = next(pending_files, None)
+                    if next_file is not None:
+                        in_flight[pool.submit(parse_docx_file, os.path.join(documents_dir, next_file))] = next_file
+    
+    @traced_tool
+    def _run(self, filename: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Simple file reader - always reads from documents directory.
+        filename limits the read to one document, for per-document tasks.
+        """
+        return self._read_documents(filename)
+    
+    @traced_tool
+    async def _arun(self, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant: parsing and packing run in a worker thread, off the event loop"""
+        return await asyncio.to_thread(self._read_documents, filename)
+    
+    def _read_documents(self, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Read (and, with a token budget, pack) the DOCX files in documents/"""
         
         # Always read from documents directory
-        documents_dir = os.path.join(os.getcwd(), "documents")
+        documents_dir = workspace.documents_dir()
         
         print(f"🔍 Reading from: {documents_dir}")
         
@@ -27,10 +128,12 @@ class SimpleFileReaderTool(BaseTool):
         
         # Get all DOCX files
         docx_files = [f for f in os.listdir(documents_dir) if f.endswith('.docx')]
+        if filename:
+            docx_files = [f for f in docx_files if f == os.path.basename(filename)]
         
         if not docx_files:
             return {
-                "error": f"No DOCX files found in '{documents_dir}'",
+                "error": f"'{filename}' not found in '{documents_dir}'" if filename else f"No DOCX files found in '{documents_dir}'",
                 "file_contents": {},
                 "status": "error"  
             }
@@ -38,32 +141,17 @@ class SimpleFileReaderTool(BaseTool):
         file_contents = {}
         successfully_read = 0
         
-        for filename in docx_files:
-            file_path = os.path.join(documents_dir, filename)
+        for name, result in self.iter_file_contents(documents_dir, docx_files):
+            file_contents[name] = result
             
-            try:
-                doc = Document(file_path)
-                
-                # Extract all text content
-                content = ""
-                for para in doc.paragraphs:
-                    if para.text.strip():
-                        content += para.text.strip() + "\n"
-                
-                file_contents[filename] = {
-                    "content": content,
-                    "word_count": len(content.split()),
-                    "status": "success"
-                }
+            if result["status"] == "success":
                 successfully_read += 1
-                print(f"✅ Read: {filename} ({len(content.split())} words)")
-                
-            except Exception as e:
-                file_contents[filename] = {
-                    "error": f"Error reading {filename}: {str(e)}",
-                    "status": "error"
-                }
-                print(f"❌ Failed: {filename} - {str(e)}")
+                print(f"✅ Read: {name} ({result['word_count']} words)")
+            else:
+                print(f"❌ Failed: {name} - {result['error']}")
+        
+        if self.token_budget and successfully_read:
+            return self._packed_result(documents_dir, file_contents, len(docx_files))
         
         return {
             "file_contents": file_contents,
@@ -71,3 +159,37 @@ class SimpleFileReaderTool(BaseTool):
             "total_files": len(docx_files),
             "status": "success" if successfully_read > 0 else "error"
         }
+    
+    def _packed_result(self, documents_dir: str, file_contents: Dict[str, Any], total_files: int) -> Dict[str, Any]:
+        """Pack successfully read files into the token budget, keeping red-flag lines first"""
+        from context_packer import pack_documents
+        from red_flag_scanner_tool import scan_document
+        
+        store = get_document_store()
+        documents = {f: r["content"] for f, r in file_contents.items() if r["status"] == "success"}
+        findings = {}
+        for filename in documents:
+            try:
+                findings[filename] = scan_document(filename, store.get(os.path.join(documents_dir, filename)))["findings"]
+            except Exception:
+                findings[filename] = []
+        
+        try:
+            from adgm_rag_tool import get_embeddings
+            embeddings = get_embeddings()
+        except Exception as e:
+            print(f"⚠️ Embeddings unavailable for context packing: {e}")
+            embeddings = None
+        
+        with span("context.pack", files=len(documents), token_budget=self.token_budget) as s:
+            packed = pack_documents(documents, self.token_budget, findings, embeddings)
+            s.set(tokens_used=packed["tokens_used"], chunks_omitted=packed["chunks_omitted"])
+        
+        print(f"📦 Packed {len(documents)} files into {packed['tokens_used']}/{self.token_budget} tokens "
+              f"({packed['chunks_omitted']} chunks omitted, {packed['duplicates_removed']} duplicates removed)")
+        
+        for filename, result in file_contents.items():
+            if result["status"] != "success":
+                packed["file_contents"][filename] = result
+        
+        return dict(packed, files_read=len(documents), total_files=total_files, status="success")
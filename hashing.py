@@ -0,0 +1,17 @@
+"""
+Content hashes of files.
+
+The regulation index (adgm_rag_tool.py) tracks which regulation files changed
+by their hash, and the run ledger (run_ledger.py) keys recorded results by the
+hash of each submitted file.
+"""
+import hashlib
+
+
+def file_sha256(file_path: str) -> str:
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,104 @@
+"""
+Configuration for the ADGM RAG pipeline.
+
+Defaults live in DEFAULT_RAG_CONFIG. A JSON file with the same shape can
+override any subset of keys; it is read from the path in the ADGM_RAG_CONFIG
+environment variable, or from rag_config.json in the working directory.
+"""
+import copy
+import json
+import os
+from typing import Dict, Any
+
+DEFAULT_RAG_CONFIG: Dict[str, Any] = {
+    "db_path": "db",
+    "documents_path": "./rag_docs",
+    "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
+    # "huggingface" (PyTorch), "onnx" or "onnx-int8" (ONNX Runtime, no torch import), see embedding_backends.py.
+    # Changing to or between the ONNX backends re-embeds the corpus.
+    "embedding": {
+        "backend": "huggingface",
+        "batch_size": 32,
+        "threads": 0,
+        "onnx_file": None,
+        "max_length": 256,
+    },
+    # "section" cuts the regulation PDFs at part/article/section headings (see regulation_splitter),
+    # "character" is the plain fixed-size splitter. Changing any value re-ingests the corpus.
+    "splitter": {
+        "strategy": "section",
+        "max_chars": 1500,
+        "min_chars": 200,
+        "overlap": 150,
+    },
+    # Corpus build (build_index.py). The tool only opens the index `python build_index.py` built;
+    # with auto_build it syncs rag_docs/ itself on first use instead.
+    "index": {
+        "auto_build": False,
+        # PDF extraction processes, 0 means one per CPU
+        "workers": 0,
+        "embed_batch_size": 64,
+        "write_batch_size": 256,
+    },
+    # "chroma", or "numpy": a memory-mapped matrix in <db_path>/vector_index that opens in milliseconds
+    # and is shared by every worker process (see vector_index.py). "float16" halves the file but
+    # pays a conversion on every query, worth it only for large corpora.
+    "vector_store": {
+        "backend": "chroma",
+        "dtype": "float32",
+    },
+    "retriever": {
+        # "hybrid" fuses BM25 and vector rankings with reciprocal rank fusion, "mmr" is vector-only MMR
+        "mode": "hybrid",
+        "k": 4,
+        "fetch_k": 20,
+        "lambda_mult": 0.5,
+        "rrf_k": 60,
+    },
+    # Regulation PDFs relevant to each document type, matched as case-insensitive filename substrings.
+    # ADGMRAGTool restricts retrieval to these files when called with document_type.
+    "source_document_types": {
+        "Articles of Association": ["model-articles", "AmendmentArticles"],
+        "Memorandum of Association": ["model-articles", "incorporate"],
+        "Board Resolution": ["resolution"],
+        "Shareholder Resolution": ["SHReso", "resolution-multiple"],
+        "Incorporation Application": ["incorporate"],
+        "Register of Members": ["model-articles", "incorporate"],
+        "Register of Directors": ["model-articles", "incorporate"],
+        "Employment Contract": ["Employment Contract"],
+        "Data Protection Policy": ["DPR"],
+    },
+    # Upper bound on concurrent LLM calls made by ADGMRAGTool.run_batch
+    "llm_max_concurrency": 4,
+    "answer_cache": {
+        "enabled": True,
+        # None keeps it next to the index, <db_path>/answer_cache.sqlite
+        "path": None,
+        "ttl_seconds": 7 * 24 * 3600,
+        "max_entries": 2000,
+        # Cosine similarity above which a differently worded query reuses an answer,
+        # None keeps the cache exact-match only
+        "similarity_threshold": None,
+    },
+}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Recursively merge override into a copy of base"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_rag_config(path: str = None) -> Dict[str, Any]:
+    """Return the defaults merged with the optional JSON override file"""
+    path = path or os.getenv("ADGM_RAG_CONFIG", "rag_config.json")
+    if not os.path.exists(path):
+        return copy.deepcopy(DEFAULT_RAG_CONFIG)
+    
+    with open(path, "r", encoding="utf-8") as f:
+        return _merge(DEFAULT_RAG_CONFIG, json.load(f))
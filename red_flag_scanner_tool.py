@@ -0,0 +1,329 @@
+from crewai.tools import BaseTool
+from typing import Dict, Any, List, Optional, Tuple
+from document_store import get_document_store
+from file_classifier_tool import score_document, best_document_type
+from tracing import current_span, traced_tool
+import asyncio
+import os
+import re
+import workspace
+
+SEVERITY_ORDER = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+
+# Beneficial ownership disclosure threshold (Beneficial Ownership and Control Regulations 2022)
+BENEFICIAL_OWNERSHIP_THRESHOLD = 25.0
+
+# Document types that must carry a signature block / an execution date
+SIGNED_DOCUMENT_TYPES = {
+    "Articles of Association",
+    "Memorandum of Association",
+    "Board Resolution",
+    "Incorporation Application",
+}
+DATED_DOCUMENT_TYPES = {
+    "Board Resolution",
+    "Register of Members",
+    "Register of Directors",
+    "Incorporation Application",
+}
+REGISTER_TYPES = {"Register of Members", "Register of Directors"}
+
+_MONTHS = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+
+# Every line of every document is scanned once with this single alternation,
+# each named group is one rule (or a marker used by the document-level checks)
+_LINE_PATTERNS = {
+    "federal_courts": r"\b(?:uae|u\.a\.e\.?|united arab emirates)\s+federal\s+courts?\b|\bfederal\s+courts?\s+of\s+the\s+(?:uae|united arab emirates)\b",
+    "onshore_courts": r"\b(?:dubai|difc|abu dhabi(?!\s+global\s+market))\s+courts?\b",
+    "federal_law": r"\b(?:uae|united arab emirates)\s+(?:federal\s+(?:law|jurisdiction)|commercial\s+companies\s+law)\b|\bfederal\s+law\s+no\.?\s*\d+",
+    "registered_office": r"\bregistered\s+office\b",
+    "signature_blank": r"\bsignature\s*:?\s*(?:_{3,}|\.{5,})",
+    "signature": r"\bsign(?:ed|ature|atory|atories)\b|\bexecuted\b|/s/",
+    "date_blank": r"\bdate[d]?\s*:?\s*(?:_{3,}|\.{5,}|\[[^\]]*\]|dd/mm/yyyy)",
+    "date": r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b|\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?" + _MONTHS + r",?\s+\d{4}\b|\b" + _MONTHS + r"\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b",
+    "beneficial_owner": r"\bbeneficial(?:ly)?\s+own(?:er|ers|ership)\b|\bultimate\s+beneficial\b|\bubo\b",
+}
+_LINE_MATCHER = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _LINE_PATTERNS.items()), re.IGNORECASE)
+
+_NON_ADGM_LOCATION = re.compile(
+    r"\b(?:dubai|difc|dubai\s+international\s+financial\s+centre|sharjah|ajman|jafza|jebel\s+ali|ras\s+al\s+khaimah|fujairah|umm\s+al\s+quwain)\b",
+    re.IGNORECASE,
+)
+_ADGM_LOCATION = re.compile(r"\badgm\b|abu\s+dhabi\s+global\s+market|al\s+maryah|al\s+reem", re.IGNORECASE)
+_PERCENT = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_SIGNATURE_MARK = re.compile(r"\[[^\]]*signature[^\]]*\]|\bsigned\b|/s/", re.IGNORECASE)
+# "Sarah Johnson     Date: 15/03/2024", a signatory line in an execution block
+_SIGNATORY_LINE = re.compile(r"^\s*(?P<name>[A-Z][a-z]+(?:\s+[A-Z][a-z'-]+)+)\s{2,}.*\bdate\s*:", re.IGNORECASE)
+_KEY_VALUE = re.compile(r"^\s*(?P<key>[A-Za-z][A-Za-z .%()]*?)\s*:\s*(?P<value>.+?)\s*$")
+# "Shareholder 1: James Wilson - 15,000 shares (60%)" or "- Sarah Johnson: 37,500 shares (50%)"
+_INLINE_HOLDING = re.compile(
+    r"^[-•*\s]*(?:(?:shareholder|member|subscriber)\s*\d*\s*:\s*)?"
+    r"(?P<name>[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)+)\s*[-:–]\s*"
+    r"(?P<shares>\d[\d,]*)\s+(?:ordinary\s+)?shares(?:\s*\((?P<pct>\d{1,3}(?:\.\d+)?)\s*%\))?",
+    re.IGNORECASE,
+)
+
+# Rules triggered directly by a line match: (rule_id, severity, title, regulation hint)
+_LINE_RULES = {
+    "federal_courts": ("JURISDICTION_FEDERAL_COURTS", "CRITICAL",
+                       "Reference to UAE Federal Courts instead of ADGM Courts",
+                       "ADGM Companies Regulations 2020; ADGM Courts have exclusive jurisdiction"),
+    "onshore_courts": ("JURISDICTION_ONSHORE_COURTS", "CRITICAL",
+                       "Reference to onshore or DIFC courts instead of ADGM Courts",
+                       "ADGM Companies Regulations 2020; ADGM Courts have exclusive jurisdiction"),
+    "federal_law": ("GOVERNING_LAW_NOT_ADGM", "HIGH",
+                    "Governing law or incorporation framework is UAE federal law, not ADGM regulations",
+                    "ADGM Companies Regulations 2020"),
+    "signature_blank": ("SIGNATURE_BLANK", "HIGH",
+                        "Signature line present but not completed",
+                        "Execution requirements for ADGM corporate documents"),
+    "date_blank": ("DATE_BLANK", "MEDIUM",
+                   "Date field present but not completed",
+                   "Execution requirements for ADGM corporate documents"),
+}
+
+
+def _finding(rule_id: str, severity: str, title: str, regulation: str,
+             location: Optional[Dict[str, Any]] = None, excerpt: str = "",
+             needs_review: bool = False) -> Dict[str, Any]:
+    return {
+        "rule_id": rule_id,
+        "severity": severity,
+        "title": title,
+        "regulation_hint": regulation,
+        "location": location,
+        "excerpt": excerpt[:300],
+        "needs_review": needs_review,
+    }
+
+
+def _document_lines(entry: Dict[str, Any]) -> List[Tuple[Dict[str, Any], str]]:
+    """(location, text) for every non-empty body paragraph and table row"""
+    lines = [({"paragraph": i}, text) for i, text in enumerate(entry["paragraphs"]) if text]
+    for t, rows in enumerate(entry["tables"]):
+        for r, cells in enumerate(rows):
+            text = " | ".join(cell for cell in cells if cell)
+            if text:
+                lines.append(({"table": t, "row": r}, text))
+    return lines
+
+
+def _to_number(text: str) -> Optional[float]:
+    match = _NUMBER.search(text)
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+def _to_percentage(text: str) -> Optional[float]:
+    match = _PERCENT.search(text)
+    return float(match.group(1)) if match else _to_number(text)
+
+
+def _with_percentages(parsed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Derive missing percentages from share counts and drop rows with neither"""
+    total_shares = sum(p["shares"] for p in parsed if p["shares"])
+    for p in parsed:
+        if p["percentage"] is None and p["shares"] and total_shares:
+            p["percentage"] = round(100.0 * p["shares"] / total_shares, 2)
+    return [p for p in parsed if p["percentage"] is not None]
+
+
+def _table_holdings(t: int, rows: List[List[str]]) -> List[Dict[str, Any]]:
+    """Holdings from a table whose header has a name column and a percentage or share count column"""
+    if len(rows) < 2:
+        return []
+    header = [cell.lower() for cell in rows[0]]
+    name_col = next((i for i, h in enumerate(header) if "name" in h or "member" in h or "shareholder" in h), None)
+    pct_col = next((i for i, h in enumerate(header) if "%" in h or "percent" in h), None)
+    shares_col = next((i for i, h in enumerate(header) if "share" in h and i not in (name_col, pct_col)), None)
+    if name_col is None or (pct_col is None and shares_col is None):
+        return []
+    
+    parsed = []
+    for r, cells in enumerate(rows[1:], start=1):
+        if name_col >= len(cells) or not cells[name_col] or cells[name_col].lower().startswith("total"):
+            continue
+        percentage = _to_percentage(cells[pct_col]) if pct_col is not None and pct_col < len(cells) else None
+        shares = _to_number(cells[shares_col]) if shares_col is not None and shares_col < len(cells) else None
+        parsed.append({"holder": cells[name_col], "percentage": percentage, "shares": shares,
+                       "location": {"table": t, "row": r}})
+    return _with_percentages(parsed)
+
+
+def _paragraph_holdings(paragraphs: List[str]) -> List[Dict[str, Any]]:
+    """
+    Holdings from register entries written as paragraphs, either key/value blocks
+    ("Name: ...", "Number of Shares: ...", "Percentage: ...") or inline lines
+    ("James Wilson - 15,000 shares (60%)").
+    """
+    parsed = []
+    current = None
+    for i, text in enumerate(paragraphs):
+        inline = _INLINE_HOLDING.match(text)
+        if inline:
+            parsed.append({
+                "holder": inline.group("name").strip(),
+                "percentage": float(inline.group("pct")) if inline.group("pct") else None,
+                "shares": _to_number(inline.group("shares")),
+                "location": {"paragraph": i},
+            })
+            current = None
+            continue
+        
+        pair = _KEY_VALUE.match(text)
+        if not pair:
+            continue
+        key, value = pair.group("key").lower(), pair.group("value")
+        if key == "name":
+            current = {"holder": value, "percentage": None, "shares": None, "location": {"paragraph": i}}
+            parsed.append(current)
+        elif current is not None and ("percent" in key or "%" in key):
+            current["percentage"] = _to_percentage(value)
+        elif current is not None and "share" in key:
+            current["shares"] = _to_number(value)
+    
+    return _with_percentages([p for p in parsed if p["percentage"] is not None or p["shares"] is not None])
+
+
+def parse_register_holdings(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every (holder, percentage) found in a register's tables and paragraphs"""
+    holdings = []
+    for t, rows in enumerate(entry["tables"]):
+        holdings.extend(_table_holdings(t, rows))
+    holdings.extend(_paragraph_holdings(entry["paragraphs"]))
+    return holdings
+
+
+def scan_document(filename: str, entry: Dict[str, Any], document_type: Optional[str] = None) -> Dict[str, Any]:
+    """Run every rule over one parsed document and return its located findings"""
+    if document_type is None:
+        document_type = best_document_type(score_document(filename, " ".join(entry["paragraphs"][:10])))
+
+    findings = []
+    seen = set()
+    office_locations = set()
+    lines = _document_lines(entry)
+
+    for n, (location, text) in enumerate(lines):
+        for match in _LINE_MATCHER.finditer(text):
+            kind = match.lastgroup
+            seen.add(kind)
+
+            if kind in _LINE_RULES:
+                rule_id, severity, title, regulation = _LINE_RULES[kind]
+                findings.append(_finding(rule_id, severity, title, regulation, location, text))
+
+            elif kind == "registered_office":
+                # The address often follows on the next lines ("... established at:")
+                for address_location, address in lines[n:n + 3]:
+                    if not _NON_ADGM_LOCATION.search(address) or str(address_location) in office_locations:
+                        continue
+                    office_locations.add(str(address_location))
+                    # A line naming both an ADGM and a non-ADGM place needs a human (or LLM) look
+                    findings.append(_finding(
+                        "REGISTERED_OFFICE_NOT_ADGM", "CRITICAL",
+                        "Registered office located outside ADGM",
+                        "ADGM Companies Regulations 2020; registered office must be in ADGM",
+                        address_location, address, needs_review=bool(_ADGM_LOCATION.search(address)),
+                    ))
+
+        if document_type in SIGNED_DOCUMENT_TYPES:
+            signatory = _SIGNATORY_LINE.match(text)
+            if signatory and not _SIGNATURE_MARK.search(text):
+                findings.append(_finding(
+                    "SIGNATURE_MISSING_FOR_SIGNATORY", "CRITICAL",
+                    f"{signatory.group('name')} is listed in the execution block without a signature",
+                    "Execution requirements for ADGM corporate documents",
+                    location, text, needs_review=True,
+                ))
+
+    if document_type in SIGNED_DOCUMENT_TYPES and not seen & {"signature", "signature_blank"}:
+        findings.append(_finding(
+            "SIGNATURE_MISSING", "CRITICAL", f"No signature block found in {document_type}",
+            "Execution requirements for ADGM corporate documents",
+        ))
+
+    if document_type in DATED_DOCUMENT_TYPES and not seen & {"date", "date_blank"}:
+        findings.append(_finding(
+            "DATE_MISSING", "HIGH", f"No date found in {document_type}",
+            "Execution and register maintenance requirements",
+        ))
+
+    if document_type in REGISTER_TYPES and "beneficial_owner" not in seen:
+        significant = [h for h in parse_register_holdings(entry)
+                       if h["percentage"] >= BENEFICIAL_OWNERSHIP_THRESHOLD]
+        for holding in significant:
+            findings.append(_finding(
+                "BENEFICIAL_OWNERSHIP_UNDISCLOSED", "HIGH",
+                f"{holding['holder']} holds {holding['percentage']:g}% (25%+ threshold) "
+                "without a beneficial ownership disclosure",
+                "Beneficial Ownership and Control Regulations 2022",
+                holding["location"], holding["holder"],
+            ))
+        if not significant:
+            # Without parseable holdings we cannot tell whether a disclosure is required
+            findings.append(_finding(
+                "BENEFICIAL_OWNERSHIP_NOT_STATED", "HIGH",
+                f"{document_type} has no beneficial ownership disclosure",
+                "Beneficial Ownership and Control Regulations 2022",
+                needs_review=True,
+            ))
+
+    findings.sort(key=lambda f: SEVERITY_ORDER.index(f["severity"]))
+    return {"document_type": document_type, "findings": findings}
+
+
+class ADGMRedFlagScannerTool(BaseTool):
+    name: str = "ADGM Red Flag Scanner"
+    description: str = (
+        "Deterministic scan of every document in the documents directory for mechanical red flags "
+        "(UAE Federal Court references, non-ADGM registered office, missing signatures or dates, "
+        "undisclosed 25%+ beneficial ownership). Returns located candidate findings with severity; "
+        "findings marked needs_review are ambiguous and should be confirmed against the document. "
+        "Pass filename to scan a single document."
+    )
+
+    @traced_tool
+    def _run(self, filename: Optional[str] = None) -> Dict[str, Any]:
+        return self._scan(filename)
+
+    @traced_tool
+    async def _arun(self, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant, the scan runs in a worker thread"""
+        return await asyncio.to_thread(self._scan, filename)
+
+    def _scan(self, filename: Optional[str] = None) -> Dict[str, Any]:
+        documents_dir = workspace.documents_dir()
+        if not os.path.exists(documents_dir):
+            return {
+                "error": f"Directory '{documents_dir}' does not exist",
+                "status": "error"
+            }
+
+        store = get_document_store()
+        results = {}
+        summary = dict.fromkeys(SEVERITY_ORDER, 0)
+
+        docx_files = sorted(f for f in os.listdir(documents_dir) if f.endswith('.docx'))
+        if filename:
+            docx_files = [f for f in docx_files if f == os.path.basename(filename)]
+
+        for name in docx_files:
+            try:
+                result = scan_document(name, store.get(os.path.join(documents_dir, name)))
+            except Exception as e:
+                results[name] = {"error": str(e), "status": "error"}
+                continue
+
+            for finding in result["findings"]:
+                summary[finding["severity"]] += 1
+            results[name] = dict(result, status="success")
+            print(f"🚩 Scanned: {name} ({len(result['findings'])} findings)")
+
+        current_span().set(findings=sum(summary.values()))
+        return {
+            "findings_by_file": results,
+            "severity_summary": summary,
+            "files_scanned": len(results),
+            "status": "success" if results else "error"
+        }
@@ -0,0 +1,220 @@
+"""
+Precomputed, cited requirement digests per document type.
+
+For each document type the classifier recognises, the compliance questions
+the Red Flag Analyzer would otherwise ask through ADGMRAGTool on every run
+are answered once against the regulation corpus. The answers, with citations
+(document, section, page) of the chunks they were drawn from, are stored in
+db/regulation_digests.json next to the vector store. A digest records the
+corpus version and the question set it was built from: rebuilding only
+touches digests whose corpus or questions changed, and lookups report a stale
+digest instead of returning it.
+
+Usage:
+    python regulation_digest.py [--type "Board Resolution" ...] [--force]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+DIGEST_FILENAME = "regulation_digests.json"
+
+GENERAL_QUERIES = [
+    "What are the complete ADGM compliance requirements for {doc_type}?",
+    "What court jurisdiction requirements apply to ADGM {doc_type}?",
+    "What are the signature and execution requirements for ADGM {doc_type}?",
+    "What mandatory clauses must be included in ADGM {doc_type}?",
+]
+
+SPECIFIC_QUERIES = {
+    "Articles of Association": [
+        "What jurisdiction and governing law clauses are required in ADGM Articles?",
+        "What director powers and shareholder rights must be specified in ADGM Articles?",
+    ],
+    "Memorandum of Association": [
+        "What objects and powers clauses are mandatory in ADGM Memorandum?",
+        "What share capital information must be included in ADGM Memorandum?",
+    ],
+    "Board Resolution": [
+        "What director appointment procedures are required in ADGM?",
+        "What authorization requirements apply to ADGM board resolutions?",
+    ],
+    "Register of Directors": [
+        "What beneficial ownership disclosure requirements apply to ADGM registers?",
+        "What updating and maintenance requirements apply to ADGM registers?",
+    ],
+    "Register of Members": [
+        "What beneficial ownership disclosure requirements apply to ADGM registers?",
+        "What updating and maintenance requirements apply to ADGM registers?",
+    ],
+    "Incorporation Application": [
+        "What information must an ADGM incorporation application contain?",
+        "Who must sign an ADGM incorporation application and which documents must accompany it?",
+    ],
+}
+
+# Any change to the question set gives every digest a new version
+DIGEST_VERSION = hashlib.sha256(
+    json.dumps([GENERAL_QUERIES, SPECIFIC_QUERIES], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, Any] = {"path": None, "mtime": None, "digests": {}}
+
+
+def digest_queries(document_type: str) -> List[str]:
+    return [q.format(doc_type=document_type) for q in GENERAL_QUERIES] + SPECIFIC_QUERIES.get(document_type, [])
+
+
+def digest_path(config: Optional[Dict[str, Any]] = None) -> str:
+    from rag_config import load_rag_config
+    config = config or load_rag_config()
+    return os.path.join(config["db_path"], DIGEST_FILENAME)
+
+
+def _load_digests(path: str) -> Dict[str, Any]:
+    """Digests by document type, re-read only when the file changed"""
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return {}
+    with _cache_lock:
+        if _cache["path"] != path or _cache["mtime"] != mtime:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    digests = json.load(f).get("digests", {})
+            except (OSError, ValueError):
+                digests = {}
+            _cache.update(path=path, mtime=mtime, digests=digests)
+        return _cache["digests"]
+
+
+def _save_digests(path: str, digests: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"digests": digests}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _citations(context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Distinct document/section/page references of an answer's context chunks, in rank order"""
+    citations, seen = [], set()
+    for metadata in context:
+        citation = {
+            "document": metadata.get("document") or os.path.basename(metadata.get("source", "")),
+            "section": metadata.get("section") or "",
+            "section_title": metadata.get("section_title") or "",
+            "page": metadata.get("page"),
+        }
+        key = (citation["document"], citation["section"], citation["page"])
+        if key not in seen:
+            seen.add(key)
+            citations.append(citation)
+    return citations
+
+
+def build_digest(tool, document_type: str) -> Optional[Dict[str, Any]]:
+    """Answer the digest questions for one document type, or None if any answer failed"""
+    from adgm_rag_tool import ADGMRAGTool
+
+    queries = digest_queries(document_type)
+    answers = tool.run_batch(queries, document_type=document_type)
+    failed = [a for a in answers if a["status"] != "success"]
+    if failed:
+        print(f"⚠️ {document_type}: {len(failed)} of {len(queries)} questions failed ({failed[0].get('error')})")
+        return None
+
+    sources = tool.resolve_sources(document_type=document_type)
+
+    return {
+        "document_type": document_type,
+        "corpus_version": ADGMRAGTool._corpus_version,
+        "digest_version": DIGEST_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sources": sources or ADGMRAGTool._indexed_files,
+        "requirements": [
+            {"question": query, "answer": answer["answer"], "citations": _citations(answer["context"])}
+            for query, answer in zip(queries, answers)
+        ],
+    }
+
+
+def build_digests(document_types: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+    """Build missing or outdated digests, returning {document_type: built/current/failed}"""
+    from adgm_rag_tool import ADGMRAGTool
+    from file_classifier_tool import DOCUMENT_TYPES
+
+    tool = ADGMRAGTool()
+    tool._ensure_pipeline()
+    path = digest_path()
+    digests = dict(_load_digests(path))
+
+    outcome = {}
+    for document_type in document_types or DOCUMENT_TYPES:
+        entry = digests.get(document_type)
+        if (not force and entry
+                and entry["corpus_version"] == ADGMRAGTool._corpus_version
+                and entry["digest_version"] == DIGEST_VERSION):
+            outcome[document_type] = "current"
+            continue
+
+        print(f"📚 Building digest: {document_type}")
+        entry = build_digest(tool, document_type)
+        if entry is None:
+            outcome[document_type] = "failed"
+            continue
+        digests[document_type] = entry
+        # Saved after every type so an interrupted build keeps what it finished
+        _save_digests(path, digests)
+        outcome[document_type] = "built"
+
+    return outcome
+
+
+def lookup_digest(document_type: str) -> Dict[str, Any]:
+    """The current digest for a document type, or a status telling the caller to query the RAG tool"""
+    from adgm_rag_tool import current_corpus_version
+    from rag_config import load_rag_config
+
+    config = load_rag_config()
+    digests = _load_digests(digest_path(config))
+    entry = next((d for t, d in digests.items() if t.lower() == (document_type or "").strip().lower()), None)
+    if entry is None:
+        return {
+            "status": "not_found",
+            "document_type": document_type,
+            "available_types": sorted(digests),
+            "message": "No digest for this document type, query the ADGM Regulations RAG Tool instead."
+        }
+
+    if entry["corpus_version"] != current_corpus_version(config) or entry["digest_version"] != DIGEST_VERSION:
+        return {
+            "status": "stale",
+            "document_type": entry["document_type"],
+            "message": "The regulations changed since this digest was built, query the ADGM Regulations RAG Tool instead."
+        }
+
+    return dict(entry, status="success")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--type", dest="types", action="append", help="document type to build, may be repeated (default: all)")
+    parser.add_argument("--force", action="store_true", help="rebuild digests even if they are current")
+    args = parser.parse_args()
+
+    outcome = build_digests(args.types, args.force)
+    for document_type, status in outcome.items():
+        print(f"  {status:<8} {document_type}")
+    print(f"📝 Digests: {digest_path()}")
+    if "failed" in outcome.values():
+        raise SystemExit(f"{sum(1 for s in outcome.values() if s == 'failed')} digest(s) failed to build")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from crewai.tools import BaseTool
+from typing import Dict, Any
+from regulation_digest import lookup_digest
+from tracing import traced_tool
+import asyncio
+
+
+class RegulationDigestTool(BaseTool):
+    name: str = "ADGM Regulation Digest"
+    description: str = (
+        "Returns the precomputed ADGM requirements for a document type (e.g. 'Board Resolution'): "
+        "answers to the standard compliance questions with regulation citations, in one fast lookup. "
+        "If it reports no current digest, query the ADGM Regulations RAG Tool instead."
+    )
+    
+    @traced_tool
+    def _run(self, document_type: str) -> Dict[str, Any]:
+        return lookup_digest(document_type)
+    
+    @traced_tool
+    async def _arun(self, document_type: str) -> Dict[str, Any]:
+        """Async variant, the file read runs in a worker thread"""
+        return await asyncio.to_thread(lookup_digest, document_type)
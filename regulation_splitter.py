@@ -0,0 +1,170 @@
+"""
+Section-aware splitting of the ADGM regulation PDFs.
+
+PDF pages are re-joined and cut at PART / Article / Section / numbered clause
+headings instead of every 400 characters, so a chunk holds a whole provision
+where possible. Sections shorter than min_chars are merged into the following
+one and sections longer than max_chars are cut into line-aligned windows with
+a small overlap. Every chunk carries document, part, section, section_title,
+page and chunk metadata for citations and filtering.
+"""
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+_PART_HEADING = re.compile(r"^(?:PART|Part)\s+(\d+[A-Z]?)\b[\s.:-]*(.*)$")
+_NAMED_HEADING = re.compile(r"^(?:ARTICLE|Article|SECTION|Section|SCHEDULE|Schedule|REGULATION|Regulation)\s+(\d+[A-Z]?)\b[\s.:-]*(.*)$")
+# "12. Directors' general authority" or "12 Quorum", short and without a closing full stop
+_NUMBERED_HEADING = re.compile(r"^(\d{1,3}[A-Z]?)\.?\s+([A-Z][^\n]{0,90})$")
+
+
+def splitter_fingerprint(settings: Dict[str, Any]) -> str:
+    """Stable string for the splitter settings, part of the corpus version"""
+    return json.dumps(settings, sort_keys=True)
+
+
+def _match_heading(line: str) -> Optional[Tuple[str, str, str]]:
+    """(kind, number, title) if the line opens a part or section"""
+    match = _PART_HEADING.match(line)
+    if match:
+        return "part", match.group(1), match.group(2).strip()
+    match = _NAMED_HEADING.match(line)
+    if match:
+        return "section", f"{line.split()[0].title()} {match.group(1)}", match.group(2).strip()
+    match = _NUMBERED_HEADING.match(line)
+    if match and not line.endswith(('.', ';', ',')):
+        return "section", match.group(1), match.group(2).strip()
+    return None
+
+
+def _sections(pages: List[Any]) -> List[Dict[str, Any]]:
+    """Group the lines of all pages into sections, remembering where each starts"""
+    sections = []
+    part = ""
+    current = {"part": "", "section": "", "title": "", "page": 1, "lines": []}
+
+    for page in pages:
+        page_number = int(page.metadata.get("page", 0)) + 1
+        for line in page.page_content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            heading = _match_heading(line)
+            if heading:
+                kind, number, title = heading
+                if kind == "part":
+                    part = f"Part {number}"
+                if current["lines"]:
+                    sections.append(current)
+                current = {
+                    "part": part,
+                    "section": number if kind == "section" else "",
+                    "title": title,
+                    "page": page_number,
+                    "lines": [],
+                }
+            current["lines"].append(line)
+
+    if current["lines"]:
+        sections.append(current)
+    return sections
+
+
+def _join(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """One section spanning both, labelled with the range of section numbers it covers"""
+    start = first["section"].split("-")[0]
+    end = second["section"].split("-")[-1]
+    if start and end and start != end:
+        label = f"{start}-{end}"
+    else:
+        label = start or end
+    return {
+        "part": first["part"] if first["section"] else second["part"],
+        "section": label,
+        "title": first["title"] if first["section"] else second["title"],
+        "page": first["page"],
+        "lines": first["lines"] + second["lines"],
+    }
+
+
+def _merge_small(sections: List[Dict[str, Any]], min_chars: int) -> List[Dict[str, Any]]:
+    """Fold sections shorter than min_chars (bare headings, stray lines) into the next one"""
+    merged = []
+    carry = None
+    for section in sections:
+        if carry:
+            section = _join(carry, section)
+            carry = None
+        if sum(len(line) + 1 for line in section["lines"]) < min_chars:
+            carry = section
+        else:
+            merged.append(section)
+
+    if carry:
+        if merged:
+            merged[-1] = _join(merged[-1], carry)
+        else:
+            merged.append(carry)
+    return merged
+
+
+def _windows(lines: List[str], max_chars: int, overlap: int) -> List[str]:
+    """Cut a long section into line-aligned windows of at most max_chars"""
+    windows, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            windows.append("\n".join(current))
+            # Carry the trailing lines that fit in the overlap into the next window
+            tail, tail_size = [], 0
+            for previous in reversed(current):
+                if tail_size + len(previous) + 1 > overlap:
+                    break
+                tail.insert(0, previous)
+                tail_size += len(previous) + 1
+            current, size = tail, tail_size
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        windows.append("\n".join(current))
+    return windows
+
+
+def split_regulation_pages(pages: List[Any], filename: str, settings: Dict[str, Any]) -> List[Any]:
+    """Split the loaded pages of one file into section chunks with metadata"""
+    from langchain_core.documents import Document
+
+    chunks = []
+    for section in _merge_small(_sections(pages), settings["min_chars"]):
+        for i, text in enumerate(_windows(section["lines"], settings["max_chars"], settings["overlap"])):
+            chunks.append(Document(
+                page_content=text,
+                metadata={
+                    "source": filename,
+                    "document": filename,
+                    "part": section["part"],
+                    "section": section["section"],
+                    "section_title": section["title"],
+                    "page": section["page"],
+                    "chunk": i,
+                },
+            ))
+    return chunks
+
+
+def split_documents(pages: List[Any], filename: str, settings: Dict[str, Any]) -> List[Any]:
+    """Split loaded pages with the configured strategy ("section" or "character")"""
+    if settings["strategy"] == "section":
+        return split_regulation_pages(pages, filename, settings)
+
+    from langchain.text_splitter import CharacterTextSplitter
+
+    texts = CharacterTextSplitter(
+        chunk_size=settings["max_chars"],
+        chunk_overlap=settings["overlap"],
+        separator="\n"
+    ).split_documents(pages)
+    for text in texts:
+        text.metadata["document"] = filename
+        text.metadata["page"] = int(text.metadata.get("page", 0)) + 1
+    return texts
@@ -1,30 +1,73 @@
 from crewai.tools import BaseTool
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from hashing import file_sha256
+from tracing import traced_tool
+import asyncio
+import json
 import os
+import threading
+import run_ledger
+import workspace
+
+# Corrections applied so far per (output dir, filename, document hash), so a resend of
+# not_found items builds on the earlier edits instead of replacing them
+_applied_corrections: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+_applied_lock = threading.Lock()
 
 class SimpleFileWriterTool(BaseTool):
     name: str = "Simple File Writer Tool"
-    description: str = "Opens/creates file and writes content - that's it"
+    description: str = (
+        "Writes output files. To correct a document pass filename (the original DOCX name) and "
+        "corrections, a list of {old, new, reason, severity} edits: they are applied to the original "
+        "DOCX with formatting preserved, severity highlights and comments, producing "
+        "CORRECTED_<filename> and <name>_corrections.json. Without corrections, writes content as-is "
+        "(e.g. the JSON report)."
+    )
     
-    def _run(self, filename: str, content: str) -> Dict[str, Any]:
+    @traced_tool
+    def _run(self, filename: str, content: str = "",
+             corrections: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Simple file writer - open/create/write
         Args:
             filename: Name of file (e.g., "AOA.docx" or "AOA.txt")
             content: Text content to write
+            corrections: {old, new, reason, severity} edits to apply to the original DOCX instead
         """
-        
+        return self._write(filename, content, corrections)
+    
+    @traced_tool
+    async def _arun(self, filename: str, content: str = "",
+                    corrections: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Async variant, the write runs in a worker thread"""
+        return await asyncio.to_thread(self._write, filename, content, corrections)
+    
+    def _write(self, filename: str, content: str = "",
+               corrections: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         # Create corrected_files directory
-        output_dir = os.path.join(os.getcwd(), "corrected_documents")
+        output_dir = workspace.output_dir()
         os.makedirs(output_dir, exist_ok=True)
         
+        if corrections:
+            return self._apply_corrections(output_dir, filename, corrections)
+        
         # Full file path
+        filename = os.path.basename(filename)
         file_path = os.path.join(output_dir, filename)
+        tmp_path = file_path + '.tmp'
         
         try:
-            # Open -> Create -> Write
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            if filename.endswith('.docx'):
+                # Word files must be real DOCX packages, one paragraph per line
+                from docx import Document
+                document = Document()
+                for line in content.splitlines():
+                    document.add_paragraph(line)
+                document.save(tmp_path)
+            else:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            os.replace(tmp_path, file_path)
             
             print(f"✅ Written: {filename}")
             
@@ -34,10 +77,100 @@ class SimpleFileWriterTool(BaseTool):
                 "path": file_path,
                 "content_length": len(content)
             }
-            
+        
         except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return {
-                "status": "error", 
+                "status": "error",
                 "filename": filename,
                 "error": str(e)
             }
+    
+    def _apply_corrections(self, output_dir: str, filename: str, corrections: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply the edits to the original document and write CORRECTED_<name> plus its JSON report"""
+        from docx_rewriter import apply_corrections
+        
+        source_name = os.path.basename(filename)
+        if source_name.startswith("CORRECTED_"):
+            source_name = source_name[len("CORRECTED_"):]
+        source_path = os.path.join(workspace.documents_dir(), source_name)
+        output_name = f"CORRECTED_{source_name}"
+        
+        if not os.path.exists(source_path):
+            return {
+                "status": "error",
+                "filename": source_name,
+                "error": f"Original document '{source_name}' not found"
+            }
+        
+        sha256 = file_sha256(source_path)
+        with _applied_lock:
+            earlier = _applied_corrections.get((output_dir, source_name, sha256), [])
+        corrections = earlier + [c for c in corrections if c not in earlier]
+        
+        try:
+            result = apply_corrections(source_path, corrections, os.path.join(output_dir, output_name))
+            
+            report_path = os.path.join(output_dir, f"{os.path.splitext(source_name)[0]}_corrections.json")
+            with open(report_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+            os.replace(report_path + '.tmp', report_path)
+        except Exception as e:
+            return {
+                "status": "error",
+                "filename": source_name,
+                "error": str(e)
+            }
+        
+        applied = [c for c, r in zip(corrections, result["corrections"]) if r["status"] == "applied"]
+        with _applied_lock:
+            _applied_corrections[(output_dir, source_name, sha256)] = applied
+        
+        # Unchanged resubmissions replay these instead of going through the rewriter again
+        ledger = run_ledger.get_run_ledger()
+        if ledger is not None:
+            ledger.put("corrections", source_name, sha256, {"corrections": applied},
+                       run_ledger.corpus_version(), run_ledger.prompt_version())
+        
+        print(f"✅ Corrected: {output_name} ({result['applied']} applied, {result['not_found']} not found)")
+        
+        return {
+            "status": "success",
+            "filename": output_name,
+            "path": result["output"],
+            "corrections_report": report_path,
+            "applied": result["applied"],
+            # The agent can resend these with the exact wording from the document
+            "not_found": [c["old"] for c in result["corrections"] if c["status"] == "not_found"]
+        }
+    
+    def replay_corrections(self, filename: str, corpus_version: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Apply the corrections recorded for an unchanged document, or None when the ledger has none"""
+        ledger = run_ledger.get_run_ledger()
+        source_path = os.path.join(workspace.documents_dir(), os.path.basename(filename))
+        if ledger is None or not os.path.exists(source_path):
+            return None
+        
+        recorded = ledger.get("corrections", filename, file_sha256(source_path), corpus_version, prompt_version)
+        if not recorded or not recorded["corrections"]:
+            return None
+        
+        output_dir = workspace.output_dir()
+        os.makedirs(output_dir, exist_ok=True)
+        return self._apply_corrections(output_dir, filename, recorded["corrections"])
+
+
+def reset_document_outputs(filename: str):
+    """Forget the corrections accumulated for a document and remove its previous outputs before it is rewritten again"""
+    output_dir = workspace.output_dir()
+    source_name = os.path.basename(filename)
+    source_path = os.path.join(workspace.documents_dir(), source_name)
+    if os.path.exists(source_path):
+        with _applied_lock:
+            _applied_corrections.pop((output_dir, source_name, file_sha256(source_path)), None)
+    
+    for name in (f"CORRECTED_{source_name}", f"{os.path.splitext(source_name)[0]}_corrections.json"):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
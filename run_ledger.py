@@ -0,0 +1,163 @@
+"""
+Content-addressed ledger of per-document results across runs.
+
+Every result is keyed by the stage that produced it, the submitted file's name
+and the SHA-256 of its bytes (hashing.file_sha256), the regulation corpus
+version and the prompt version. The name is part of the key because it steers
+classification, and so everything after it. A resubmitted package therefore
+reuses the classification, red-flag analysis and corrections of every file
+whose name and bytes are unchanged, and only changed files reach the LLMs
+again. Editing a regulation PDF, the splitter settings or any agent/task
+prompt changes one of the versions, so nothing stale is reused.
+
+Stages:
+    classification  classifier entry for one file (prompt version of the classifier rules and prompt)
+    analysis        red-flag analysis report for one file (async pipeline)
+    package         crew output for a whole package (sequential pipeline)
+    corrections     correction list the rewriter applied to one file
+
+The ledger is a SQLite file (.cache/run_ledger.sqlite, or ADGM_RUN_LEDGER) so
+batch workers can share it. ADGM_RUN_LEDGER=off disables it.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+LEDGER_PATH = os.path.join(".cache", "run_ledger.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content_sha256 TEXT NOT NULL,
+    corpus_version TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_content ON results (content_sha256);
+"""
+
+# Set by crew.py from the agent and task definitions it runs with
+_prompt_version = ""
+
+
+def prompt_fingerprint(*texts: str) -> str:
+    """Short hash of prompt texts, any edit gives a new version"""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(str(text or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def set_prompt_version(version: str):
+    global _prompt_version
+    _prompt_version = version
+
+
+def prompt_version() -> str:
+    return _prompt_version
+
+
+def corpus_version() -> str:
+    """Version of the regulation corpus, without loading the RAG pipeline"""
+    from adgm_rag_tool import current_corpus_version
+    return current_corpus_version()
+
+
+def package_fingerprint(file_hashes: Dict[str, str]) -> str:
+    """Hash of a whole package: every filename with its content hash"""
+    digest = hashlib.sha256()
+    for filename in sorted(file_hashes):
+        digest.update(f"|{filename}:{file_hashes[filename]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RunLedger:
+    """SQLite store of stage results keyed by filename, content hash, corpus version and prompt version"""
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection so several processes can share the ledger file"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(stage: str, filename: str, content_sha256: str, corpus_version: str, prompt_version: str) -> str:
+        return hashlib.sha256(
+            f"{stage}|{os.path.basename(filename)}|{content_sha256}|{corpus_version}|{prompt_version}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, stage: str, filename: str, content_sha256: str,
+            corpus_version: str = "", prompt_version: str = "") -> Optional[Any]:
+        """The stored result, or None when this file was never processed with these versions"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM results WHERE key = ?",
+                (self._key(stage, filename, content_sha256, corpus_version, prompt_version),)
+            ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def put(self, stage: str, filename: str, content_sha256: str, result: Any,
+            corpus_version: str = "", prompt_version: str = ""):
+        """Record a result, replacing any earlier one for the same key"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, stage, filename, content_sha256, corpus_version, "
+                "prompt_version, result, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(stage, filename, content_sha256, corpus_version, prompt_version), stage, filename,
+                 content_sha256, corpus_version, prompt_version, json.dumps(result), time.time())
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT stage, COUNT(*) AS n FROM results GROUP BY stage").fetchall()
+        return {row["stage"]: row["n"] for row in rows}
+
+
+_default_ledger: Optional[RunLedger] = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_run_ledger() -> Optional[RunLedger]:
+    """Process-wide ledger, or None when ADGM_RUN_LEDGER=off"""
+    global _default_ledger
+    path = os.getenv("ADGM_RUN_LEDGER", LEDGER_PATH)
+    if path.lower() == "off":
+        return None
+    with _default_ledger_lock:
+        if _default_ledger is None or _default_ledger.path != path:
+            _default_ledger = RunLedger(path)
+        return _default_ledger
+
+
+def unchanged_files(ledger: Optional[RunLedger], stage: str, file_hashes: Dict[str, str],
+                    corpus: str, prompt: str) -> Dict[str, Any]:
+    """Stored results for the files whose name and content were already processed with these versions"""
+    if ledger is None:
+        return {}
+    found = {}
+    for filename, sha256 in file_hashes.items():
+        result = ledger.get(stage, filename, sha256, corpus, prompt)
+        if result is not None:
+            found[filename] = result
+    return found
+
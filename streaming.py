@@ -0,0 +1,69 @@
+"""
+Token streaming from the crew's agents.
+
+stream_tokens(callback, agents) switches the agents' LLMs to streaming for the
+enclosed block and forwards every chunk CrewAI emits (LLMStreamChunkEvent on
+its event bus) to callback(agent_role, text). The Streamlit UI, or the
+--stream flag of crew.py, uses it to show answers while they are generated
+instead of after each gpt-4o call finishes.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, List
+
+TokenCallback = Callable[[str, str], None]
+
+_callbacks: List[TokenCallback] = []
+_lock = threading.Lock()
+_listening = False
+
+
+def _event_bus():
+    """CrewAI's event bus and stream chunk event, wherever this CrewAI version keeps them"""
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        from crewai.utilities.events import crewai_event_bus
+        from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+    return crewai_event_bus, LLMStreamChunkEvent
+
+
+def _ensure_listener():
+    """Register one bus handler per process, it fans out to the active callbacks"""
+    global _listening
+    with _lock:
+        if _listening:
+            return
+        bus, chunk_event = _event_bus()
+
+        @bus.on(chunk_event)
+        def _forward(source: Any, event: Any):
+            with _lock:
+                callbacks = list(_callbacks)
+            role = getattr(event, "agent_role", None) or getattr(getattr(source, "agent", None), "role", "") or ""
+            for callback in callbacks:
+                try:
+                    callback(role, event.chunk)
+                except Exception as e:
+                    print(f"⚠️ Token callback failed: {e}")
+
+        _listening = True
+
+
+@contextmanager
+def stream_tokens(callback: TokenCallback, agents: List[Any]):
+    """Stream the agents' LLM output to callback(agent_role, text) while the block runs"""
+    _ensure_listener()
+    llms = [agent.llm for agent in agents if hasattr(agent.llm, "stream")]
+    previous = [llm.stream for llm in llms]
+    for llm in llms:
+        llm.stream = True
+    with _lock:
+        _callbacks.append(callback)
+    try:
+        yield
+    finally:
+        with _lock:
+            _callbacks.remove(callback)
+        for llm, stream in zip(llms, previous):
+            llm.stream = stream
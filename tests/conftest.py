@@ -0,0 +1,176 @@
+"""
+Shared fixtures for the smoke tests.
+
+crewai and langchain are heavy and need API keys, so when they are not
+installed a minimal stand-in is registered instead. The BaseTool stand-in is a
+pydantic model like crewai's, so class-level tool state behaves as it does in
+production. The RAG pipeline fixture builds a small NumPy vector index
+(vector_index.py) and replaces the embedding model and the LLM chain with
+deterministic fakes, everything else runs the real code.
+"""
+import asyncio
+import json
+import os
+import sys
+import types
+import zlib
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+def _stub_module(name: str, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+try:
+    import crewai.tools  # noqa: F401
+except ImportError:
+    from pydantic import BaseModel
+
+    class BaseTool(BaseModel):
+        name: str
+        description: str
+
+        def run(self, *args, **kwargs):
+            return self._run(*args, **kwargs)
+
+    _stub_module("crewai")
+    _stub_module("crewai.tools", BaseTool=BaseTool)
+
+try:
+    import langchain_core.documents  # noqa: F401
+except ImportError:
+    class Document:
+        def __init__(self, page_content: str, metadata=None):
+            self.page_content = page_content
+            self.metadata = metadata or {}
+
+    _stub_module("langchain_core")
+    _stub_module("langchain_core.documents", Document=Document)
+
+REGULATION_CHUNKS = [
+    ("Every company must have a registered office in the Abu Dhabi Global Market.", "Section 8"),
+    ("The ADGM Courts have exclusive jurisdiction over disputes under these Articles.", "Section 12"),
+    ("A board resolution must be signed by every director present at the meeting.", "Section 20"),
+    ("The register of members records the name and address of every shareholder.", "Section 33"),
+]
+
+
+class FakeEmbeddings:
+    """Deterministic bag-of-words vectors, so related texts land close together"""
+
+    dim = 64
+
+    def embed_query(self, text):
+        vector = [0.001] * self.dim
+        for word in text.lower().split():
+            vector[zlib.crc32(word.strip(".,?").encode("utf-8")) % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class FakeDocumentChain:
+    """Answers from the first retrieved chunk, in place of the stuff-documents chain and gpt-4o-mini"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _answer(self, item):
+        self.calls += 1
+        context = item["context"]
+        return f"Per {context[0].metadata['section']}: {context[0].page_content}" if context else "No context"
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        return [self._answer(item) for item in inputs]
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        await asyncio.sleep(0)
+        return [self._answer(item) for item in inputs]
+
+
+@pytest.fixture
+def rag_pipeline(tmp_path, monkeypatch):
+    """A prebuilt NumPy index plus fake embeddings and LLM chain; yields the fake chain"""
+    import adgm_rag_tool
+    from adgm_rag_tool import ADGMRAGTool
+    from hashing import file_sha256
+    from rag_config import DEFAULT_RAG_CONFIG, _merge
+    from vector_index import NumpyCollection
+
+    config = _merge(DEFAULT_RAG_CONFIG, {
+        "db_path": str(tmp_path / "db"),
+        "documents_path": str(tmp_path / "rag_docs"),
+        "vector_store": {"backend": "numpy"},
+        "index": {"auto_build": False},
+        "answer_cache": {"enabled": False},
+    })
+    config_path = tmp_path / "rag_config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.setenv("ADGM_RAG_CONFIG", str(config_path))
+    monkeypatch.setenv("OPEN_AI_KEY", "test")
+
+    # The regulation file and the index built from it, as build_index.py leaves them
+    os.makedirs(config["documents_path"])
+    regulation_path = os.path.join(config["documents_path"], "companies-regulations.txt")
+    with open(regulation_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(text for text, _ in REGULATION_CHUNKS))
+
+    embeddings = FakeEmbeddings()
+    collection = NumpyCollection(adgm_rag_tool._vector_index_path(config))
+    ids = [f"companies-regulations.txt:test:{i}" for i in range(len(REGULATION_CHUNKS))]
+    collection.upsert(
+        ids,
+        embeddings.embed_documents([text for text, _ in REGULATION_CHUNKS]),
+        [text for text, _ in REGULATION_CHUNKS],
+        [{"document": "companies-regulations.txt", "section": section} for _, section in REGULATION_CHUNKS],
+    )
+    collection.flush()
+
+    stat = os.stat(regulation_path)
+    files = {"companies-regulations.txt": {
+        "sha256": file_sha256(regulation_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "chunk_ids": ids,
+    }}
+    settings = adgm_rag_tool._ingest_settings(config)
+    adgm_rag_tool._save_manifest(adgm_rag_tool._manifest_path(config), {
+        "version": 1,
+        "files": files,
+        "ingest_settings": settings,
+        "corpus_version": adgm_rag_tool._corpus_version(files, settings),
+    })
+
+    # Stand-ins for the LLM stack _setup_rag_pipeline imports
+    chain = FakeDocumentChain()
+
+    class ChatPromptTemplate:
+        @staticmethod
+        def from_template(template):
+            return template
+
+    monkeypatch.setitem(sys.modules, "langchain_openai", types.ModuleType("langchain_openai"))
+    sys.modules["langchain_openai"].ChatOpenAI = lambda **kwargs: object()
+    monkeypatch.setitem(sys.modules, "langchain_core.prompts", types.ModuleType("langchain_core.prompts"))
+    sys.modules["langchain_core.prompts"].ChatPromptTemplate = ChatPromptTemplate
+    for name in ("langchain", "langchain.chains", "langchain.chains.combine_documents"):
+        if name not in sys.modules:
+            monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setattr(sys.modules["langchain.chains.combine_documents"], "create_stuff_documents_chain",
+                        lambda llm, prompt: chain, raising=False)
+    monkeypatch.setattr(adgm_rag_tool, "get_embeddings", lambda *args, **kwargs: embeddings)
+
+    # The class defaults are what the tests check against, put them back afterwards
+    for attr in ("_vectorstore", "_document_chain", "_initialized", "_config",
+                 "_corpus_version", "_answer_cache", "_bm25_index", "_indexed_files"):
+        monkeypatch.setattr(ADGMRAGTool, attr, getattr(ADGMRAGTool, attr))
+
+    yield chain
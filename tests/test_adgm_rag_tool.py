@@ -0,0 +1,94 @@
+import asyncio
+
+from adgm_rag_tool import ADGMRAGTool
+
+
+def test_run_builds_pipeline_and_answers(rag_pipeline):
+    assert ADGMRAGTool._initialized is False
+    result = ADGMRAGTool()._run(query="Which courts have jurisdiction over the Articles?")
+
+    assert result["status"] == "success", result
+    assert "ADGM Courts" in result["answer"]
+    assert ADGMRAGTool._initialized is True
+    assert isinstance(ADGMRAGTool._config, dict)
+    assert ADGMRAGTool._indexed_files == ["companies-regulations.txt"]
+
+
+def test_pipeline_is_shared_between_instances(rag_pipeline):
+    ADGMRAGTool()._run(query="registered office")
+    chain = ADGMRAGTool._document_chain
+
+    result = ADGMRAGTool()._run(queries=["registered office", "board resolution signature"])
+
+    assert result["status"] == "success"
+    assert ADGMRAGTool._document_chain is chain
+    assert rag_pipeline.calls == 3
+
+
+def test_arun_with_document_type_filter(rag_pipeline):
+    result = asyncio.run(ADGMRAGTool()._arun(
+        query="Who must sign a board resolution?", document_type="Board Resolution"
+    ))
+
+    # No regulation file matches the Board Resolution patterns here, so the whole index is searched
+    assert result["status"] == "success", result
+    assert "board resolution" in result["answer"]
+
+
+def test_each_backend_has_its_own_manifest(rag_pipeline):
+    import adgm_rag_tool
+    from rag_config import load_rag_config
+
+    config = load_rag_config()
+    chroma = dict(config, vector_store=dict(config["vector_store"], backend="chroma"))
+
+    assert adgm_rag_tool._manifest_path(chroma) != adgm_rag_tool._manifest_path(config)
+    # Only the NumPy index was built, so Chroma must not look in sync
+    assert adgm_rag_tool.current_corpus_version(chroma) != adgm_rag_tool.current_corpus_version(config)
+
+
+def test_answer_cache_follows_answer_settings_and_db_path():
+    import copy
+
+    import adgm_rag_tool
+    from rag_config import DEFAULT_RAG_CONFIG
+
+    config = copy.deepcopy(DEFAULT_RAG_CONFIG)
+    changed_k = copy.deepcopy(config)
+    changed_k["retriever"]["k"] += 1
+
+    assert adgm_rag_tool._answer_settings(config) != adgm_rag_tool._answer_settings(changed_k)
+    config["db_path"] = "/srv/adgm/db"
+    assert adgm_rag_tool.answer_cache_path(config) == "/srv/adgm/db/answer_cache.sqlite"
+
+
+def test_cached_answers_keep_the_context_they_were_built_from(rag_pipeline, tmp_path, monkeypatch):
+    from answer_cache import AnswerCache
+
+    tool = ADGMRAGTool()
+    tool._ensure_pipeline()
+    monkeypatch.setattr(ADGMRAGTool, "_answer_cache", AnswerCache(str(tmp_path / "answers.sqlite")))
+
+    fresh = tool.run_batch(["Which courts have jurisdiction?"])[0]
+    cached = tool.run_batch(["Which courts have jurisdiction?"])[0]
+
+    assert fresh["cached"] is False and cached["cached"] is True
+    assert fresh["context"] and cached["context"] == fresh["context"]
+    assert fresh["context"][0]["document"] == "companies-regulations.txt"
+
+
+def test_missing_index_points_to_build_command_without_building(rag_pipeline, monkeypatch):
+    import shutil
+    import sys
+
+    import adgm_rag_tool
+    from rag_config import load_rag_config
+
+    shutil.rmtree(load_rag_config()["db_path"])
+    monkeypatch.delitem(sys.modules, "build_index", raising=False)
+
+    result = ADGMRAGTool()._run(query="registered office")
+
+    assert result["status"] == "error" and "python build_index.py" in result["error"]
+    assert not hasattr(adgm_rag_tool, "ingest_files")
+    assert "build_index" not in sys.modules
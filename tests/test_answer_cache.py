@@ -0,0 +1,37 @@
+import sqlite3
+
+from answer_cache import AnswerCache
+
+
+def test_exact_and_semantic_hits(tmp_path):
+    cache = AnswerCache(str(tmp_path / "cache.sqlite"), similarity_threshold=0.95)
+    cache.put("Who signs a board resolution?", "v1", "Every director present", [1.0, 0.0, 0.0])
+    cache.put("Where is the registered office?", "v1", "In ADGM", [0.0, 1.0, 0.0])
+
+    assert cache.get("who signs a board resolution", "v1")["answer"] == "Every director present"
+    assert cache.get("Board resolution signatories?", "v1", [0.99, 0.05, 0.0])["answer"] == "Every director present"
+    assert cache.get("Board resolution signatories?", "v1", [0.7, 0.7, 0.0]) is None
+    assert cache.get("Board resolution signatories?", "v2", [0.99, 0.05, 0.0]) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_embeddings_are_stored_as_float32_blobs(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = AnswerCache(path, similarity_threshold=0.9)
+    cache.put("query", "v1", "answer", [3.0, 4.0])
+    # A JSON row left by an earlier version is ignored rather than breaking lookups
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO answers (key, corpus_version, query, answer, embedding, created_at, last_used) "
+                     "VALUES ('old', 'v1', 'old', 'old answer', '[0.6, 0.8]', 1e12, 1e12)")
+        stored = conn.execute("SELECT embedding FROM answers WHERE key != 'old'").fetchone()[0]
+
+    assert isinstance(stored, bytes) and len(stored) == 8
+    assert cache.get("other wording", "v1", [0.6, 0.8])["answer"] == "answer"
+
+
+def test_answers_keep_their_context(tmp_path):
+    cache = AnswerCache(str(tmp_path / "cache.sqlite"))
+    context = [{"document": "companies-regulations.txt", "section": "Section 20"}]
+    cache.put("Who signs a board resolution?", "v1", "Every director present", context=context)
+
+    assert cache.get("Who signs a board resolution?", "v1") == {"answer": "Every director present", "context": context}
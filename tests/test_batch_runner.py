@@ -0,0 +1,46 @@
+import asyncio
+import types
+
+import workspace
+from batch_runner import JobQueue, _run_job
+
+
+def _job(tmp_path, queue):
+    (tmp_path / "client").mkdir(exist_ok=True)
+    queue.submit(str(tmp_path / "client"), str(tmp_path / "out"))
+    return queue.claim("test-worker")
+
+
+def test_sync_job_runs_through_crew_main(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job = _job(tmp_path, queue)
+    seen = []
+
+    def main():
+        seen.append((workspace.documents_dir(), workspace.output_dir()))
+        return "report"
+
+    result = _run_job(types.SimpleNamespace(main=main), job, None, 4)
+
+    assert seen == [(job["documents_dir"], job["output_dir"])]
+    assert "crew_output.md" in result["output_files"]
+    with open(f"{job['output_dir']}/crew_output.md", encoding="utf-8") as f:
+        assert f.read() == "report"
+
+
+def test_async_jobs_share_the_worker_loop(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    loops = []
+
+    async def run_async(max_concurrency):
+        loops.append(asyncio.get_running_loop())
+        return f"report {len(loops)}"
+
+    loop = asyncio.new_event_loop()
+    try:
+        for _ in range(2):
+            _run_job(types.SimpleNamespace(run_async=run_async), _job(tmp_path, queue), loop, 2)
+    finally:
+        loop.close()
+
+    assert loops == [loop, loop]
@@ -0,0 +1,91 @@
+import math
+
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+CORPUS = [
+    ("art-12", "The registered office of the company must be in ADGM.", "companies.pdf"),
+    ("bo-3", "Beneficial ownership: every beneficial owner holding 25 percent is recorded.", "ownership.pdf"),
+    ("art-12.3", "Section 12.3 sets the quorum for board meetings of directors.", "companies.pdf"),
+    ("art-13", "A change of registered office is notified to the Registrar; the registered office "
+               "appears on the register of companies and every registered office change is recorded.",
+     "companies.pdf"),
+]
+
+
+def _index():
+    return BM25Index([i for i, _, _ in CORPUS], [t for _, t, _ in CORPUS], [{"document": d} for _, _, d in CORPUS])
+
+
+def _ranking(index, query, limit=10, allowed=None):
+    return [index.ids[i] for i, _ in index.search(query, limit, allowed)]
+
+
+def test_tokenize_drops_stopwords_and_keeps_section_numbers():
+    assert tokenize("What does Section 12.3 of the Regulations say?") == ["section", "12.3", "regulations", "say"]
+
+
+def test_term_frequency_ranks_first():
+    assert _ranking(_index(), "registered office") == ["art-13", "art-12"]
+
+
+def test_rare_terms_outweigh_common_ones():
+    # "adgm" is in one chunk, "recorded" in two
+    assert _ranking(_index(), "adgm recorded") == ["art-12", "bo-3", "art-13"]
+
+
+def test_shorter_chunk_wins_at_equal_term_frequency():
+    index = BM25Index(["long", "short"], ["quorum " + "board meeting " * 10, "quorum board"], [{}, {}])
+
+    assert _ranking(index, "quorum") == ["short", "long"]
+
+
+def test_score_matches_okapi_formula():
+    index = _index()
+    (position, score), = index.search("quorum", 5)
+
+    tokens = len(tokenize(CORPUS[2][1]))
+    average = sum(len(tokenize(text)) for _, text, _ in CORPUS) / len(CORPUS)
+    idf = math.log(1 + (4 - 1 + 0.5) / (1 + 0.5))
+    expected = idf * 2.5 / (1 + 1.5 * (1 - 0.75 + 0.75 * tokens / average))
+    assert index.ids[position] == "art-12.3"
+    assert math.isclose(score, expected)
+
+
+def test_dotted_section_numbers_match_exactly():
+    assert _ranking(_index(), "12.3") == ["art-12.3"]
+
+
+def test_search_limit_and_source_filter():
+    index = _index()
+
+    assert _ranking(index, "registered office", limit=1) == ["art-13"]
+    assert _ranking(index, "registered office beneficial", allowed=index.allowed(["ownership.pdf"])) == ["bo-3"]
+    assert index.allowed(None) is None
+
+
+def test_from_collection():
+    class Collection:
+        def get(self, include):
+            return {"ids": [i for i, _, _ in CORPUS], "documents": [t for _, t, _ in CORPUS],
+                    "metadatas": [None] * len(CORPUS)}
+
+    index = BM25Index.from_collection(Collection())
+
+    assert _ranking(index, "registered office") == ["art-13", "art-12"]
+    assert index.metadatas[0] == {}
+
+
+def test_reciprocal_rank_fusion_order():
+    vector = ["art-12", "art-13", "bo-3"]
+    keyword = ["art-13", "art-12.3", "art-12"]
+
+    # art-13: 1/62 + 1/61, art-12: 1/61 + 1/63, art-12.3: 1/62, bo-3: 1/63
+    assert reciprocal_rank_fusion([vector, keyword]) == ["art-13", "art-12", "art-12.3", "bo-3"]
+
+
+def test_reciprocal_rank_fusion_rrf_k_sets_how_much_rank_matters():
+    rankings = [["x", "p", "q", "y"], ["z", "r", "s", "y"]]
+
+    # A small rrf_k lets a single first place beat two fourth places, a large one does not
+    assert reciprocal_rank_fusion(rankings, rrf_k=1)[:2] == ["x", "z"]
+    assert reciprocal_rank_fusion(rankings, rrf_k=60)[0] == "y"
@@ -0,0 +1,19 @@
+import os
+
+import adgm_rag_tool
+from build_index import remove_index
+from rag_config import load_rag_config
+
+
+def test_rebuild_removes_only_the_vector_store(rag_pipeline):
+    config = load_rag_config()
+    kept = [os.path.join(config["db_path"], name) for name in ("answer_cache.sqlite", "regulation_digests.json")]
+    for path in kept:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+
+    remove_index(config)
+
+    assert not os.path.exists(adgm_rag_tool._vector_index_path(config))
+    assert not os.path.exists(adgm_rag_tool._manifest_path(config))
+    assert all(os.path.exists(path) for path in kept)
@@ -0,0 +1,45 @@
+from context_packer import pack_documents
+
+SIGNATURE_BLOCK = "Signed for and on behalf of the Company\nDirector"
+
+
+def test_identical_documents_are_both_kept():
+    register = "\n".join([
+        "REGISTER OF MEMBERS",
+        "Member 1: Robert Singh, Apartment 12A, Corniche Towers, Abu Dhabi, 60,000 shares entered 15 March 2024",
+        "Member 2: Maria Santos, Villa 23, Yas Island, Abu Dhabi, 40,000 shares entered 15 March 2024",
+        "BENEFICIAL OWNERSHIP DISCLOSURE:",
+        "Robert Singh is the ultimate beneficial owner of 60% through a direct shareholding, nationality Indian",
+        "Maria Santos is the ultimate beneficial owner of 40% through a direct shareholding, nationality Brazilian",
+    ])
+
+    packed = pack_documents({"register_of_directors.docx": register, "register_of_members.docx": register}, 10000)
+
+    assert packed["duplicates_removed"] == 0
+    assert packed["file_contents"]["register_of_directors.docx"]["content"] == \
+        packed["file_contents"]["register_of_members.docx"]["content"]
+    assert "Maria Santos" in packed["file_contents"]["register_of_members.docx"]["content"]
+
+
+def test_repeated_boilerplate_is_kept_once():
+    documents = {
+        "board_resolution.docx": f"RESOLUTION OF THE BOARD\nThe directors resolved to open a bank account.\n{SIGNATURE_BLOCK}",
+        "articles_of_association.docx": f"ARTICLES OF ASSOCIATION\nThe ADGM Courts have jurisdiction.\n{SIGNATURE_BLOCK}",
+    }
+    documents = {name: text.replace("\nSigned", "\n1. EXECUTION\nSigned") for name, text in documents.items()}
+
+    packed = pack_documents(documents, 10000)
+
+    assert packed["duplicates_removed"] == 1
+    assert "Signed for and on behalf" in packed["file_contents"]["board_resolution.docx"]["content"]
+    assert "Signed for and on behalf" not in packed["file_contents"]["articles_of_association.docx"]["content"]
+
+
+def test_chunks_with_findings_are_never_deduplicated():
+    text = "TITLE\nSome opening text.\n1. EXECUTION\nSigned in Dubai by the directors"
+    findings = {"b.docx": [{"excerpt": "Signed in Dubai"}]}
+
+    packed = pack_documents({"a.docx": text, "b.docx": text}, 10000, findings)
+
+    assert packed["duplicates_removed"] == 0
+    assert "Signed in Dubai" in packed["file_contents"]["b.docx"]["content"]
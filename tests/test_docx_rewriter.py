@@ -0,0 +1,95 @@
+import pytest
+
+from docx_rewriter import apply_corrections
+
+docx = pytest.importorskip("docx")
+
+
+def _save(document, tmp_path):
+    path = str(tmp_path / "source.docx")
+    document.save(path)
+    return path
+
+
+def _apply(tmp_path, document, corrections):
+    output = str(tmp_path / "output.docx")
+    result = apply_corrections(_save(document, tmp_path), corrections, output)
+    return result, docx.Document(output)
+
+
+def test_match_spanning_several_runs_keeps_first_run_formatting(tmp_path):
+    document = docx.Document()
+    paragraph = document.add_paragraph()
+    paragraph.add_run("Governed by the ")
+    paragraph.add_run("Compa").bold = True
+    paragraph.add_run("nies ")
+    paragraph.add_run("Act of 2020.")
+
+    result, output = _apply(tmp_path, document, [
+        {"old": "Companies Act", "new": "ADGM Companies Regulations 2020", "reason": "Wrong law", "severity": "HIGH"},
+    ])
+
+    assert result["corrections"][0]["occurrences"] == 1
+    runs = output.paragraphs[0].runs
+    assert output.paragraphs[0].text == "Governed by the ADGM Companies Regulations 2020 of 2020."
+    replaced = next(run for run in runs if run.text == "ADGM Companies Regulations 2020")
+    assert replaced.bold
+
+
+def test_only_whole_words_are_replaced(tmp_path):
+    document = docx.Document()
+    document.add_paragraph("This Contract is subject to the Act.")
+
+    result, output = _apply(tmp_path, document, [{"old": "Act", "new": "Regulations", "reason": "Wrong law"}])
+
+    assert result["corrections"][0]["occurrences"] == 1
+    assert output.paragraphs[0].text == "This Contract is subject to the Regulations."
+
+
+def test_matches_in_table_cells_and_headers(tmp_path):
+    document = docx.Document()
+    document.add_table(rows=1, cols=2).cell(0, 1).text = "Jurisdiction: Dubai Courts"
+    document.sections[0].header.paragraphs[0].text = "Disputes: Dubai Courts"
+
+    result, output = _apply(tmp_path, document, [
+        {"old": "Dubai Courts", "new": "ADGM Courts", "reason": "ADGM jurisdiction", "severity": "CRITICAL"},
+    ])
+
+    assert result["corrections"][0]["occurrences"] == 2
+    assert output.tables[0].cell(0, 1).text == "Jurisdiction: ADGM Courts"
+    # Comments cannot be anchored in headers, the reason follows as an inline note
+    assert output.sections[0].header.paragraphs[0].text == "Disputes: ADGM Courts [[CRITICAL] ADGM jurisdiction]"
+
+
+def test_earlier_replacements_are_not_rewritten(tmp_path):
+    document = docx.Document()
+    document.add_paragraph("Disputes go to the Dubai Courts.")
+
+    result, output = _apply(tmp_path, document, [
+        {"old": "Dubai Courts", "new": "ADGM Courts", "reason": "ADGM jurisdiction"},
+        {"old": "Courts", "new": "Tribunal", "reason": "Wording"},
+    ])
+
+    assert [c["status"] for c in result["corrections"]] == ["applied", "not_found"]
+    assert output.paragraphs[0].text == "Disputes go to the ADGM Courts."
+
+
+def test_comment_is_attached_to_the_rewritten_run(tmp_path):
+    from docx.enum.text import WD_COLOR_INDEX
+
+    document = docx.Document()
+    document.add_paragraph("Signed in Dubai.")
+
+    _, output = _apply(tmp_path, document, [
+        {"old": "Dubai", "new": "Abu Dhabi", "reason": "Execution in ADGM", "severity": "MEDIUM"},
+    ])
+
+    paragraph = output.paragraphs[0]
+    assert paragraph.text == "Signed in Abu Dhabi."
+    replaced = next(run for run in paragraph.runs if run.text == "Abu Dhabi")
+    assert replaced.font.highlight_color == WD_COLOR_INDEX.YELLOW
+    comments = list(output.comments)
+    assert [c.text for c in comments] == ["[MEDIUM] Execution in ADGM"]
+    # The comment range wraps exactly the replacement run
+    start = paragraph._p.xpath("./w:commentRangeStart")[0]
+    assert start.getnext() is replaced._r
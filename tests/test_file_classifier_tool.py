@@ -0,0 +1,134 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from file_classifier_tool import ADGMDocumentClassifierTool
+
+docx = pytest.importorskip("docx")
+
+
+class FakeGroqChain:
+    def __init__(self, answer):
+        self.answer = answer
+        self.inputs = []
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        self.inputs.extend(inputs)
+        return [types.SimpleNamespace(content=self.answer) for _ in inputs]
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        return self.batch(inputs, config, return_exceptions)
+
+
+@pytest.fixture
+def documents(tmp_path, monkeypatch):
+    """One document no filename or content rule recognises, so only the LLM can classify it"""
+    document = docx.Document()
+    document.add_paragraph("Minutes of the meeting held on 3 March.")
+    document.save(str(tmp_path / "scan_0001.docx"))
+
+    monkeypatch.setenv("ADGM_DOCUMENTS_DIR", str(tmp_path))
+    monkeypatch.setenv("ADGM_RUN_LEDGER", "off")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(ADGMDocumentClassifierTool, "_analysis_chain", ADGMDocumentClassifierTool._analysis_chain)
+    return tmp_path
+
+
+def _install_groq(monkeypatch, chat_groq):
+    class PromptTemplate:
+        def __init__(self, **kwargs):
+            pass
+
+        def __or__(self, llm):
+            return llm
+
+    monkeypatch.setitem(sys.modules, "langchain_groq", types.SimpleNamespace(ChatGroq=chat_groq))
+    monkeypatch.setitem(sys.modules, "langchain.prompts", types.SimpleNamespace(PromptTemplate=PromptTemplate))
+    if "langchain" not in sys.modules:
+        monkeypatch.setitem(sys.modules, "langchain", types.ModuleType("langchain"))
+
+
+def test_llm_fallback_classifies_unknown_document(documents, monkeypatch):
+    chain = FakeGroqChain("Board Resolution")
+    _install_groq(monkeypatch, lambda **kwargs: chain)
+    tool = ADGMDocumentClassifierTool(llm_cache_path=str(documents / "llm_cache.sqlite"))
+
+    entry = tool._run()["classified_documents"][0]
+
+    assert ADGMDocumentClassifierTool._analysis_chain is chain
+    assert entry["document_type"] == "Board Resolution"
+    assert entry["classification_source"] == "llm"
+    assert chain.inputs[0]["filename"] == "scan_0001.docx"
+
+
+def test_llm_fallback_failure_is_reported(documents, monkeypatch):
+    def chat_groq(**kwargs):
+        raise RuntimeError("Groq unavailable")
+    _install_groq(monkeypatch, chat_groq)
+    tool = ADGMDocumentClassifierTool(llm_cache_path=str(documents / "llm_cache.sqlite"))
+
+    report = asyncio.run(tool._arun())
+
+    entry = report["classified_documents"][0]
+    assert entry["document_type"] == "Unknown"
+    assert "Groq unavailable" in entry["llm_error"]
+    assert report["classification_errors"] == [{"filename": "scan_0001.docx", "error": entry["llm_error"]}]
+
+
+def test_ledger_does_not_reuse_classification_across_filenames(documents, monkeypatch):
+    monkeypatch.setenv("ADGM_RUN_LEDGER", str(documents / "run_ledger.sqlite"))
+    tool = ADGMDocumentClassifierTool(llm_cache_path=str(documents / "llm_cache.sqlite"))
+    scan = documents / "scan_0001.docx"
+
+    scan.rename(documents / "articles_of_association.docx")
+    first = tool._run()["classified_documents"][0]
+    (documents / "articles_of_association.docx").rename(documents / "board_resolution.docx")
+    renamed = tool._run()["classified_documents"][0]
+    (documents / "board_resolution.docx").rename(documents / "articles_of_association.docx")
+    resubmitted = tool._run()["classified_documents"][0]
+
+    assert first["document_type"] == "Articles of Association"
+    assert renamed["document_type"] == "Board Resolution"
+    assert renamed["classification_source"] != "ledger"
+    assert resubmitted["classification_source"] == "ledger"
+    assert resubmitted["document_type"] == "Articles of Association"
+
+
+def test_nested_keywords_are_all_counted():
+    from file_classifier_tool import KeywordMatcher, score_document
+
+    hits = KeywordMatcher(["articles", "articles of association", "application for", "incorporation application"]) \
+        .hits("Articles of Association, see the incorporation application.")
+    assert hits == {"articles", "articles of association", "incorporation application"}
+    assert KeywordMatcher(["incorporation application", "application for"]) \
+        .hits("Incorporation application for ADGM") == {"incorporation application", "application for"}
+
+    scores = score_document("scan.docx", "articles of association")
+    assert scores["Articles of Association"] == 1.0
+
+
+def test_first_filename_rule_wins_over_content():
+    from file_classifier_tool import best_document_type, score_document
+
+    # As in the old if-chain, aoa is checked before resolution whatever the content says
+    scores = score_document("aoa_resolution.docx", "board resolution resolved by the board of directors")
+    assert best_document_type(scores) == "Articles of Association"
+
+
+def test_llm_memo_is_versioned_by_prompt_and_model(documents, monkeypatch):
+    import file_classifier_tool
+
+    chain = FakeGroqChain("Board Resolution")
+    _install_groq(monkeypatch, lambda **kwargs: chain)
+    tool = ADGMDocumentClassifierTool(llm_cache_path=str(documents / "llm_cache.sqlite"))
+
+    tool._run()
+    memoized = tool._run()["classified_documents"][0]
+    monkeypatch.setattr(file_classifier_tool, "LLM_CLASSIFIER_VERSION", "edited prompt")
+    requeried = tool._run()["classified_documents"][0]
+
+    assert memoized["classification_source"] == "llm_cache"
+    assert requeried["classification_source"] == "llm"
+    assert len(chain.inputs) == 2
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from red_flag_scanner_tool import _LINE_MATCHER, ADGMRedFlagScannerTool, scan_document
+
+docx = pytest.importorskip("docx")
+
+DOCUMENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "documents")
+
+
+def _entry(paragraphs, tables=()):
+    return {"paragraphs": list(paragraphs), "tables": list(tables)}
+
+
+@pytest.mark.parametrize("line, rule", [
+    ("Disputes go to the UAE Federal Courts.", "federal_courts"),
+    ("the Federal Courts of the United Arab Emirates", "federal_courts"),
+    ("subject to the Dubai Courts", "onshore_courts"),
+    ("subject to the DIFC Courts", "onshore_courts"),
+    ("governed by UAE Federal Law", "federal_law"),
+    ("pursuant to Federal Law No. 2 of 2015", "federal_law"),
+    ("The registered office of the Company", "registered_office"),
+    ("Signature: ______", "signature_blank"),
+    ("Signed by the directors", "signature"),
+    ("Date: ________", "date_blank"),
+    ("Dated: dd/mm/yyyy", "date_blank"),
+    ("on 15/03/2024", "date"),
+    ("on the 1st day of March 2024", "date"),
+    ("on March 1, 2024", "date"),
+    ("No ultimate beneficial owner holds shares", "beneficial_owner"),
+])
+def test_each_rule_pattern_matches_its_line(line, rule):
+    assert [m.lastgroup for m in _LINE_MATCHER.finditer(line)] == [rule]
+
+
+@pytest.mark.parametrize("line", [
+    "ADGM Courts have exclusive jurisdiction",
+    "Abu Dhabi Global Market Courts",
+    "governed by the ADGM Companies Regulations 2020",
+    "The directors resolved to open a bank account",
+])
+def test_adgm_lines_match_no_rule(line):
+    assert list(_LINE_MATCHER.finditer(line)) == []
+
+
+def test_findings_carry_paragraph_and_table_row_locations():
+    entry = _entry(
+        ["Resolutions of the Board", "", "Disputes go to the UAE Federal Courts."],
+        [[["Director", "Signature"], ["Sarah Johnson", "Signature: ______"]]],
+    )
+
+    result = scan_document("notes.docx", entry, document_type="Other")
+
+    assert [(f["rule_id"], f["location"]) for f in result["findings"]] == [
+        ("JURISDICTION_FEDERAL_COURTS", {"paragraph": 2}),
+        ("SIGNATURE_BLANK", {"table": 0, "row": 1}),
+    ]
+    assert result["findings"][0]["excerpt"] == "Disputes go to the UAE Federal Courts."
+
+
+def test_registered_office_address_on_the_following_line():
+    entry = _entry(["The registered office of the Company is established at:",
+                    "Office 901, Dubai International Financial Centre, Dubai"])
+
+    (finding,) = scan_document("notes.docx", entry, document_type="Other")["findings"]
+
+    assert finding["rule_id"] == "REGISTERED_OFFICE_NOT_ADGM"
+    assert finding["location"] == {"paragraph": 1}
+    assert not finding["needs_review"]
+
+
+def test_sample_board_resolution_findings():
+    from document_store import parse_docx
+
+    entry = parse_docx(os.path.join(DOCUMENTS_DIR, "board_resolution.docx"))
+    result = scan_document("board_resolution.docx", entry)
+
+    assert result["document_type"] == "Board Resolution"
+    assert [(f["rule_id"], f["location"]) for f in result["findings"]] == [
+        ("REGISTERED_OFFICE_NOT_ADGM", {"paragraph": 23}),
+        ("JURISDICTION_FEDERAL_COURTS", {"paragraph": 43}),
+        ("SIGNATURE_MISSING_FOR_SIGNATORY", {"paragraph": 48}),
+        ("SIGNATURE_MISSING_FOR_SIGNATORY", {"paragraph": 50}),
+        ("SIGNATURE_MISSING_FOR_SIGNATORY", {"paragraph": 53}),
+    ]
+    assert all(f["severity"] == "CRITICAL" for f in result["findings"])
+    assert [f["title"].split(" is listed")[0] for f in result["findings"][2:]] == [
+        "Sarah Johnson", "Emma Thompson", "Amanda Wilson",
+    ]
+
+
+def test_tool_scans_a_single_file(monkeypatch):
+    monkeypatch.setenv("ADGM_DOCUMENTS_DIR", DOCUMENTS_DIR)
+
+    result = ADGMRedFlagScannerTool()._run(filename="board_resolution.docx")
+
+    assert result["status"] == "success" and result["files_scanned"] == 1
+    assert result["severity_summary"] == {"CRITICAL": 5, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
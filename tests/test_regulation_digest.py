@@ -0,0 +1,34 @@
+import os
+
+from regulation_digest import build_digests, digest_path, digest_queries, lookup_digest
+
+
+def test_build_digests_writes_cited_digest(rag_pipeline):
+    assert build_digests(["Board Resolution"]) == {"Board Resolution": "built"}
+    assert os.path.exists(digest_path())
+
+    digest = lookup_digest("board resolution")
+    assert digest["status"] == "success"
+    assert [r["question"] for r in digest["requirements"]] == digest_queries("Board Resolution")
+    assert all(r["answer"] and r["citations"] for r in digest["requirements"])
+    assert digest["requirements"][0]["citations"][0]["document"] == "companies-regulations.txt"
+
+
+def test_current_digests_are_not_rebuilt(rag_pipeline):
+    build_digests(["Board Resolution"])
+    calls = rag_pipeline.calls
+
+    assert build_digests(["Board Resolution"]) == {"Board Resolution": "current"}
+    assert rag_pipeline.calls == calls
+
+
+def test_digest_citations_reuse_the_answer_retrieval(rag_pipeline, monkeypatch):
+    from adgm_rag_tool import ADGMRAGTool
+
+    searches = []
+    search = ADGMRAGTool._search
+    monkeypatch.setattr(ADGMRAGTool, "_search", lambda self, *args: searches.append(args) or search(self, *args))
+
+    build_digests(["Board Resolution"])
+
+    assert len(searches) == 1
@@ -0,0 +1,85 @@
+import pytest
+from langchain_core.documents import Document
+
+from regulation_splitter import _match_heading, _sections, split_documents, split_regulation_pages
+
+SETTINGS = {"strategy": "section", "min_chars": 40, "max_chars": 400, "overlap": 60}
+
+PAGES = [
+    Document(page_content="\n".join([
+        "PART 2 - INCORPORATION",
+        "Article 12. Registered office",
+        "A company must at all times have a registered office in the Abu Dhabi Global Market.",
+        "",
+        "13 Change of registered office",
+        "A company may change the address of its registered office by notice to the Registrar.",
+    ]), metadata={"page": 0}),
+    Document(page_content="\n".join([
+        "14. Annual return",
+        "Every company must deliver an annual return to the Registrar within one month of the date.",
+    ]), metadata={"page": 1}),
+]
+
+
+@pytest.mark.parametrize("line, heading", [
+    ("PART 2 - INCORPORATION", ("part", "2", "INCORPORATION")),
+    ("Part 4A: Shares", ("part", "4A", "Shares")),
+    ("ARTICLE 7 Directors", ("section", "Article 7", "Directors")),
+    ("Schedule 1 - Model Articles", ("section", "Schedule 1", "Model Articles")),
+    ("12. Directors' general authority", ("section", "12", "Directors' general authority")),
+    ("13 Quorum", ("section", "13", "Quorum")),
+])
+def test_headings(line, heading):
+    assert _match_heading(line) == heading
+
+
+@pytest.mark.parametrize("line", [
+    "12. The directors may delegate any of their powers.",
+    "3 months after the date of incorporation;",
+    "(a) the name of the company",
+    "as set out in section 12 of these Regulations",
+])
+def test_clause_text_is_not_a_heading(line):
+    assert _match_heading(line) is None
+
+
+def test_sections_follow_headings_across_pages():
+    sections = _sections(PAGES)
+
+    assert [(s["part"], s["section"], s["title"], s["page"]) for s in sections] == [
+        ("Part 2", "", "INCORPORATION", 1),
+        ("Part 2", "Article 12", "Registered office", 1),
+        ("Part 2", "13", "Change of registered office", 1),
+        ("Part 2", "14", "Annual return", 2),
+    ]
+    assert sections[1]["lines"][0] == "Article 12. Registered office"
+
+
+def test_chunk_metadata():
+    chunks = split_regulation_pages(PAGES, "companies.pdf", SETTINGS)
+
+    # The bare PART heading is shorter than min_chars and is folded into Article 12
+    assert [chunk.metadata for chunk in chunks] == [
+        {"source": "companies.pdf", "document": "companies.pdf", "part": "Part 2", "section": "Article 12",
+         "section_title": "Registered office", "page": 1, "chunk": 0},
+        {"source": "companies.pdf", "document": "companies.pdf", "part": "Part 2", "section": "13",
+         "section_title": "Change of registered office", "page": 1, "chunk": 0},
+        {"source": "companies.pdf", "document": "companies.pdf", "part": "Part 2", "section": "14",
+         "section_title": "Annual return", "page": 2, "chunk": 0},
+    ]
+    assert chunks[0].page_content.startswith("PART 2 - INCORPORATION\nArticle 12. Registered office")
+
+
+def test_long_sections_are_cut_into_overlapping_windows():
+    clauses = [f"({i}) The company must keep the register at its registered office." for i in range(12)]
+    pages = [Document(page_content="\n".join(["20. Register of members"] + clauses), metadata={"page": 4})]
+
+    chunks = split_documents(pages, "companies.pdf", dict(SETTINGS, overlap=80))
+
+    assert len(chunks) > 1
+    assert [chunk.metadata["chunk"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(chunk.metadata["section"] == "20" and chunk.metadata["page"] == 5 for chunk in chunks)
+    assert all(len(chunk.page_content) <= SETTINGS["max_chars"] for chunk in chunks)
+    # The last line of each window opens the next one
+    for first, second in zip(chunks, chunks[1:]):
+        assert second.page_content.startswith(first.page_content.splitlines()[-1])
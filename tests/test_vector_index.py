@@ -0,0 +1,60 @@
+import numpy as np
+
+from vector_index import NumpyCollection, maximal_marginal_relevance
+
+
+def _vectors(*rows):
+    return np.array(rows, dtype=np.float32)
+
+
+def test_buffered_writes_are_applied_on_flush(tmp_path):
+    collection = NumpyCollection(str(tmp_path))
+    collection.upsert(["a", "b"], _vectors([1, 0, 0], [0, 1, 0]), ["A", "B"], [{"n": 1}, {"n": 2}])
+    collection.upsert(["c"], _vectors([0, 0, 1]), ["C"], [{"n": 3}])
+    collection.flush()
+    mapped = collection._matrix
+
+    # Update, delete and add in separate batches, nothing changes until flush
+    collection.upsert(["a"], _vectors([0, 1, 1]), ["A2"], [{"n": 4}])
+    collection.delete(["b"])
+    collection.upsert(["d"], _vectors([1, 1, 0]), ["D"], [{"n": 5}])
+    assert collection._matrix is mapped
+    assert collection.count() == 3
+
+    collection.flush()
+
+    reopened = NumpyCollection(str(tmp_path))
+    assert reopened.get()["ids"] == ["a", "c", "d"]
+    assert reopened.get(["a"])["documents"] == ["A2"]
+    result = reopened.query(_vectors([0, 1, 1]), n_results=2)
+    assert result["ids"][0][0] == "a"
+    assert reopened.query(_vectors([1, 0, 0]), n_results=1, where={"n": 5})["ids"] == [["d"]]
+
+
+def test_delete_then_upsert_again_keeps_the_row(tmp_path):
+    collection = NumpyCollection(str(tmp_path))
+    collection.upsert(["a"], _vectors([1, 0]), ["A"], [{}])
+    collection.flush()
+
+    collection.delete(["a"])
+    collection.upsert(["a"], _vectors([0, 1]), ["A2"], [{}])
+    collection.flush()
+
+    assert collection.get(include=["documents"]) == {"ids": ["a"], "documents": ["A2"]}
+
+
+def test_deleting_every_row_empties_the_index(tmp_path):
+    collection = NumpyCollection(str(tmp_path))
+    collection.upsert(["a"], _vectors([1, 0]), ["A"], [{}])
+    collection.flush()
+
+    collection.delete(["a"])
+    collection.flush()
+
+    assert NumpyCollection(str(tmp_path)).count() == 0
+    assert collection.query(_vectors([1, 0]), n_results=3)["ids"] == [[]]
+
+
+def test_mmr_prefers_diverse_candidates():
+    candidates = _vectors([1, 0], [0.99, 0.01], [0.6, 0.8])
+    assert maximal_marginal_relevance([1, 0], candidates, k=2, lambda_mult=0.3) == [0, 2]
@@ -0,0 +1,254 @@
+"""
+Lightweight tracing for tools, crew tasks and their expensive inner steps.
+
+Tracing is off unless ADGM_TRACE_FILE is set. When enabled every span is
+appended to that file as one JSON line shaped like an OpenTelemetry span
+(traceId, spanId, parentSpanId, name, start/end in unix nanoseconds,
+attributes, status), so the file can be inspected with jq or converted for
+an OTel collector.
+
+    with span("rag.search", queries=3):
+        ...
+
+    @traced_tool
+    def _run(self, ...):
+        ...
+
+Setting ADGM_PROFILE=cprofile (or pyinstrument) profiles a whole run through
+profiled(), writing adgm_profile.prof (or adgm_profile.html).
+"""
+import contextvars
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Optional
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("adgm_current_span", default=None)
+_write_lock = threading.Lock()
+
+
+def _trace_file() -> Optional[str]:
+    return os.getenv("ADGM_TRACE_FILE") or None
+
+
+def enabled() -> bool:
+    return _trace_file() is not None
+
+
+def _size(value: Any) -> int:
+    """Rough payload size in characters"""
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def _export(record: Dict[str, Any]):
+    path = _trace_file()
+    if not path:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class Span:
+    """A timed operation with attributes, exported when it ends"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, start_ns: Optional[int] = None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = start_ns or time.time_ns()
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: float = 1):
+        """Increment a numeric attribute, e.g. token counts over several LLM calls"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, end_ns: Optional[int] = None):
+        end_ns = end_ns or time.time_ns()
+        _export({
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": "INTERNAL",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": end_ns,
+            "durationMs": (end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "resource": {"service.name": "adgm-corporate-agent", "process.pid": os.getpid()},
+        })
+
+
+class _NoopSpan:
+    """Stand-in used when tracing is disabled"""
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key: str, amount: float = 1):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the enclosed block as a child of the current span"""
+    if not enabled():
+        yield _NOOP
+        return
+
+    current = Span(name, parent=_current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def current_span():
+    """The active span, or a no-op span when tracing is disabled"""
+    return _current_span.get() or _NOOP
+
+
+def _record_result(s, result):
+    s.set(output_chars=_size(result))
+    if isinstance(result, dict) and "status" in result:
+        s.set(result_status=result["status"])
+
+
+def traced_tool(run):
+    """Wrap a BaseTool._run (or async _arun) so each call is recorded with input and output sizes"""
+
+    if inspect.iscoroutinefunction(run):
+        @wraps(run)
+        async def async_wrapper(self, *args, **kwargs):
+            if not enabled():
+                return await run(self, *args, **kwargs)
+
+            with span(f"tool:{self.name}", tool=type(self).__name__, input_chars=_size([args, kwargs]), run_async=True) as s:
+                result = await run(self, *args, **kwargs)
+                _record_result(s, result)
+                return result
+
+        return async_wrapper
+
+    @wraps(run)
+    def wrapper(self, *args, **kwargs):
+        if not enabled():
+            return run(self, *args, **kwargs)
+
+        with span(f"tool:{self.name}", tool=type(self).__name__, input_chars=_size([args, kwargs])) as s:
+            result = run(self, *args, **kwargs)
+            _record_result(s, result)
+            return result
+
+    return wrapper
+
+
+def token_usage_callback():
+    """A langchain callback that adds LLM token usage to the current span, or None when disabled"""
+    if not enabled():
+        return None
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    target = current_span()
+
+    class _TokenUsageHandler(BaseCallbackHandler):
+        def on_llm_end(self, response, **kwargs):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            if not usage:
+                # Newer chat models report usage on the message instead
+                for generations in response.generations:
+                    for generation in generations:
+                        metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                        usage = {
+                            "prompt_tokens": metadata.get("input_tokens", 0),
+                            "completion_tokens": metadata.get("output_tokens", 0),
+                        }
+            target.add("llm.calls")
+            target.add("llm.prompt_tokens", usage.get("prompt_tokens", 0))
+            target.add("llm.completion_tokens", usage.get("completion_tokens", 0))
+
+    return _TokenUsageHandler()
+
+
+def task_recorder(parent: Optional[Span] = None):
+    """
+    Callback for Crew(task_callback=...) that records one span per finished task.
+    crewai only reports completion, so each task span starts where the previous one ended.
+    """
+    last_end = [time.time_ns()]
+
+    def record(output):
+        if not enabled():
+            return
+        now = time.time_ns()
+        task_span = Span(
+            f"task:{getattr(output, 'name', None) or getattr(output, 'description', '')[:60]}",
+            parent=parent or _current_span.get(),
+            start_ns=last_end[0],
+            agent=getattr(output, "agent", None),
+            output_chars=_size(getattr(output, "raw", "")),
+        )
+        task_span.end(now)
+        last_end[0] = now
+
+    return record
+
+
+@contextmanager
+def profiled(mode: Optional[str] = None, output: Optional[str] = None):
+    """Profile the enclosed block with cProfile or pyinstrument (ADGM_PROFILE selects one)"""
+    mode = (mode or os.getenv("ADGM_PROFILE") or "").lower()
+
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            output = output or "adgm_profile.prof"
+            profiler.dump_stats(output)
+            print(f"📈 cProfile stats written to {output}")
+
+    elif mode == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            output = output or "adgm_profile.html"
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            print(f"📈 pyinstrument report written to {output}")
+
+    else:
+        yield
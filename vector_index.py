@@ -0,0 +1,296 @@
+"""
+Compact persistent vector index, an alternative to Chroma for small corpora.
+
+The chunk vectors are stored L2-normalized as one float32 (or float16) NumPy
+matrix, vectors-<generation>.npy, next to a JSON sidecar (index.json) holding
+the ids, texts and metadata of the rows and the name of the current matrix.
+Opening the index memory-maps the matrix read-only, so it costs a JSON read
+and every worker process on the machine shares the same pages. Queries are one
+vectorized dot product against all rows (optionally masked by a metadata
+filter), which for a few thousand 384-dim vectors is faster than an HNSW walk.
+
+NumpyCollection answers the subset of the Chroma collection API ADGMRAGTool,
+BM25Index and build_index.py use (count, get, query, upsert, delete), so the
+rest of the pipeline does not care which store it talks to. Upserts and
+deletions are buffered until flush(), which applies them in one pass (one
+concatenation however many write batches came in), writes a new matrix and
+then swaps the sidecar atomically: readers always see a consistent matrix and
+sidecar, and processes still mapping the previous matrix keep reading it.
+Reads see the state of the last flush.
+
+Select it with {"vector_store": {"backend": "numpy"}} in rag_config.json, see
+bench_vector_index.py for a comparison with Chroma.
+"""
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+SIDECAR_FILENAME = "index.json"
+DTYPES = ("float16", "float32")
+
+
+def _normalized(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def maximal_marginal_relevance(query, candidates, k: int = 4, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Indices of k candidates chosen by maximal marginal relevance: each step takes the
+    candidate maximizing lambda_mult * sim(query) - (1 - lambda_mult) * max sim(selected),
+    starting from the one most similar to the query. Similarities are cosine.
+    """
+    candidates = _normalized(candidates) if len(candidates) else np.empty((0, 0), dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+
+    relevance = candidates @ _normalized(query)[0]
+    pairwise = candidates @ candidates.T
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to the selected set, updated one row at a time
+    redundancy = pairwise[selected[0]].copy()
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
+
+
+class NumpyCollection:
+    """Chroma-compatible collection over a memory-mapped vector matrix"""
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype!r}, expected one of {DTYPES}")
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Map the matrix named by the sidecar, or start empty"""
+        sidecar_path = os.path.join(self.path, SIDECAR_FILENAME)
+        try:
+            with open(sidecar_path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+        except (OSError, ValueError):
+            sidecar = None
+
+        if sidecar and sidecar["ids"]:
+            matrix = np.load(os.path.join(self.path, sidecar["matrix"]), mmap_mode="r")
+            if matrix.shape[0] != len(sidecar["ids"]):
+                raise ValueError(f"Vector index in {self.path} is inconsistent, rebuild it with `python build_index.py --rebuild`")
+            self._matrix = matrix
+            self._ids = sidecar["ids"]
+            self._documents = sidecar["documents"]
+            self._metadatas = sidecar["metadatas"]
+            self._matrix_file = sidecar["matrix"]
+        else:
+            self._matrix = None
+            self._ids, self._documents, self._metadatas = [], [], []
+            self._matrix_file = None
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        self._columns: Dict[str, np.ndarray] = {}
+        # Writes waiting for flush(): rows by id in arrival order, and ids to drop
+        self._pending: "OrderedDict[str, Tuple[np.ndarray, str, Dict[str, Any]]]" = OrderedDict()
+        self._deleted: set = set()
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            rows = range(len(self._ids)) if ids is None else [self._positions[i] for i in ids if i in self._positions]
+            result = {"ids": [self._ids[i] for i in rows]}
+            if "documents" in include:
+                result["documents"] = [self._documents[i] for i in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadatas[i] for i in rows]
+            if "embeddings" in include:
+                result["embeddings"] = np.asarray(self._matrix[list(rows)], dtype=np.float32) \
+                    if self._matrix is not None else np.empty((0, 0), dtype=np.float32)
+            return result
+
+    def _column(self, key: str) -> np.ndarray:
+        """One metadata field of every row, cached for filtering"""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.array([(m or {}).get(key) for m in self._metadatas], dtype=object)
+            self._columns[key] = column
+        return column
+
+    def _rows(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row indices matching a Chroma-style where filter, None for all rows"""
+        if not where:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            column = self._column(key)
+            if isinstance(condition, dict):
+                if set(condition) != {"$in"}:
+                    raise ValueError(f"Unsupported filter {condition!r}, only equality and $in are supported")
+                mask &= np.isin(column, list(condition["$in"]))
+            else:
+                mask &= column == condition
+        return np.flatnonzero(mask)
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict[str, Any]] = None,
+              include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Top n_results rows per query by cosine similarity, shaped like Chroma's query result"""
+        include = include or ["documents", "metadatas", "distances"]
+        queries = _normalized(query_embeddings)
+        with self._lock:
+            rows = self._rows(where)
+            matrix = self._matrix
+            if matrix is None or (rows is not None and len(rows) == 0):
+                top = np.empty((len(queries), 0), dtype=np.intp)
+                scores = np.empty((len(queries), 0), dtype=np.float32)
+            else:
+                candidates = matrix if rows is None else matrix[rows]
+                scores = queries @ candidates.T.astype(np.float32, copy=False)
+                n = min(n_results, scores.shape[1])
+                top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+                order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+                top = np.take_along_axis(top, order, axis=1)
+                scores = np.take_along_axis(scores, top, axis=1)
+                if rows is not None:
+                    top = rows[top]
+
+            result = {"ids": [[self._ids[i] for i in row] for row in top]}
+            if "distances" in include:
+                # Cosine distance, smaller is closer as with Chroma
+                result["distances"] = [(1.0 - row).tolist() for row in scores]
+            if "documents" in include:
+                result["documents"] = [[self._documents[i] for i in row] for row in top]
+            if "metadatas" in include:
+                result["metadatas"] = [[self._metadatas[i] for i in row] for row in top]
+            if "embeddings" in include:
+                result["embeddings"] = [np.asarray(matrix[row], dtype=np.float32) for row in top] \
+                    if matrix is not None else [np.empty((0, 0), dtype=np.float32) for _ in top]
+            return result
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Add or replace rows, buffered until flush()"""
+        vectors = _normalized(embeddings).astype(self.dtype)
+        with self._lock:
+            for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                self._deleted.discard(chunk_id)
+                self._pending[chunk_id] = (vector, document, metadata)
+            self._dirty = True
+
+    def delete(self, ids: List[str]):
+        """Drop rows by id, buffered until flush()"""
+        with self._lock:
+            for chunk_id in ids:
+                self._pending.pop(chunk_id, None)
+                if chunk_id in self._positions:
+                    self._deleted.add(chunk_id)
+                    self._dirty = True
+
+    def _apply_pending(self):
+        """Fold the buffered writes into the rows: one gather of the kept rows and one concatenation"""
+        keep = [i for i, chunk_id in enumerate(self._ids) if chunk_id not in self._deleted]
+        if self._matrix is not None and keep:
+            matrix = np.asarray(self._matrix[keep], dtype=self.dtype)
+        else:
+            dim = len(next(iter(self._pending.values()))[0]) if self._pending else 0
+            matrix = np.empty((0, dim), dtype=self.dtype)
+        ids = [self._ids[i] for i in keep]
+        documents = [self._documents[i] for i in keep]
+        metadatas = [self._metadatas[i] for i in keep]
+        positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+
+        new_rows = []
+        for chunk_id, (vector, document, metadata) in self._pending.items():
+            position = positions.get(chunk_id)
+            if position is None:
+                ids.append(chunk_id)
+                documents.append(document)
+                metadatas.append(metadata)
+                new_rows.append(vector)
+            else:
+                matrix[position] = vector
+                documents[position] = document
+                metadatas[position] = metadata
+        if new_rows:
+            matrix = np.concatenate([matrix, np.stack(new_rows)])
+
+        self._matrix = matrix if len(ids) else None
+        self._ids, self._documents, self._metadatas = ids, documents, metadatas
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        self._columns = {}
+        self._pending = OrderedDict()
+        self._deleted = set()
+
+    def flush(self):
+        """Apply the buffered writes, write a new matrix, swap the sidecar to it and remove superseded matrices"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._apply_pending()
+            os.makedirs(self.path, exist_ok=True)
+            matrix_file = f"vectors-{uuid.uuid4().hex[:12]}.npy"
+            if self._matrix is not None:
+                np.save(os.path.join(self.path, matrix_file), np.asarray(self._matrix, dtype=self.dtype))
+            else:
+                matrix_file = None
+
+            sidecar_path = os.path.join(self.path, SIDECAR_FILENAME)
+            with open(sidecar_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({
+                    "matrix": matrix_file,
+                    "dtype": self.dtype,
+                    "ids": self._ids,
+                    "documents": self._documents,
+                    "metadatas": self._metadatas,
+                }, f)
+            os.replace(sidecar_path + ".tmp", sidecar_path)
+
+            for filename in os.listdir(self.path):
+                if filename.startswith("vectors-") and filename != matrix_file:
+                    try:
+                        os.remove(os.path.join(self.path, filename))
+                    except OSError:
+                        pass  # Still mapped on Windows, removed by a later flush
+            # Serve from the mapped file again instead of the in-memory copy
+            self._matrix = np.load(os.path.join(self.path, matrix_file), mmap_mode="r") if matrix_file else None
+            self._matrix_file = matrix_file
+            self._dirty = False
+
+    def clear(self):
+        """Remove every row and the files on disk"""
+        with self._lock:
+            for filename in os.listdir(self.path) if os.path.exists(self.path) else []:
+                if filename.startswith("vectors-") or filename.startswith(SIDECAR_FILENAME):
+                    try:
+                        os.remove(os.path.join(self.path, filename))
+                    except OSError:
+                        pass
+            self._dirty = False
+            self._load()
+
+
+class NumpyVectorStore:
+    """The parts of the LangChain Chroma wrapper ADGMRAGTool uses, over a NumpyCollection"""
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        self._collection = NumpyCollection(path, dtype)
+
+    def delete(self, ids: List[str]):
+        self._collection.delete(ids)
+
+    def delete_collection(self):
+        self._collection.clear()
+
+    def flush(self):
+        self._collection.flush()
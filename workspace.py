@@ -0,0 +1,35 @@
+"""
+Input and output directories for a run.
+
+Tools read submissions from documents_dir() and write results to output_dir().
+Both default to documents/ and corrected_documents/ under the working
+directory and can be pointed elsewhere with ADGM_DOCUMENTS_DIR and
+ADGM_OUTPUT_DIR, which is how the batch runner gives every job its own
+isolated directories.
+"""
+import os
+from contextlib import contextmanager
+
+
+def documents_dir() -> str:
+    return os.getenv("ADGM_DOCUMENTS_DIR") or os.path.join(os.getcwd(), "documents")
+
+
+def output_dir() -> str:
+    return os.getenv("ADGM_OUTPUT_DIR") or os.path.join(os.getcwd(), "corrected_documents")
+
+
+@contextmanager
+def use_workspace(documents: str, output: str):
+    """Point documents_dir() and output_dir() at the given directories for the enclosed block"""
+    previous = {name: os.environ.get(name) for name in ("ADGM_DOCUMENTS_DIR", "ADGM_OUTPUT_DIR")}
+    os.environ["ADGM_DOCUMENTS_DIR"] = os.path.abspath(documents)
+    os.environ["ADGM_OUTPUT_DIR"] = os.path.abspath(output)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value